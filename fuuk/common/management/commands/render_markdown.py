@@ -0,0 +1,59 @@
+from multiprocessing import cpu_count, Pool
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from fuuk.common.markup import get_columns, get_registered_models, markdown_rendered, render_markdown
+
+
+def _render_row(row):
+    pk, sources = row
+    return pk, [render_markdown(source) for source in sources]
+
+
+class Command(BaseCommand):
+    help = 'Renders and stores HTML of all markdown fields'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=cpu_count(), help='Number of rendering processes')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Number of objects stored at once')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        chunk_size = options['chunk_size']
+        pool = Pool(options['processes']) if options['processes'] > 1 else None
+        try:
+            for model in get_registered_models():
+                columns = get_columns(model)
+                sources, targets = [c[0] for c in columns], [c[1] for c in columns]
+                rows = [(row[0], row[1:]) for row in model.objects.order_by('pk').values_list('pk', *sources)]
+                if pool is None:
+                    results = (_render_row(row) for row in rows)
+                else:
+                    results = pool.imap(_render_row, rows, chunk_size)
+                count = 0
+                for chunk in self._get_chunks(results, chunk_size):
+                    # Update bypasses signals, so the sources are not rendered again
+                    with transaction.atomic():
+                        for pk, html in chunk:
+                            model.objects.filter(pk=pk).update(**dict(zip(targets, html)))
+                    count += len(chunk)
+                    if verbosity >= 2:
+                        self.stdout.write('Rendered %d %s' % (count, model._meta.verbose_name_plural))
+                markdown_rendered.send(sender=model)
+                if verbosity >= 1:
+                    self.stdout.write('Markdown of %d %s rendered' % (count, model._meta.verbose_name_plural))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def _get_chunks(self, iterable, chunk_size):
+        chunk = []
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
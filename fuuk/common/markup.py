@@ -0,0 +1,134 @@
+"""
+Markdown fields rendered on save.
+
+HTML of each registered field is stored in a `<field>_html` field. Registered fields are expected to be translated by
+modeltranslation, so the HTML is rendered and stored for every language column.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.db.models.signals import pre_save
+from django.dispatch import Signal
+from django.utils.encoding import force_bytes
+from markdownx.settings import MARKDOWNX_MARKDOWN_EXTENSION_CONFIGS, MARKDOWNX_MARKDOWN_EXTENSIONS
+from markdownx.utils import markdownify
+from modeltranslation.settings import AVAILABLE_LANGUAGES
+from modeltranslation.utils import build_localized_fieldname
+
+from fuuk.common.timing import timer
+
+_REGISTRY = OrderedDict()
+# Number of memoized editor previews
+PREVIEW_CACHE_SIZE = 128
+
+# Sent when HTML of all objects of a model was rendered and stored without saving the objects
+markdown_rendered = Signal()
+
+
+def render_markdown(value):
+    """
+    Returns HTML created by markdown language.
+    """
+    if not value:
+        return u''
+    # Use the `markdownify` from `markdownx` to get the same results as the editor preview.
+    with timer('markdown'):
+        return markdownify(value)
+
+
+def get_columns(model):
+    """
+    Returns list of pairs of source and HTML field names of the registered model.
+    """
+    return [(build_localized_fieldname(field, language), build_localized_fieldname('%s_html' % field, language))
+            for field in _REGISTRY[model] for language in AVAILABLE_LANGUAGES]
+
+
+def get_registered_models():
+    return list(_REGISTRY)
+
+
+def render_instance(instance):
+    """
+    Renders and sets HTML of all markdown fields of the instance.
+    """
+    for source, target in get_columns(type(instance)):
+        setattr(instance, target, render_markdown(getattr(instance, source)))
+
+
+def _render_on_save(sender, instance, **kwargs):
+    render_instance(instance)
+
+
+def register(model, fields):
+    """
+    Registers markdown fields of the model to be rendered on save.
+    """
+    _REGISTRY[model] = tuple(fields)
+    pre_save.connect(_render_on_save, sender=model,
+                     dispatch_uid='markdown:%s.%s' % (model._meta.app_label, model._meta.model_name))
+
+
+###############################################################################
+# Editor preview
+class PreviewCache(object):
+    """
+    Bounded LRU cache, which renders each value only once even if it is requested by several threads at once.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+        # Events of values being rendered
+        self.pending = {}
+
+    def get(self, key, render):
+        """
+        Returns cached value or a value returned by `render`.
+        """
+        with self.lock:
+            if key in self.items:
+                value = self.items.pop(key)
+                self.items[key] = value
+                return value
+            event = self.pending.get(key)
+            if event is None:
+                event = self.pending[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            event.wait()
+            with self.lock:
+                if key in self.items:
+                    return self.items[key]
+            # Rendering failed or the value was already evicted
+            return render()
+
+        try:
+            value = render()
+            with self.lock:
+                self.items[key] = value
+                while len(self.items) > self.size:
+                    self.items.popitem(last=False)
+        finally:
+            with self.lock:
+                del self.pending[key]
+            event.set()
+        return value
+
+
+_EXTENSIONS_KEY = (tuple(MARKDOWNX_MARKDOWN_EXTENSIONS), repr(sorted(MARKDOWNX_MARKDOWN_EXTENSION_CONFIGS.items())))
+_preview_cache = PreviewCache(PREVIEW_CACHE_SIZE)
+
+
+def markdownify_preview(content):
+    """
+    Returns HTML of markdown editor preview.
+
+    Previews are memoized by hash of the content and markdown extensions.
+    """
+    key = (hashlib.sha1(force_bytes(content)).hexdigest(), _EXTENSIONS_KEY)
+    return _preview_cache.get(key, lambda: markdownify(content))
@@ -0,0 +1,66 @@
+"""
+Middlewares of the site.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from fuuk.common import timing
+
+logger = logging.getLogger('fuuk.timing')
+
+
+class ServerTimingMiddleware(object):
+    """
+    Measures requests and reports timings in the `Server-Timing` header.
+
+    Reports number and duration of SQL queries, rendering of template responses, sections measured by
+    `fuuk.common.timing.timer` and total time of the request. Queries are recorded by forcing debug cursors of all
+    database connections for the duration of the request. Content of streaming responses is rendered after the timings
+    are reported, so it isn't included.
+
+    If `SERVER_TIMING_LOG` setting is `True`, timings are also logged as JSON by `fuuk.timing` logger.
+    """
+    def process_request(self, request):
+        timing.start()
+        request._timing_start = time.time()
+        # Alias -> (original flag, number of queries logged before the request)
+        request._timing_queries = {}
+        for connection in connections.all():
+            request._timing_queries[connection.alias] = (connection.force_debug_cursor, len(connection.queries_log))
+            connection.force_debug_cursor = True
+
+    def process_template_response(self, request, response):
+        timings = timing.get_timings()
+        if timings is not None:
+            start_time = time.time()
+            response.add_post_render_callback(lambda r: timings.add('template', time.time() - start_time))
+        return response
+
+    def process_response(self, request, response):
+        timings = timing.stop()
+        if timings is None or not hasattr(request, '_timing_start'):
+            # Request was not measured, e.g. an earlier middleware returned a response
+            return response
+
+        duration, count = 0.0, 0
+        for alias, (forced, logged) in request._timing_queries.items():
+            connection = connections[alias]
+            queries = list(connection.queries_log)[logged:]
+            connection.force_debug_cursor = forced
+            duration += sum(float(query['time']) for query in queries)
+            count += len(queries)
+        timings.add('sql', duration, count)
+        timings.add('total', time.time() - request._timing_start)
+        response['Server-Timing'] = timings.get_header()
+
+        if getattr(settings, 'SERVER_TIMING_LOG', False):
+            resolver_match = getattr(request, 'resolver_match', None)
+            data = timings.as_dict()
+            data.update(view=resolver_match.view_name if resolver_match else None, path=request.path,
+                        method=request.method, status=response.status_code)
+            logger.info(json.dumps(data, sort_keys=True), extra={'timings': data})
+        return response
@@ -6,6 +6,8 @@ from django.template.defaultfilters import stringfilter
 from django.utils.safestring import mark_safe
 from markdownx.utils import markdownify
 
+from fuuk.common.timing import timer
+
 register = template.Library()
 
 
@@ -16,4 +18,5 @@ def markdown(value):
     Returns HTML created by markdown language.
     """
     # Use the `markdownify` from `markdownx` to get the same results.
-    return mark_safe(markdownify(value))
+    with timer('markdown'):
+        return mark_safe(markdownify(value))
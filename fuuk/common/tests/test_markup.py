@@ -0,0 +1,110 @@
+"""
+Unittests for markdown fields
+"""
+import threading
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from mock import patch
+
+from fuuk.common.markup import PreviewCache, render_markdown
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.people.models import Human
+
+
+class TestRenderMarkdown(TestCase):
+    """
+    Test markdown fields are rendered on save.
+    """
+    def test_render_markdown(self):
+        self.assertEqual(render_markdown(None), '')
+        self.assertEqual(render_markdown(''), '')
+        self.assertEqual(render_markdown('### Header ###'), '<h3>Header</h3>')
+
+    def test_save(self):
+        human = Human.objects.create(nickname='Human', cv_en='### CV ###', cv_cs='### Zivotopis ###', stays_en='Stays')
+        human = Human.objects.get(pk=human.pk)
+        self.assertEqual(human.cv_html_en, '<h3>CV</h3>')
+        self.assertEqual(human.cv_html_cs, '<h3>Zivotopis</h3>')
+        self.assertEqual(human.stays_html_en, '<p>Stays</p>')
+        self.assertEqual(human.stays_html_cs, '')
+        self.assertEqual(human.interests_html_en, '')
+
+        human.cv_en = 'Changed'
+        human.save()
+        self.assertEqual(Human.objects.get(pk=human.pk).cv_html_en, '<p>Changed</p>')
+
+    def test_command(self):
+        human = Human.objects.create(nickname='Human', cv_en='### CV ###')
+        page = FlatPage.objects.create(url='/page/', title='Page', content_en='Content')
+        Human.objects.update(cv_html_en='')
+        FlatPage.objects.update(content_html_en='')
+        call_command('render_markdown', processes=1, verbosity=0)
+        self.assertEqual(Human.objects.get(pk=human.pk).cv_html_en, '<h3>CV</h3>')
+        self.assertEqual(FlatPage.objects.get(pk=page.pk).content_html_en, '<p>Content</p>')
+
+    def test_command_parallel(self):
+        for i in range(5):
+            Human.objects.create(nickname='Human%d' % i, cv_en='CV %d' % i)
+        Human.objects.update(cv_html_en='')
+        call_command('render_markdown', processes=2, chunk_size=2, verbosity=0)
+        self.assertEqual(sorted(Human.objects.values_list('cv_html_en', flat=True)),
+                         ['<p>CV %d</p>' % i for i in range(5)])
+
+
+class TestPreviewCache(SimpleTestCase):
+    """
+    Test `PreviewCache` class.
+    """
+    def test_lru(self):
+        cache = PreviewCache(2)
+        self.assertEqual(cache.get('a', lambda: 'A'), 'A')
+        self.assertEqual(cache.get('b', lambda: 'B'), 'B')
+        self.assertEqual(cache.get('a', lambda: 'changed'), 'A')
+        self.assertEqual(cache.get('c', lambda: 'C'), 'C')
+        # 'b' is the least recently used
+        self.assertEqual(list(cache.items), ['a', 'c'])
+        self.assertEqual(cache.get('b', lambda: 'B2'), 'B2')
+
+    def test_coalesce(self):
+        cache = PreviewCache(2)
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+
+        def render():
+            calls.append(1)
+            started.set()
+            finish.wait()
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('key', render))) for i in range(3)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        finish.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 3)
+        self.assertEqual(len(calls), 1)
+
+    def test_failure(self):
+        cache = PreviewCache(2)
+        with self.assertRaises(ValueError):
+            cache.get('key', lambda: int('invalid'))
+        self.assertEqual(cache.pending, {})
+        self.assertEqual(cache.get('key', lambda: 'value'), 'value')
+
+
+class TestMarkdownifyPreview(SimpleTestCase):
+    """
+    Test preview of markdownx editor.
+    """
+    def test_view(self):
+        with patch('fuuk.common.markup.markdownify', return_value='<p>HTML</p>') as markdownify_mock:
+            for i in range(2):
+                response = self.client.post('/markdownx/markdownify/', {'content': 'Preview test'})
+                self.assertEqual(response.content, '<p>HTML</p>')
+        markdownify_mock.assert_called_once_with('Preview test')
@@ -0,0 +1,77 @@
+"""
+Tests of middlewares.
+"""
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from fuuk.common import timing
+from fuuk.people.models import Article
+
+MIDDLEWARE_CLASSES = ('fuuk.common.middleware.ServerTimingMiddleware', ) + settings.MIDDLEWARE_CLASSES
+
+
+@override_settings(LANGUAGE_CODE='en', MIDDLEWARE_CLASSES=MIDDLEWARE_CLASSES)
+class TestServerTimingMiddleware(TestCase):
+    """
+    Test `ServerTimingMiddleware`.
+    """
+    def setUp(self):
+        Article.objects.create(type='ARTICLE', year=2013, title='Article')
+
+    def _get_metrics(self, response):
+        return dict(item.split(';')[0:2] for item in response['Server-Timing'].split(', '))
+
+    def test_header(self):
+        response = self.client.get('/people/articles/2013/')
+        metrics = self._get_metrics(response)
+        self.assertEqual(set(metrics), {'sql', 'template', 'citation', 'total'})
+        self.assertRegexpMatches(response['Server-Timing'], r'citation;dur=[0-9.]+;desc="1"')
+        self.assertFalse(connection.force_debug_cursor)
+
+    def test_not_found(self):
+        response = self.client.get('/people/person/Unknown/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('total', self._get_metrics(response))
+
+    @override_settings(SERVER_TIMING_LOG=True)
+    def test_log(self):
+        with patch('fuuk.common.middleware.logger') as logger:
+            self.client.get('/people/articles/2013/')
+        data = json.loads(logger.info.call_args[0][0])
+        self.assertEqual(data['view'], 'articles')
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['citation_count'], 1)
+        self.assertGreater(data['sql_count'], 0)
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestServerTimingDisabled(TestCase):
+    """
+    Test requests are not measured without `ServerTimingMiddleware`.
+    """
+    def test_disabled(self):
+        response = self.client.get('/people/articles/')
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertIsNone(timing.get_timings())
+
+
+class TestTimer(SimpleTestCase):
+    """
+    Test `timer` context manager.
+    """
+    def tearDown(self):
+        timing.stop()
+
+    def test_markdown(self):
+        template = Template('{% load markup %}{{ text|markdown }}{{ text|markdown }}')
+        template.render(Context({'text': 'Text'}))
+        self.assertIsNone(timing.get_timings())
+        timing.start()
+        template.render(Context({'text': 'Text'}))
+        self.assertEqual(timing.stop().items['markdown'][1], 2)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Query and size budgets of public pages.
+
+Pages are requested with empty caches against a fixture with several objects of each kind, so queries run for each
+listed object exceed the budgets.
+"""
+import re
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import RegexURLResolver
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.fuflatpages.urls import urlpatterns as FLATPAGES_PATTERNS
+from fuuk.people.models import (Agency, Article, Attachment, Author, Course, Department, Grant, Human, News, Person,
+                                Place, Thesis)
+from fuuk.people.urls import HUMAN_PATTERNS, PEOPLE_URLPATTERNS
+
+# Path -> (maximal number of queries, maximal size of content in kB), paths are formatted by IDs of fixture objects
+BUDGETS = (
+    # People
+    ('/people/articles/', 5, 8),
+    ('/people/articles/2014/', 5, 8),
+    ('/people/articles/2014/export/bibtex/', 5, 2),
+    ('/people/papers/', 5, 4),
+    ('/people/export/ris/', 4, 4),
+    ('/people/grants/', 3, 6),
+    ('/people/grants/{grant}/', 7, 6),
+    ('/people/theses/', 2, 6),
+    ('/people/theses/?type=phd', 3, 6),
+    ('/people/thesis/id={thesis}/', 6, 6),
+    ('/people/courses/', 3, 8),
+    ('/people/downloads/', 4, 8),
+    ('/people/search/?q=tester', 2, 8),
+    ('/people/phd/', 3, 8),
+    ('/people/staff/', 3, 8),
+    ('/people/other/', 3, 8),
+    ('/people/students/', 4, 6),
+    ('/people/graduates/', 3, 6),
+    ('/people/retired/', 3, 6),
+    # Persons
+    ('/people/person/Staff_0/', 10, 8),
+    ('/people/person/Staff_0/papers/', 10, 15),
+    ('/people/person/Staff_0/papers/first/', 10, 15),
+    ('/people/person/Staff_0/papers/export/csl/', 6, 8),
+    ('/people/person/Staff_0/courses/', 11, 15),
+    ('/people/person/Staff_0/students/', 10, 12),
+    ('/people/person/Staff_0/grants/', 12, 14),
+    # Flatpages
+    ('/', 6, 5),
+    ('/about/', 5, 5),
+)
+# Number of duplicated queries reported on overflow
+REPORTED_QUERIES = 5
+
+
+def _normalize_query(sql):
+    # Queries run for each object differ only in parameters
+    match = re.match(r"QUERY = u?'(.*)' - PARAMS = ", sql, re.DOTALL)
+    if match:
+        return match.group(1)
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    return re.sub(r'\b\d+\b', '?', sql)
+
+
+def get_duplicates(queries):
+    """
+    Returns list of normalized queries executed more than once and their counts, most common first.
+    """
+    counts = Counter(_normalize_query(query['sql']) for query in queries)
+    return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+def _get_resolvers():
+    return (RegexURLResolver(r'^/people/', PEOPLE_URLPATTERNS), RegexURLResolver(r'^/people/person/', HUMAN_PATTERNS),
+            RegexURLResolver(r'^/', FLATPAGES_PATTERNS))
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestQueryBudget(TestCase):
+    """
+    Test public pages don't exceed their budgets.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Department')
+        places = [Place.objects.create(department=department, name='Room %d' % i) for i in range(3)]
+        agency = Agency.objects.create(shortcut='GA', name='Agency')
+
+        def create_person(nickname, type, **kwargs):
+            human = Human.objects.create(nickname=nickname, cv_en='Curriculum *vitae*', interests_en='Interests')
+            person = Person.objects.create(human=human, type=type, first_name=nickname.split('_')[0],
+                                           last_name='Tester %s' % nickname, **kwargs)
+            person.place.add(*places[:2])
+            return person
+
+        staff = [create_person('Staff_%d' % i, 'STAFF') for i in range(4)]
+        for i in range(2):
+            create_person('Other_%d' % i, 'OTHER')
+            create_person('Retired_%d' % i, 'STAFF', is_active=False)
+            create_person('Graduate_%d' % i, 'GRAD')
+            create_person('Bachelor_%d' % i, 'BC', class_year=2, advisor=staff[0])
+        students = [create_person('Phd_%d' % i, 'PHD', class_year=i + 1, advisor=staff[0]) for i in range(3)]
+        students += [create_person('Master_%d' % i, 'MGR', class_year=1, advisor=staff[0]) for i in range(3)]
+        externals = [Person.objects.create(first_name='External', last_name='Author %d' % i) for i in range(3)]
+
+        types = ('ARTICLE', 'ARTICLE', 'BOOK', 'TALK', 'INVITED', 'POSTER')
+        for i in range(12):
+            article = Article.objects.create(
+                type=types[i % len(types)], year=2014 - i % 3, title='Article %d' % i, publication='Journal',
+                volume=str(i), page_from='1', publishers='Publisher', place='Prague', presenter=staff[0])
+            for order, person in enumerate((staff[0], students[i % 6], externals[i % 3], staff[i % 4]), start=1):
+                if not article.author_set.filter(person=person).exists():
+                    Author.objects.create(article=article, person=person, order=order)
+
+        for i in range(4):
+            grant = Grant.objects.create(author=staff[i], number='GA-%d' % i, start=2010, end=date.today().year + i - 1,
+                                         agency=agency, title='Grant %d' % i, annotation='Grant *annotation*')
+            grant.co_authors.add(staff[0] if i else staff[1], externals[i % 3])
+
+            course = Course.objects.create(code='NOOE%03d' % i, name_en='Course %d' % i, ls='2/2', zs='2/0')
+            course.lectors.add(staff[0], staff[i])
+            course.practical_lectors.add(students[i])
+            for j in range(2):
+                Attachment.objects.create(course=course, title='Attachment %d' % j, file='attachment/file%d.pdf' % j)
+
+        for i, student in enumerate(students):
+            thesis = Thesis.objects.create(type=student.type, year=2010 + i, author=student, advisor=staff[0],
+                                           title='Thesis %d' % i, defended=bool(i % 2), annotation='Annotation')
+            thesis.consultants.add(staff[1], staff[2])
+        cls.ids = {'grant': grant.pk, 'thesis': thesis.pk}
+
+        today = date.today()
+        for i in range(3):
+            News.objects.create(start=today - timedelta(days=i), end=today + timedelta(days=i), title_en='News %d' % i,
+                                content_en='Content', hyperlink='http://example.com/')
+        for url in ('/', '/about/', '/about/history/'):
+            page = FlatPage.objects.create(url=url, title_en='Page %s' % url, content_en='Page *content*')
+            page.sites.add(settings.SITE_ID)
+
+    def _request(self, path):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+            if response.streaming:
+                content = b''.join(response.streaming_content)
+            else:
+                content = response.content
+        return response, content, context.captured_queries
+
+    def test_covered(self):
+        # Each route has a budget
+        paths = [path.format(**self.ids).split('?')[0] for path, queries, size in BUDGETS]
+        for resolver in _get_resolvers():
+            for pattern in resolver.url_patterns:
+                matched = [p for p in paths if resolver.regex.match(p)
+                           and pattern.resolve(p[resolver.regex.match(p).end():])]
+                self.assertTrue(matched, 'No budget for %s%s' % (resolver.regex.pattern, pattern.regex.pattern))
+
+    def test_budgets(self):
+        overflows = []
+        for path, max_queries, max_size in BUDGETS:
+            path = path.format(**self.ids)
+            response, content, queries = self._request(path)
+            self.assertEqual(response.status_code, 200, '%s returned %d' % (path, response.status_code))
+            size = len(content) / 1024.0
+            if len(queries) > max_queries or size > max_size:
+                report = ['%s: %d queries (budget %d), %.1f kB (budget %d kB)'
+                          % (path, len(queries), max_queries, size, max_size)]
+                for sql, count in get_duplicates(queries)[:REPORTED_QUERIES]:
+                    report.append('  %dx %s' % (count, sql))
+                overflows.append('\n'.join(report))
+        self.assertFalse(overflows, 'Budgets exceeded:\n%s' % '\n'.join(overflows))
@@ -0,0 +1,75 @@
+"""
+Timers of request sections.
+
+Timers are collected only in threads serving a request measured by `fuuk.common.middleware.ServerTimingMiddleware`,
+elsewhere `timer` does nothing.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class Timings(object):
+    """
+    Total durations and counts of named sections.
+    """
+    def __init__(self):
+        self.items = OrderedDict()
+
+    def add(self, name, duration, count=1):
+        total, total_count = self.items.get(name, (0.0, 0))
+        self.items[name] = (total + duration, total_count + count)
+
+    def as_dict(self):
+        """
+        Returns durations in milliseconds and counts.
+        """
+        data = {}
+        for name, (duration, count) in self.items.items():
+            data[name] = round(duration * 1000, 3)
+            data['%s_count' % name] = count
+        return data
+
+    def get_header(self):
+        """
+        Returns value of `Server-Timing` header.
+        """
+        return ', '.join('%s;dur=%.3f;desc="%d"' % (name, duration * 1000, count)
+                         for name, (duration, count) in self.items.items())
+
+
+def start():
+    _local.timings = Timings()
+    return _local.timings
+
+
+def stop():
+    """
+    Returns timings of the current thread and stops collecting them.
+    """
+    timings = get_timings()
+    _local.timings = None
+    return timings
+
+
+def get_timings():
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def timer(name):
+    """
+    Adds duration of the block to the section of timings collected by the current thread.
+    """
+    timings = get_timings()
+    if timings is None:
+        yield
+        return
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        timings.add(name, time.time() - start_time)
@@ -0,0 +1,33 @@
+"""
+Common view utilities.
+"""
+import hashlib
+
+from django.utils.encoding import force_bytes
+from django.views.decorators.http import condition
+
+
+def make_etag(*parts):
+    """
+    Returns ETag computed from the parts.
+    """
+    return hashlib.md5(force_bytes(repr(parts))).hexdigest()
+
+
+class ConditionalMixin(object):
+    """
+    Answers conditional GET requests.
+
+    Views define `get_validators` which returns ETag and last modification time of the content, or `None`s if they
+    are unknown. Validators should be much cheaper than rendering the content.
+    """
+    def get_validators(self):
+        return None, None
+
+    def dispatch(self, request, *args, **kwargs):
+        parent_dispatch = super(ConditionalMixin, self).dispatch
+        if request.method not in ('GET', 'HEAD'):
+            return parent_dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        view = condition(etag_func=lambda *a, **kw: etag, last_modified_func=lambda *a, **kw: last_modified)
+        return view(parent_dispatch)(request, *args, **kwargs)
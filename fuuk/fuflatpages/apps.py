@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.core import checks
 from django.utils.translation import ugettext_lazy as _
 
 
 class FlatPagesConfig(AppConfig):
     name = 'fuuk.fuflatpages'
     verbose_name = _("Flat Pages")
+
+    def ready(self):
+        # Connect signal receivers
+        from fuuk.fuflatpages import signals  # noqa
+        from fuuk.fuflatpages.checks import check_shared_cache
+        checks.register(check_shared_cache)
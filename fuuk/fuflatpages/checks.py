@@ -0,0 +1,26 @@
+"""
+System checks of flatpages.
+"""
+from django.conf import settings
+from django.core.checks import Warning
+
+# Cache backends which are not shared by processes
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',
+                        'django.core.cache.backends.dummy.DummyCache')
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warns if the default cache is not shared by processes.
+
+    Routing tables of other processes are rebuilt when a version in the cache changes, see
+    `fuuk.fuflatpages.routing`. Cached person pages and their counters depend on the cache as well.
+    """
+    if settings.DEBUG:
+        return []
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning('Default cache backend %s is not shared by processes.' % backend,
+                    hint='Configure a shared cache, e.g. memcached, otherwise other processes serve stale flatpages.',
+                    id='fuflatpages.W001')]
@@ -0,0 +1,294 @@
+"""
+Benchmarks public pages over HTTP.
+
+The site is served by a threaded `wsgiref` server on a local port and each page is requested by concurrent clients.
+Latency is measured by the clients, queries are counted by the server once the content is sent, so queries run while
+streaming content are included. Person pages are rendered for each request unless the page cache is enabled. Results
+are stored as JSON, so runs can be compared across commits.
+"""
+import httplib
+import itertools
+import json
+import math
+import subprocess
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+from SocketServer import ThreadingMixIn
+from wsgiref.simple_server import make_server, WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from fuuk.fuflatpages.management.commands.export_site import PERSON_PATHS
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.people import facets
+from fuuk.people.models import Article, Author, Grant, Human, Person, Thesis
+from fuuk.people.page_cache import PERSON_VIEWS
+
+PERCENTILES = (50, 95, 99)
+REQUEST_HEADER = 'X-Benchmark-Request'
+# Seconds to wait for the number of queries of a request
+QUERIES_TIMEOUT = 10
+
+
+class _Server(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryCounter(object):
+    """
+    WSGI application which counts queries of requests identified by `REQUEST_HEADER`.
+
+    Queries are recorded by forcing debug cursors of all database connections of the thread, which are reset when
+    a request starts. They are counted once the content is consumed, before the response is closed.
+    """
+    def __init__(self, application):
+        self.application = application
+        self.counts = {}
+        self.condition = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        forced = [(connection, connection.force_debug_cursor) for connection in connections.all()]
+        for connection, flag in forced:
+            connection.force_debug_cursor = True
+        result = self.application(environ, start_response)
+        count = None
+        try:
+            for data in result:
+                yield data
+            count = sum(len(connection.queries_log) for connection, flag in forced)
+        finally:
+            for connection, flag in forced:
+                connection.force_debug_cursor = flag
+            if hasattr(result, 'close'):
+                result.close()
+            with self.condition:
+                self.counts[environ.get('HTTP_' + REQUEST_HEADER.upper().replace('-', '_'))] = count
+                self.condition.notify_all()
+
+    def get_count(self, request_id):
+        """
+        Waits for the request to be finished and returns its number of queries or `None`.
+        """
+        deadline = time.time() + QUERIES_TIMEOUT
+        with self.condition:
+            while request_id not in self.counts and time.time() < deadline:
+                self.condition.wait(deadline - time.time())
+            return self.counts.pop(request_id, None)
+
+
+def get_percentile(values, percent):
+    """
+    Returns percentile of the values by the nearest rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    index = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(index, 0)]
+
+
+def get_routes(persons, site_id):
+    """
+    Returns list of `(route, path)` pairs of benchmarked pages.
+
+    Person pages are benchmarked for the given number of active humans spread over the alphabet.
+    """
+    routes = [('articles', '/people/articles/')]
+    routes.extend(('articles_year', '/people/articles/%d/' % year) for year, count in facets.get_article_years())
+    routes.append(('papers', '/people/papers/'))
+    routes.append(('theses', '/people/theses/'))
+    index = facets.get_thesis_index()
+    routes.extend(('theses_type', '/people/theses/?type=%s' % type.lower())
+                  for type in sorted(set(type for type, year in index)))
+    routes.extend(('theses_year', '/people/theses/?year=%d' % year)
+                  for year in sorted(set(year for type, year in index), reverse=True))
+    routes.append(('grants', '/people/grants/'))
+
+    nicknames = list(Human.objects.filter(person__is_active=True).distinct().order_by('nickname')
+                     .values_list('nickname', flat=True))
+    if persons and nicknames:
+        step = max(len(nicknames) // persons, 1)
+        for nickname in nicknames[::step][:persons]:
+            routes.extend((view, '/people/person/%s/%s' % (nickname, PERSON_PATHS[view])) for view in PERSON_VIEWS)
+
+    pages = FlatPage.objects.filter(sites=site_id, registration_required=False).order_by('url')
+    routes.extend(('flatpage', url) for url in pages.values_list('url', flat=True))
+    return routes
+
+
+def _get_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _get_summary(latencies, elapsed):
+    summary = dict(('p%d' % percent, _round(get_percentile(latencies, percent))) for percent in PERCENTILES)
+    summary['mean'] = _round(sum(latencies) / len(latencies) if latencies else None)
+    summary['throughput'] = round(len(latencies) / elapsed, 2) if elapsed else None
+    return summary
+
+
+def _round(duration):
+    # Milliseconds
+    return None if duration is None else round(duration * 1000, 1)
+
+
+class Benchmark(object):
+    """
+    Requests pages of the site served on a local port.
+    """
+    def __init__(self, host, concurrency=4, requests=20, warmup=1, page_cache=False):
+        self.host = host
+        self.concurrency = concurrency
+        self.requests = requests
+        self.warmup = warmup
+        self.page_cache = page_cache
+        self.port = None
+        self.counter = None
+        self.request_ids = itertools.count(1)
+
+    def _request(self, path):
+        """
+        Returns status, latency and number of queries of the request.
+        """
+        request_id = str(next(self.request_ids))
+        connection = httplib.HTTPConnection('127.0.0.1', self.port)
+        start = time.time()
+        try:
+            connection.request('GET', path, headers={'Host': self.host, REQUEST_HEADER: request_id})
+            response = connection.getresponse()
+            response.read()
+        except (httplib.HTTPException, IOError):
+            return None, time.time() - start, None
+        finally:
+            connection.close()
+        latency = time.time() - start
+        return response.status, latency, self.counter.get_count(request_id)
+
+    def _warm_up(self, path):
+        """
+        Returns status of the first failed warmup request or `None`.
+        """
+        for i in range(self.warmup):
+            status, latency, queries = self._request(path)
+            if status != 200:
+                return status
+        return None
+
+    def _run_path(self, pool, route, path):
+        """
+        Returns result of the path and latencies of its requests.
+        """
+        start = time.time()
+        results = pool.map(self._request, [path] * self.requests, 1)
+        elapsed = time.time() - start
+
+        latencies = [latency for status, latency, queries in results]
+        queries = [count for status, latency, count in results if count is not None]
+        data = {'route': route, 'path': path, 'requests': len(results),
+                'errors': len([status for status, latency, count in results if status != 200]),
+                'queries': max(queries) if queries else None}
+        data.update(_get_summary(latencies, elapsed))
+        return data, latencies
+
+    def run(self, routes, callback=None):
+        """
+        Returns results of the routes, the total summary and list of skipped paths and their statuses.
+
+        Paths which fail in a warmup request, e.g. empty person pages, are skipped. `callback` is called with the
+        result of each path.
+        """
+        # Requests are sent to the local server only
+        allowed_hosts = list(settings.ALLOWED_HOSTS) + [self.host]
+        with override_settings(ALLOWED_HOSTS=allowed_hosts, PERSON_PAGE_CACHE=self.page_cache):
+            self.counter = QueryCounter(get_wsgi_application())
+            server = make_server('127.0.0.1', 0, self.counter, server_class=_Server, handler_class=_RequestHandler)
+            self.port = server.server_port
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            pool = ThreadPool(self.concurrency)
+            results, latencies, skipped = [], [], []
+            start = time.time()
+            try:
+                for route, path in routes:
+                    status = self._warm_up(path)
+                    if status is not None:
+                        skipped.append({'route': route, 'path': path, 'status': status})
+                        continue
+                    data, path_latencies = self._run_path(pool, route, path)
+                    results.append(data)
+                    latencies.extend(path_latencies)
+                    if callback is not None:
+                        callback(data)
+            finally:
+                pool.close()
+                pool.join()
+                server.shutdown()
+                server.server_close()
+        total = {'requests': len(latencies), 'errors': sum(data['errors'] for data in results)}
+        total.update(_get_summary(latencies, time.time() - start))
+        return results, total, skipped
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks public pages over HTTP and stores the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Output JSON file')
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent clients')
+        parser.add_argument('--requests', type=int, default=20, help='Number of measured requests of each page')
+        parser.add_argument('--warmup', type=int, default=1, help='Number of unmeasured requests of each page')
+        parser.add_argument('--persons', type=int, default=5, help='Number of humans whose pages are benchmarked')
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Benchmark only the route, e.g. articles_year, papers, person_detail or flatpage')
+        parser.add_argument('--host', help='Host of the requests, domain of the current site by default')
+        parser.add_argument('--page-cache', action='store_true', default=False,
+                            help='Serve person pages from the page cache, '
+                                 'they are rendered for each request by default')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        site = Site.objects.get_current()
+        routes = get_routes(options['persons'], site.pk)
+        if options['routes']:
+            routes = [(route, path) for route, path in routes if route in options['routes']]
+        benchmark = Benchmark(options['host'] or site.domain, concurrency=options['concurrency'],
+                              requests=options['requests'], warmup=options['warmup'],
+                              page_cache=options['page_cache'])
+
+        def report(data):
+            if verbosity >= 1:
+                self.stdout.write('%(path)s: p50 %(p50)s ms, p95 %(p95)s ms, p99 %(p99)s ms, %(throughput)s req/s, '
+                                  '%(queries)s queries, %(errors)d errors' % data)
+
+        results, total, skipped = benchmark.run(routes, report)
+        if verbosity >= 1:
+            for data in skipped:
+                self.stdout.write('Skipped %(path)s: status %(status)s' % data)
+            self.stdout.write('Total: p50 %(p50)s ms, p95 %(p95)s ms, p99 %(p99)s ms, %(throughput)s req/s, '
+                              '%(errors)d errors' % total)
+
+        if options['output']:
+            data = {'revision': _get_revision(), 'date': timezone.now().isoformat(), 'debug': settings.DEBUG,
+                    'concurrency': benchmark.concurrency, 'requests': benchmark.requests, 'warmup': benchmark.warmup,
+                    'page_cache': benchmark.page_cache,
+                    'dataset': dict((model._meta.model_name, model.objects.count())
+                                    for model in (Article, Author, Grant, Human, Person, Thesis)),
+                    'routes': results, 'skipped': skipped, 'total': total}
+            with open(options['output'], 'w') as output_file:
+                json.dump(data, output_file, indent=2, sort_keys=True)
@@ -0,0 +1,217 @@
+"""
+Exports the public site into static files.
+
+Pages are stored as `<output>/<language>/<path>/index.html`. Pages with a query string are stored under paths, see
+`get_static_path`, and links to them are rewritten. ETags of the exported pages are kept in a manifest, so re-runs
+send conditional requests and only write pages which changed since the last export.
+"""
+import json
+import os
+import re
+from multiprocessing import cpu_count, Pool
+from urlparse import parse_qsl
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.client import RequestFactory
+from django.utils.encoding import force_bytes
+from django.utils.http import urlquote
+
+from fuuk.common.views import make_etag
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.people import facets
+from fuuk.people.models import Grant, Human, Thesis
+from fuuk.people.page_cache import PERSON_VIEWS
+from fuuk.people.views import ArticleList
+
+MANIFEST = 'manifest.json'
+# Global people pages without arguments
+PEOPLE_PAGES = ('articles', 'papers', 'grants', 'theses', 'courses', 'downloads', 'phd', 'staff', 'other', 'students',
+                'graduates', 'retired')
+# Paths of person views
+PERSON_PATHS = {'person_detail': '', 'person_articles': 'papers/', 'person_articles_first': 'papers/first/',
+                'person_courses': 'courses/', 'person_students': 'students/', 'person_grants': 'grants/'}
+ARTICLES_RE = re.compile(r'^/people/articles/(?:(?P<year>[0-9]{4})/)?$')
+# Links to the current page with a query string
+QUERY_LINK_RE = re.compile(r'href="(\?[^"]*)"')
+
+# Handler of the current process
+_handler = None
+
+
+def get_paths(site_id):
+    """
+    Returns paths of all public pages.
+    """
+    paths = ['/people/%s/' % page for page in PEOPLE_PAGES]
+    for year, count in facets.get_article_years():
+        paths.append('/people/articles/%d/' % year)
+        paths.extend('/people/articles/%d/?after=%s' % (year, urlquote(cursor, safe=''))
+                     for cursor in ArticleList.get_cursors(year))
+    index = facets.get_thesis_index()
+    paths.extend('/people/theses/?type=%s' % type for type in sorted(set(type for type, year in index)))
+    paths.extend('/people/theses/?year=%d' % year for year in sorted(set(year for type, year in index)))
+    paths.extend('/people/grants/%d/' % pk for pk in Grant.objects.order_by('pk').values_list('pk', flat=True))
+    paths.extend('/people/thesis/id=%d/' % pk for pk in Thesis.objects.order_by('pk').values_list('pk', flat=True))
+    for nickname in Human.objects.order_by('nickname').values_list('nickname', flat=True):
+        paths.extend('/people/person/%s/%s' % (nickname, PERSON_PATHS[view]) for view in PERSON_VIEWS)
+    pages = FlatPage.objects.filter(sites=site_id, registration_required=False)
+    paths.extend(pages.order_by('url').values_list('url', flat=True))
+    return paths
+
+
+def get_static_path(url):
+    """
+    Returns path of the exported page of the URL or `None` if its query string can't be exported.
+
+    Pages of articles after the first one are stored as `/people/articles/<year>/<page>/`, filtered theses as
+    `/people/theses/<type>/` and `/people/theses/<year>/`.
+    """
+    path, _, query = url.partition('?')
+    if not query:
+        return path
+    params = dict(parse_qsl(query))
+    if path == '/people/theses/' and len(params) == 1:
+        value = params.get('type') or params.get('year')
+        if value and re.match(r'^\w+$', value):
+            return '/people/theses/%s/' % value.lower()
+    match = ARTICLES_RE.match(path)
+    if match and params.keys() == ['after']:
+        try:
+            position = int(params['after'].split(':', 1)[0])
+        except ValueError:
+            return None
+        # Article list without year displays the last year
+        year = match.group('year') or facets.get_article_years()[0][0]
+        return '/people/articles/%s/%d/' % (year, position // ArticleList.paginate_by + 1)
+    return None
+
+
+def rewrite_links(path, content):
+    """
+    Replaces links with a query string in content of the page by paths of the exported pages.
+    """
+    def replace(match):
+        url = path.partition('?')[0] + match.group(1).replace('&amp;', '&')
+        static_path = get_static_path(url)
+        if static_path is None:
+            raise CommandError('Page %s links to %s which can not be exported.' % (path, url))
+        return force_bytes('href="%s"' % static_path)
+    return QUERY_LINK_RE.sub(replace, content)
+
+
+def get_file_path(output, language, path):
+    return os.path.join(output, language, path.strip('/'), 'index.html')
+
+
+def _get_handler():
+    global _handler
+    if _handler is None:
+        _handler = BaseHandler()
+        _handler.load_middleware()
+    return _handler
+
+
+def _export_page(task):
+    """
+    Renders the page and writes it if it changed. Returns the key, ETag and whether the page was written.
+
+    ETag is `None` if the page is not public.
+    """
+    output, host, language, path, etag = task
+    headers = {'HTTP_HOST': host, 'HTTP_ACCEPT_LANGUAGE': language}
+    if etag is not None and etag.startswith('"'):
+        headers['HTTP_IF_NONE_MATCH'] = etag
+    # Response is not closed, `request_finished` would close the database connection
+    response = _get_handler().get_response(RequestFactory().get(path, **headers))
+    static_path = get_static_path(path)
+    key = '%s %s' % (language, static_path)
+    if response.status_code == 304:
+        return key, etag, False
+    if response.status_code != 200:
+        return key, None, False
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+    # Pages without ETag are compared by content
+    new_etag = response.get('ETag') or make_etag(content)
+    if new_etag == etag:
+        return key, etag, False
+    content = rewrite_links(path, content)
+    file_path = get_file_path(output, language, static_path)
+    if not os.path.isdir(os.path.dirname(file_path)):
+        os.makedirs(os.path.dirname(file_path))
+    with open(file_path, 'wb') as file_obj:
+        file_obj.write(content)
+    return key, new_etag, True
+
+
+class Command(BaseCommand):
+    help = 'Exports the public site into static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Output directory')
+        parser.add_argument('--processes', type=int, default=cpu_count(), help='Number of rendering processes')
+        parser.add_argument('--chunk-size', type=int, default=20, help='Number of pages passed to a process at once')
+        parser.add_argument('--host', help='Host of the requests, domain of the current site by default')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        output = options['output']
+        site = Site.objects.get_current()
+        host = options['host'] or site.domain
+
+        if not os.path.isdir(output):
+            os.makedirs(output)
+        manifest_path = os.path.join(output, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+        else:
+            manifest = {}
+
+        tasks = []
+        for path in get_paths(site.pk):
+            for language, _ in settings.LANGUAGES:
+                tasks.append((output, host, language, path,
+                              manifest.get('%s %s' % (language, get_static_path(path)))))
+
+        if options['processes'] > 1:
+            # Each process opens its own database connection
+            connections.close_all()
+            pool = Pool(options['processes'])
+            try:
+                results = list(pool.imap_unordered(_export_page, tasks, options['chunk_size']))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_export_page(task) for task in tasks]
+
+        new_manifest = {}
+        written = 0
+        for key, etag, changed in results:
+            if etag is not None:
+                new_manifest[key] = etag
+            if changed:
+                written += 1
+                if verbosity >= 2:
+                    self.stdout.write('Exported %s' % key)
+        # Remove pages which are no longer public
+        removed = 0
+        for key in set(manifest) - set(new_manifest):
+            language, path = key.split(' ', 1)
+            file_path = get_file_path(output, language, path)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                removed += 1
+
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(new_manifest, manifest_file, indent=2, sort_keys=True)
+        if verbosity >= 1:
+            self.stdout.write('Exported %d pages, %d unchanged, %d removed'
+                              % (written, len(new_manifest) - written, removed))
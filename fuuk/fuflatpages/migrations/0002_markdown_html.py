@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from markdownx.utils import markdownify
+
+
+def render_markdown(value):
+    # Frozen copy of `fuuk.common.markup.render_markdown`, migrations don't depend on the application code
+    return markdownify(value) if value else ''
+
+
+def render_content(apps, schema_editor):
+    flatpage_cls = apps.get_model('fuflatpages', 'FlatPage')
+    for flatpage in flatpage_cls.objects.all():
+        flatpage.content_html_cs = render_markdown(flatpage.content_cs)
+        flatpage.content_html_en = render_markdown(flatpage.content_en)
+        flatpage.save()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuflatpages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flatpage',
+            name='content_html',
+            field=models.TextField(editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='flatpage',
+            name='content_html_cs',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='flatpage',
+            name='content_html_en',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.RunPython(render_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuflatpages', '0002_markdown_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flatpage',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, auto_now=True),
+            preserve_default=False,
+        ),
+    ]
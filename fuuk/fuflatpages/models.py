@@ -15,6 +15,7 @@ class FlatPage(models.Model):
     url = models.CharField(_('URL'), max_length=100, db_index=True)
     title = models.CharField(_('title'), max_length=200)
     content = models.TextField(_('content'), blank=True)
+    content_html = models.TextField(blank=True, editable=False)
     enable_comments = models.BooleanField(_('enable comments'), default=False)
     template_name = models.CharField(
         _('template name'), max_length=70, blank=True,
@@ -29,6 +30,7 @@ class FlatPage(models.Model):
         default=False,
     )
     sites = models.ManyToManyField(Site)
+    modified = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = _('flat page')
@@ -0,0 +1,150 @@
+"""
+Routing table of the catch-all flatpage view.
+
+The table is kept in memory of each process. Changes made by the process are applied incrementally, other processes
+notice them by a version stored in cache and rebuild their tables. The cache has to be shared by all processes, see
+`fuuk.fuflatpages.checks`.
+
+Changes made in a transaction of a request are published before they are committed, so other processes may rebuild
+their tables from the old rows. The table is rebuilt from the committed rows and published again once the request is
+finished, which also drops changes rolled back. Tables older than `TABLE_TIMEOUT` are rebuilt as a backstop.
+"""
+import copy
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+
+from fuuk.people.models import Human
+
+from .models import FlatPage
+
+VERSION_KEY = 'flatpage_routes:version'
+TABLE_TIMEOUT = 5 * 60
+
+
+class RoutingTable(object):
+    """
+    Maps `(site_id, url)` to flatpages and holds nicknames redirected to person pages.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.built = None
+        # Flags of the request handled by the thread
+        self.local = threading.local()
+        # Pair of (site_id, url) -> flatpage ID and flatpage ID -> flatpage, replaced at once so readers don't need
+        # the lock
+        self.table = ({}, {})
+        # human_id -> nickname of humans with an active person
+        self.nicknames = {}
+        # Nicknames of humans with an active person
+        self.redirected = set()
+
+    def _bump_version(self):
+        self.version = uuid.uuid4().hex
+        cache.set(VERSION_KEY, self.version, None)
+
+    def _check_version(self):
+        if (self.version is None or time.time() - self.built > TABLE_TIMEOUT
+                or cache.get(VERSION_KEY) != self.version):
+            self.rebuild()
+
+    def _publish(self):
+        self._bump_version()
+        if connection.in_atomic_block and getattr(self.local, 'in_request', False):
+            self.local.changed = True
+
+    def start_request(self):
+        self.local.in_request = True
+
+    def finish_request(self):
+        """
+        Rebuilds the table in all processes if it was changed in a transaction of the request.
+        """
+        self.local.in_request = False
+        if getattr(self.local, 'changed', False):
+            self.local.changed = False
+            self.invalidate()
+
+    def _set_nicknames(self, nicknames):
+        self.nicknames = nicknames
+        self.redirected = set(nicknames.values())
+
+    def rebuild(self):
+        routes, pages = {}, {}
+        for page in FlatPage.objects.prefetch_related('sites'):
+            pages[page.pk] = page
+            for site in page.sites.all():
+                routes[(site.pk, page.url)] = page.pk
+        nicknames = dict(Human.objects.filter(person__is_active=True).values_list('pk', 'nickname').distinct())
+        with self.lock:
+            self.table = (routes, pages)
+            self._set_nicknames(nicknames)
+            self.built = time.time()
+            version = cache.get(VERSION_KEY)
+            if version is None:
+                self._bump_version()
+            else:
+                self.version = version
+
+    def invalidate(self):
+        """
+        Rebuilds the table in all processes.
+        """
+        with self.lock:
+            self.rebuild()
+            self._publish()
+
+    def update_page(self, page_id):
+        """
+        Updates routes of the flatpage.
+        """
+        with self.lock:
+            self._check_version()
+            routes, pages = self.table
+            routes = dict((key, pk) for key, pk in routes.items() if pk != page_id)
+            pages = dict((pk, page) for pk, page in pages.items() if pk != page_id)
+            for page in FlatPage.objects.filter(pk=page_id).prefetch_related('sites'):
+                pages[page.pk] = page
+                routes.update(((site.pk, page.url), page.pk) for site in page.sites.all())
+            self.table = (routes, pages)
+            self._publish()
+
+    def update_humans(self, human_ids):
+        """
+        Updates nicknames of the humans.
+        """
+        human_ids = set(pk for pk in human_ids if pk is not None)
+        if not human_ids:
+            return
+        with self.lock:
+            self._check_version()
+            nicknames = dict((pk, nickname) for pk, nickname in self.nicknames.items() if pk not in human_ids)
+            nicknames.update(Human.objects.filter(pk__in=human_ids, person__is_active=True)
+                             .values_list('pk', 'nickname').distinct())
+            self._set_nicknames(nicknames)
+            self._publish()
+
+    def get_page(self, site_id, url):
+        """
+        Returns a copy of the flatpage or `None`.
+        """
+        self._check_version()
+        routes, pages = self.table
+        page = pages.get(routes.get((site_id, url)))
+        if page is None:
+            return None
+        return copy.copy(page)
+
+    def is_redirected(self, nickname):
+        """
+        Returns whether the nickname belongs to a human with an active person.
+        """
+        self._check_version()
+        return nickname in self.redirected
+
+
+routes = RoutingTable()
@@ -0,0 +1,69 @@
+"""
+Signal receivers which keep the routing table up to date.
+"""
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from fuuk.common import markup
+from fuuk.people.models import Human, Person
+
+from .models import FlatPage
+from .routing import routes
+
+markup.register(FlatPage, ('content', ))
+
+
+@receiver(request_started)
+def start_request(sender, **kwargs):
+    routes.start_request()
+
+
+@receiver(request_finished)
+def finish_request(sender, **kwargs):
+    routes.finish_request()
+
+
+@receiver(post_save, sender=FlatPage)
+@receiver(post_delete, sender=FlatPage)
+def flatpage_changed(sender, instance, **kwargs):
+    routes.update_page(instance.pk)
+
+
+@receiver(markup.markdown_rendered, sender=FlatPage)
+def flatpages_rendered(sender, **kwargs):
+    routes.invalidate()
+
+
+@receiver(m2m_changed, sender=FlatPage.sites.through)
+def flatpage_sites_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Instance is a site
+        routes.invalidate()
+    else:
+        routes.update_page(instance.pk)
+
+
+@receiver(post_save, sender=Human)
+@receiver(post_delete, sender=Human)
+def human_changed(sender, instance, **kwargs):
+    routes.update_humans((instance.pk, ))
+
+
+@receiver(pre_save, sender=Person)
+def person_pre_save(sender, instance, **kwargs):
+    instance._old_human_id = None
+    if instance.pk is not None:
+        instance._old_human_id = Person.objects.filter(pk=instance.pk).values_list('human', flat=True).first()
+
+
+@receiver(post_save, sender=Person)
+def person_saved(sender, instance, **kwargs):
+    routes.update_humans((instance.human_id, getattr(instance, '_old_human_id', None)))
+
+
+@receiver(post_delete, sender=Person)
+def person_deleted(sender, instance, **kwargs):
+    routes.update_humans((instance.human_id, ))
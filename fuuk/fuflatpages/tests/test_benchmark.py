@@ -0,0 +1,124 @@
+"""
+Tests of the HTTP benchmark of the site.
+"""
+import json
+import os
+import tempfile
+from wsgiref.simple_server import WSGIServer
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import override_settings, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from fuuk.fuflatpages.management.commands.benchmark import _Server, get_percentile
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.people.models import Agency, Article, Author, Grant, Human, Person, Thesis
+
+
+class SharedConnections(object):
+    """
+    Connections shared by all threads, the test database lives in memory of the test connection.
+    """
+    def __init__(self, default):
+        self.default = default
+
+
+class TestGetPercentile(SimpleTestCase):
+    """
+    Test `get_percentile` function.
+    """
+    def test_percentile(self):
+        values = range(100, 0, -1)
+        self.assertEqual(get_percentile(values, 50), 50)
+        self.assertEqual(get_percentile(values, 99), 99)
+        self.assertEqual(get_percentile([3], 95), 3)
+        self.assertIsNone(get_percentile([], 50))
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestBenchmark(TestCase):
+    """
+    Test `benchmark` command.
+    """
+    def setUp(self):
+        cache.clear()
+        page = FlatPage.objects.create(url='/page/', title='A page', content='Page content')
+        page.sites.add(settings.SITE_ID)
+        human = Human.objects.create(nickname='Human')
+        person = Person.objects.create(human=human, first_name='Alpha', last_name='Tester', type='STAFF')
+        article = Article.objects.create(type='ARTICLE', year=2013, title='First article')
+        Author.objects.create(article=article, person=person, order=1)
+        Thesis.objects.create(type='PHD', year=2012, author=person, title='Thesis', defended=True)
+        agency = Agency.objects.create(shortcut='GA', name='Agency')
+        Grant.objects.create(author=person, number='GA-1', start=2010, end=2012, agency=agency, title='Grant')
+
+        handle, self.output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        connection.allow_thread_sharing = True
+        patcher = patch.object(connections, '_connections', SharedConnections(connections['default']))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Requests can't share the connection concurrently, serve them in the server thread
+        patcher = patch.object(_Server, 'process_request', WSGIServer.process_request.im_func)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        connection.allow_thread_sharing = False
+        os.remove(self.output)
+
+    def test_benchmark(self):
+        call_command('benchmark', output=self.output, concurrency=1, requests=3, persons=1, verbosity=0)
+        with open(self.output) as output_file:
+            data = json.load(output_file)
+        paths = [route['path'] for route in data['routes']]
+        self.assertEqual(paths, ['/people/articles/', '/people/articles/2013/', '/people/papers/', '/people/theses/',
+                                 '/people/theses/?type=phd', '/people/theses/?year=2012', '/people/grants/',
+                                 '/people/person/Human/', '/people/person/Human/papers/',
+                                 '/people/person/Human/papers/first/', '/people/person/Human/grants/', '/page/'])
+        # Person has no courses and students
+        self.assertEqual([(route['path'], route['status']) for route in data['skipped']],
+                         [('/people/person/Human/courses/', 404), ('/people/person/Human/students/', 404)])
+        self.assertEqual(data['total']['requests'], 3 * len(paths))
+        self.assertEqual(data['total']['errors'], 0)
+        self.assertEqual(data['dataset']['article'], 1)
+        for route in data['routes']:
+            self.assertLessEqual(route['p50'], route['p95'])
+            self.assertLessEqual(route['p95'], route['p99'])
+            self.assertIsNotNone(route['queries'])
+        self.assertGreater(data['routes'][1]['queries'], 0)
+
+    def _run(self, **kwargs):
+        call_command('benchmark', output=self.output, verbosity=0, **kwargs)
+        with open(self.output) as output_file:
+            data = json.load(output_file)
+        return dict((route['path'], route['queries']) for route in data['routes'])
+
+    def test_streamed_queries(self):
+        # Queries run while the content is streamed are counted
+        queries = self._run(requests=1, route=['papers'])
+        self.client.get('/people/papers/')
+        response = self.client.get('/people/papers/')
+        with CaptureQueriesContext(connection) as context:
+            b''.join(response.streaming_content)
+        self.assertGreater(len(context), 0)
+        self.assertGreaterEqual(queries['/people/papers/'], len(context))
+
+    def test_page_cache(self):
+        queries = self._run(requests=1, route=['person_detail'])
+        self.assertGreater(queries['/people/person/Human/'], 1)
+        self.assertEqual(self._run(requests=1, route=['person_detail'], page_cache=True),
+                         {'/people/person/Human/': 1})
+
+    def test_routes(self):
+        call_command('benchmark', output=self.output, concurrency=2, requests=4, route=['articles_year', 'flatpage'],
+                     verbosity=0)
+        with open(self.output) as output_file:
+            data = json.load(output_file)
+        self.assertEqual([route['path'] for route in data['routes']], ['/people/articles/2013/', '/page/'])
+        self.assertEqual([route['requests'] for route in data['routes']], [4, 4])
+        self.assertEqual(data['skipped'], [])
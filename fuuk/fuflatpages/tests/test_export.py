@@ -0,0 +1,113 @@
+"""
+Tests of the static export of the site.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings, TestCase
+from mock import patch
+
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.people.models import Article, Author, Human, Person, Thesis
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestExportSite(TestCase):
+    """
+    Test `export_site` command.
+    """
+    def setUp(self):
+        cache.clear()
+        self.output = tempfile.mkdtemp()
+        self.page = FlatPage.objects.create(url='/page/', title='A page', content='Page content')
+        self.page.sites.add(settings.SITE_ID)
+        self.human = Human.objects.create(nickname='Human')
+        self.person = Person.objects.create(human=self.human, first_name='Alpha', last_name='Tester', type='STAFF',
+                                            is_active=True)
+        article = Article.objects.create(type='ARTICLE', year=2013, title='First article')
+        Author.objects.create(article=article, person=self.person, order=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.output)
+
+    def _read(self, language, path):
+        with open(os.path.join(self.output, language, path, 'index.html')) as page_file:
+            return page_file.read()
+
+    def _get_manifest(self):
+        with open(os.path.join(self.output, 'manifest.json')) as manifest_file:
+            return json.load(manifest_file)
+
+    def test_export(self):
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        self.assertIn('Page content', self._read('en', 'page'))
+        self.assertIn('First article', self._read('en', 'people/articles/2013'))
+        self.assertIn('First article', self._read('cs', 'people/person/Human/papers'))
+        self.assertIn('Tester', self._read('en', 'people/staff'))
+        # Human without students doesn't have the page
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'en', 'people/person/Human/students')))
+        self.assertIn('en /people/person/Human/', self._get_manifest())
+
+    def test_incremental(self):
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        manifest = self._get_manifest()
+        page_path = os.path.join(self.output, 'en', 'page', 'index.html')
+        person_path = os.path.join(self.output, 'en', 'people', 'person', 'Human', 'index.html')
+        os.remove(page_path)
+        os.remove(person_path)
+        # Nothing changed, no page is written
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        self.assertFalse(os.path.exists(page_path))
+        self.assertFalse(os.path.exists(person_path))
+        self.assertEqual(self._get_manifest(), manifest)
+
+        self.person.last_name = 'Renamed'
+        self.person.save()
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        self.assertIn('Renamed', self._read('en', 'people/person/Human'))
+        self.assertFalse(os.path.exists(page_path))
+
+    def test_removed(self):
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        self.page.delete()
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'en', 'page', 'index.html')))
+        self.assertNotIn('en /page/', self._get_manifest())
+
+    @patch('fuuk.people.views.ArticleList.paginate_by', 1)
+    def test_article_pages(self):
+        Article.objects.create(type='ARTICLE', year=2013, title='Second article')
+        Article.objects.create(type='ARTICLE', year=2013, title='Third article')
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        first = self._read('en', 'people/articles/2013')
+        self.assertIn('First article', first)
+        self.assertIn('href="/people/articles/2013/2/"', first)
+        self.assertNotIn('?after=', first)
+        second = self._read('en', 'people/articles/2013/2')
+        self.assertIn('Second article', second)
+        self.assertIn('href="/people/articles/2013/3/"', second)
+        self.assertIn('Third article', self._read('en', 'people/articles/2013/3'))
+        # Article list of the last year links to the pages of the year
+        self.assertIn('href="/people/articles/2013/2/"', self._read('en', 'people/articles'))
+        self.assertIn('en /people/articles/2013/3/', self._get_manifest())
+
+    def test_thesis_pages(self):
+        Thesis.objects.create(type='PHD', year=2012, author=self.person, title='Thesis', defended=True)
+        call_command('export_site', self.output, processes=1, verbosity=0)
+        menu = self._read('en', 'people/theses')
+        self.assertIn('href="/people/theses/phd/"', menu)
+        self.assertIn('href="/people/theses/2012/"', menu)
+        self.assertIn('Thesis', self._read('en', 'people/theses/phd'))
+        self.assertIn('Thesis', self._read('cs', 'people/theses/2012'))
+
+    def test_query_link(self):
+        self.page.content = '[Link](?unknown=1)'
+        self.page.save()
+        with self.assertRaisesRegexp(CommandError, r'/page/\?unknown=1'):
+            call_command('export_site', self.output, processes=1, verbosity=0)
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import override_settings, SimpleTestCase, TestCase
+
+from fuuk.fuflatpages.checks import check_shared_cache
+from fuuk.fuflatpages.models import FlatPage
+from fuuk.fuflatpages.routing import routes, TABLE_TIMEOUT, VERSION_KEY
+from fuuk.people.models import Human, Person
+
+
+@override_settings(LANGUAGE_CODE='en')
+class RoutingTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.page = FlatPage.objects.create(url='/page/', title='A page', content='Page content')
+        self.page.sites.add(settings.SITE_ID)
+        self.human = Human.objects.create(nickname='Human')
+        self.person = Person.objects.create(human=self.human, is_active=True)
+        # Load the site
+        self.client.get('/page/')
+
+    def test_hit(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/page/')
+        self.assertContains(response, 'Page content')
+
+    def test_miss(self):
+        with self.assertNumQueries(0):
+            self.assertRedirects(self.client.get('/page'), '/page/', status_code=301)
+            self.assertEqual(self.client.get('/unknown/').status_code, 404)
+            self.assertEqual(self.client.get('/Unknown/papers/').status_code, 404)
+            response = self.client.get('/Human/')
+        self.assertRedirects(response, '/people/person/Human/', status_code=301)
+
+    def test_page_changed(self):
+        self.page.url = '/moved/'
+        self.page.save()
+        self.assertEqual(self.client.get('/page/').status_code, 404)
+        self.assertContains(self.client.get('/moved/'), 'Page content')
+        self.page.sites.clear()
+        self.assertEqual(self.client.get('/moved/').status_code, 404)
+
+    def test_page_deleted(self):
+        self.page.delete()
+        self.assertEqual(self.client.get('/page/').status_code, 404)
+
+    def test_human_changed(self):
+        self.human.nickname = 'Renamed'
+        self.human.save()
+        self.assertEqual(self.client.get('/Human/').status_code, 404)
+        self.assertRedirects(self.client.get('/Renamed/'), '/people/person/Renamed/', status_code=301)
+        self.person.is_active = False
+        self.person.save()
+        self.assertEqual(self.client.get('/Renamed/').status_code, 404)
+
+    def test_other_process(self):
+        # Change made by other process
+        FlatPage.objects.filter(pk=self.page.pk).update(url='/moved/')
+        cache.set(VERSION_KEY, 'other', None)
+        self.assertEqual(self.client.get('/page/').status_code, 404)
+        self.assertContains(self.client.get('/moved/'), 'Page content')
+        self.assertEqual(routes.version, 'other')
+
+    def test_rolled_back(self):
+        # Change made in a transaction of a request is rolled back
+        routes.start_request()
+        try:
+            with transaction.atomic():
+                self.page.url = '/moved/'
+                self.page.save()
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assertIsNotNone(routes.get_page(settings.SITE_ID, '/moved/'))
+        routes.finish_request()
+        self.assertIsNone(routes.get_page(settings.SITE_ID, '/moved/'))
+        self.assertIsNotNone(routes.get_page(settings.SITE_ID, '/page/'))
+
+    def test_published_after_request(self):
+        # Other processes may have rebuilt their tables before the transaction was committed
+        routes.start_request()
+        self.page.url = '/moved/'
+        self.page.save()
+        version = cache.get(VERSION_KEY)
+        routes.finish_request()
+        self.assertNotEqual(cache.get(VERSION_KEY), version)
+        # Changes made outside of requests are published once
+        self.page.url = '/page/'
+        self.page.save()
+        version = cache.get(VERSION_KEY)
+        routes.finish_request()
+        self.assertEqual(cache.get(VERSION_KEY), version)
+
+    def test_timeout(self):
+        FlatPage.objects.filter(pk=self.page.pk).update(url='/moved/')
+        self.assertContains(self.client.get('/page/'), 'Page content')
+        routes.built -= TABLE_TIMEOUT + 1
+        self.assertEqual(self.client.get('/page/').status_code, 404)
+        self.assertContains(self.client.get('/moved/'), 'Page content')
+
+    def test_page_shared_by_sites(self):
+        site = Site.objects.create(domain='other.example.com', name='Other')
+        self.page.sites.add(site)
+        page_routes, pages = routes.table
+        self.assertEqual(page_routes[(site.pk, '/page/')], self.page.pk)
+        self.assertEqual(len(pages), 1)
+
+    def test_conditional(self):
+        etag = self.client.get('/page/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/page/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.page.content = 'Changed'
+        self.page.save()
+        self.assertEqual(self.client.get('/page/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CheckSharedCacheTests(SimpleTestCase):
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local(self):
+        self.assertEqual([w.id for w in check_shared_cache(None)], ['fuflatpages.W001'])
+
+    @override_settings(DEBUG=False, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/fuuk_test_cache'}})
+    def test_shared(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -5,4 +5,4 @@ from .models import FlatPage
 
 @register(FlatPage)
 class FlatPageTranslationOptions(TranslationOptions):
-    fields = ('title', 'content')
+    fields = ('title', 'content', 'content_html')
@@ -5,36 +5,48 @@ from django.contrib.flatpages.views import render_flatpage
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.urlresolvers import RegexURLResolver
 from django.http import Http404, HttpResponsePermanentRedirect
-from django.shortcuts import get_object_or_404
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
 
-from fuuk.people.models import Person
+from fuuk.common.views import make_etag
+from fuuk.people.context_processors import get_news_list
 from fuuk.people.urls import HUMAN_PATTERNS
 
-from .models import FlatPage
+from .routing import routes
 
+HUMAN_RESOLVER = RegexURLResolver(r'^/', HUMAN_PATTERNS)
 
+
+def _get_etag(request, url):
+    if not url.startswith('/'):
+        url = '/' + url
+    f = routes.get_page(get_current_site(request).id, url)
+    if f is None or f.registration_required:
+        return None
+    # Flatpage templates may display current news
+    news = [(n.pk, n.title, n.content, n.hyperlink) for n in get_news_list()]
+    return make_etag(f.pk, f.modified, get_language(), news)
+
+
+@condition(etag_func=_get_etag)
 def flatpage(request, url):
     """
     Copy of a `flatpage` view from `django.contrib.flatpages`. Use our `FlatPage` model instead of django one.
+
+    Flatpages and redirected nicknames are looked up in the routing table.
     """
     if not url.startswith('/'):
         url = '/' + url
     site_id = get_current_site(request).id
-    try:
-        f = get_object_or_404(FlatPage, url=url, sites=site_id)
-    except Http404:
-        try:
-            if not url.endswith('/') and settings.APPEND_SLASH:
-                url += '/'
-                f = get_object_or_404(FlatPage, url=url, sites=site_id)
+    f = routes.get_page(site_id, url)
+    if f is None:
+        if not url.endswith('/') and settings.APPEND_SLASH:
+            url += '/'
+            if routes.get_page(site_id, url) is not None:
                 return HttpResponsePermanentRedirect('%s/' % request.path)
-            else:
-                raise
-        except Http404:
-            # XXX: Temporary redirection of the old person URLs to the new URLs
-            resolver = RegexURLResolver(r'^/', HUMAN_PATTERNS)
-            match = resolver.resolve(url)
-            if Person.objects.filter(is_active=True, human__nickname=match.kwargs['slug']).exists():
-                return HttpResponsePermanentRedirect(urljoin('/people/person/', url[1:]))
-            raise
+        # XXX: Temporary redirection of the old person URLs to the new URLs
+        match = HUMAN_RESOLVER.resolve(url)
+        if routes.is_redirected(match.kwargs['slug']):
+            return HttpResponsePermanentRedirect(urljoin('/people/person/', url[1:]))
+        raise Http404
     return render_flatpage(request, f)
@@ -0,0 +1 @@
+default_app_config = 'fuuk.people.apps.PeopleConfig'
@@ -1,12 +1,64 @@
 # coding: utf-8
+from django.conf.urls import url
 from django.contrib.admin import ModelAdmin, TabularInline
 from django.db import models
+from django.db.models import Q
+from django.http import JsonResponse
 from modeltranslation.admin import TranslationAdmin
 from modeltranslation.utils import get_translation_fields
 
 from fuuk.people.admin.fields import NullCharField
 from fuuk.people.admin.forms import ArticleArticleForm, ArticleBookForm, ArticleConferenceForm
-from fuuk.people.models import Attachment, Author
+from fuuk.people.admin.permissions import get_editable_ids, get_editable_queryset
+from fuuk.people.admin.widgets import PersonManyToManyRawIdWidget, PersonRawIdWidget
+from fuuk.people.authors import set_article_authors
+from fuuk.people.models import Attachment, Author, Person
+
+# Maximal number of persons returned by the person search
+PERSON_SEARCH_LIMIT = 20
+
+
+class ParticipantAdminMixin(object):
+    """
+    Allows non-superusers to change only objects they take part in.
+
+    Permission checks are lookups in the index of editable objects, which is loaded once per request.
+    """
+    def has_change_permission(self, request, obj=None):
+        """
+        If `obj` is None, this should return True if the given request has
+        permission to delete *any* object of the given type.
+        """
+        if request.user.is_superuser:
+            return True
+
+        if obj:
+            return obj.pk in get_editable_ids(request, self.model)
+
+        return super(ParticipantAdminMixin, self).has_change_permission(request, obj)
+
+    def get_queryset(self, request):
+        queryset = super(ParticipantAdminMixin, self).get_queryset(request)
+        if request.user.is_superuser:
+            return queryset
+        return queryset.filter(pk__in=get_editable_queryset(request.user, self.model))
+
+
+class PersonPickerMixin(object):
+    """
+    Renders fields listed in `person_fields` by person pickers, which search persons on demand.
+    """
+    person_fields = ()
+
+    def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
+        if db_field.name in self.person_fields:
+            kwargs['widget'] = PersonRawIdWidget(db_field.rel, self.admin_site, using=kwargs.get('using'))
+        return super(PersonPickerMixin, self).formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def formfield_for_manytomany(self, db_field, request=None, **kwargs):
+        if db_field.name in self.person_fields:
+            kwargs['widget'] = PersonManyToManyRawIdWidget(db_field.rel, self.admin_site, using=kwargs.get('using'))
+        return super(PersonPickerMixin, self).formfield_for_manytomany(db_field, request, **kwargs)
 
 
 class DepartmentAdmin(TranslationAdmin):
@@ -71,17 +123,40 @@ class HumanAdmin(TranslationAdmin):
         )
 
 
-class PersonAdmin(ModelAdmin):
+class PersonAdmin(PersonPickerMixin, ModelAdmin):
     list_display = ('last_name', 'first_name', 'is_active', 'type')
     list_filter = ('type', 'is_active')
     ordering = ('last_name', )
     search_fields = ('human__nickname', 'first_name', 'last_name')
 
     filter_horizontal = ('place',)
+    person_fields = ('advisor', )
     formfield_overrides = {
         models.CharField: {'form_class': NullCharField},
     }
 
+    def get_urls(self):
+        urls = [url(r'^search/$', self.admin_site.admin_view(self.search_view), name='people_person_search')]
+        return urls + super(PersonAdmin, self).get_urls()
+
+    def search_view(self, request):
+        """
+        Returns persons whose last or first names start with the words of the query.
+        """
+        queryset = Person.objects.all()
+        words = request.GET.get('q', '').split()
+        if not words:
+            return JsonResponse({'results': []})
+        for word in words:
+            # Prefix lookups use indexes of the names, which are case sensitive
+            prefixes = set((word, word.capitalize()))
+            query = Q()
+            for prefix in prefixes:
+                query |= Q(last_name__startswith=prefix) | Q(first_name__startswith=prefix)
+            queryset = queryset.filter(query)
+        persons = queryset.order_by('last_name', 'first_name')[:PERSON_SEARCH_LIMIT]
+        return JsonResponse({'results': [{'id': person.pk, 'text': unicode(person)} for person in persons]})
+
     def get_readonly_fields(self, request, obj=None):
         if request.user.is_superuser:
             return self.readonly_fields
@@ -101,124 +176,43 @@ class AttachmentInlineAdmin(TabularInline):
     extra = 3
 
 
-class CourseAdmin(TranslationAdmin):
+class CourseAdmin(ParticipantAdminMixin, PersonPickerMixin, TranslationAdmin):
     list_display = ('name', 'ls', 'zs', 'code')
     ordering = ('code', )
     fields = ('code', 'name', 'lectors', 'practical_lectors', 'ls', 'zs', 'annotation', 'note')
     search_fields = ['code'] + get_translation_fields('name')
 
-    filter_horizontal = ('lectors', 'practical_lectors')
+    person_fields = ('lectors', 'practical_lectors')
     formfield_overrides = {
         models.CharField: {'form_class': NullCharField},
     }
     inlines = (AttachmentInlineAdmin, )
 
-    def has_change_permission(self, request, obj=None):
-        """
-        If `obj` is None, this should return True if the given request has
-        permission to delete *any* object of the given type.
-        """
-        if request.user.is_superuser:
-            return True
-
-        if obj:
-            for lector in obj.lectors.all():
-                if request.user == getattr(lector.human, 'user', None):
-                    return True
-            for lector in obj.practical_lectors.all():
-                if request.user == getattr(lector.human, 'user', None):
-                    return True
-            return False
-
-        return super(CourseAdmin, self).has_change_permission(request, obj)
-
-    def get_queryset(self, request):
-        queryset = super(CourseAdmin, self).get_queryset(request)
-        if request.user.is_superuser:
-            return queryset
-        human = request.user.human
-        return queryset.filter(
-            pk__in=queryset.filter(lectors__human=human) | queryset.filter(practical_lectors__human=human)
-        )
-
 
 class AgencyAdmin(TranslationAdmin):
     list_display = ('shortcut', 'name')
     search_fields = get_translation_fields('name') + get_translation_fields('shortcut')
 
 
-class GrantAdmin(TranslationAdmin):
+class GrantAdmin(ParticipantAdminMixin, PersonPickerMixin, TranslationAdmin):
     list_display = ('author', 'number', 'title', 'start', 'end')
     list_filter = ('agency', 'start')
     ordering = ('-end', )
     search_fields = ['number'] + get_translation_fields('title')
-    filter_horizontal = ('co_authors',)
-
-    def has_change_permission(self, request, obj=None):
-        """
-        If `obj` is None, this should return True if the given request has
-        permission to delete *any* object of the given type.
-        """
-        if request.user.is_superuser:
-            return True
-
-        if obj:
-            if request.user == getattr(obj.author.human, 'user', None):
-                return True
-            for author in obj.co_authors.all():
-                if request.user == getattr(author.human, 'user', None):
-                    return True
-            return False
-
-        return super(GrantAdmin, self).has_change_permission(request, obj)
-
-    def get_queryset(self, request):
-        queryset = super(GrantAdmin, self).get_queryset(request)
-        if request.user.is_superuser:
-            return queryset
-        human = request.user.human
-        return queryset.filter(
-            pk__in=queryset.filter(author__human=human) | queryset.filter(co_authors__human=human)
-        )
+    person_fields = ('author', 'co_authors')
 
 
-class ThesisAdmin(TranslationAdmin):
+class ThesisAdmin(ParticipantAdminMixin, PersonPickerMixin, TranslationAdmin):
     list_display = ('type', 'title', 'author', 'advisor', 'year')
     list_filter = ('type', 'year', 'defended')
     ordering = ('-year', )
     search_fields = ['author__first_name', 'author__last_name'] + get_translation_fields('title') + \
         get_translation_fields('keywords')
-    filter_horizontal = ('consultants',)
+    person_fields = ('author', 'advisor', 'consultants')
     formfield_overrides = {
         models.CharField: {'form_class': NullCharField},
     }
 
-    def has_change_permission(self, request, obj=None):
-        """
-        If `obj` is None, this should return True if the given request has
-        permission to delete *any* object of the given type.
-        """
-        if request.user.is_superuser:
-            return True
-
-        if obj:
-            if request.user == getattr(obj.author.human, 'user', None):
-                return True
-            if request.user == getattr(obj.advisor.human, 'user', None):
-                return True
-            return False
-
-        return super(ThesisAdmin, self).has_change_permission(request, obj)
-
-    def get_queryset(self, request):
-        queryset = super(ThesisAdmin, self).get_queryset(request)
-        if request.user.is_superuser:
-            return queryset
-        human = request.user.human
-        return queryset.filter(
-            pk__in=queryset.filter(author__human=human) | queryset.filter(advisor__human=human)
-        )
-
 
 class NewsAdmin(TranslationAdmin):
     list_display = ('title', 'start', 'end')
@@ -230,18 +224,12 @@ class NewsAdmin(TranslationAdmin):
     }
 
 
-class AuthorInlineAdmin(TabularInline):
+class AuthorInlineAdmin(PersonPickerMixin, TabularInline):
     model = Author
     extra = 3
     fields = ('order', 'person')
     readonly_fields = ('order', )
-
-    def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
-        defaults = {
-            'queryset': db_field.rel.to.objects.order_by('last_name', 'first_name')
-        }
-        defaults.update(kwargs)
-        return super(AuthorInlineAdmin, self).formfield_for_foreignkey(db_field, request, **defaults)
+    person_fields = ('person', )
 
     def get_queryset(self, request):
         # Return ordered authors
@@ -250,37 +238,27 @@ class AuthorInlineAdmin(TabularInline):
 
 ###############################################################################
 # Articles
-class BaseProxyArticleAdmin(ModelAdmin):
+class BaseProxyArticleAdmin(ParticipantAdminMixin, PersonPickerMixin, ModelAdmin):
     list_display = ('title', 'year')
     list_filter = ('year', 'accepted')
     search_fields = ('identification', 'title', 'publication')
+    person_fields = ('presenter', )
 
     inlines = [AuthorInlineAdmin, ]
     formfield_overrides = {
         models.CharField: {'form_class': NullCharField},
     }
 
-    def has_change_permission(self, request, obj=None):
-        """
-        If `obj` is None, this should return True if the given request has
-        permission to delete *any* object of the given type.
-        """
-        if request.user.is_superuser:
-            return True
-
-        if obj:
-            for author in obj.author_set.all():
-                if request.user == getattr(author.person.human, 'user', None):
-                    return True
-            return False
-
-        return super(BaseProxyArticleAdmin, self).has_change_permission(request, obj)
-
-    def get_queryset(self, request):
-        queryset = super(BaseProxyArticleAdmin, self).get_queryset(request)
-        if request.user.is_superuser:
-            return queryset
-        return queryset.filter(author__person__human__user=request.user)
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not Author:
+            return super(BaseProxyArticleAdmin, self).save_formset(request, form, formset, change)
+        # Only collect the changes for the change message, the author list is replaced as a whole
+        formset.save(commit=False)
+        forms = [f for f in formset.forms if f.has_changed() or f.instance.pk is not None]
+        # Keep order of existing authors, new ones are appended
+        forms.sort(key=lambda f: (f.instance.pk is None, f.instance.order))
+        set_article_authors(form.instance, [f.cleaned_data['person'] for f in forms
+                                            if f not in formset.deleted_forms])
 
 
 class ArticleBookAdmin(BaseProxyArticleAdmin):
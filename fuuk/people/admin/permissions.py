@@ -0,0 +1,41 @@
+"""
+Index of objects which non-superusers may change.
+
+Users may change objects they take part in, e.g. their articles or courses. Identifiers of these objects are loaded
+by a single query per model and kept for the rest of the request.
+"""
+import operator
+
+from django.db.models import Q
+
+from fuuk.people.models import Article, Course, Grant, Thesis
+
+# model -> lookups of users who may change the object
+EDITABLE_LOOKUPS = {
+    Article: ('author__person__human__user', ),
+    Course: ('lectors__human__user', 'practical_lectors__human__user'),
+    Grant: ('author__human__user', 'co_authors__human__user'),
+    Thesis: ('author__human__user', 'advisor__human__user'),
+}
+
+
+def get_editable_queryset(user, model):
+    """
+    Returns queryset of primary keys of objects the user may change, which can be used in subqueries.
+    """
+    model = model._meta.concrete_model
+    query = reduce(operator.or_, (Q(**{lookup: user}) for lookup in EDITABLE_LOOKUPS[model]))
+    return model.objects.filter(query).values('pk')
+
+
+def get_editable_ids(request, model):
+    """
+    Returns set of primary keys of objects the user of the request may change.
+
+    The set is cached on the request.
+    """
+    model = model._meta.concrete_model
+    cache = request.__dict__.setdefault('_editable_ids', {})
+    if model not in cache:
+        cache[model] = set(get_editable_queryset(request.user, model).values_list('pk', flat=True))
+    return cache[model]
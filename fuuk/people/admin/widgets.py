@@ -0,0 +1,44 @@
+"""
+Widgets which pick persons by searching instead of listing all of them.
+"""
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget, ManyToManyRawIdWidget
+from django.core.urlresolvers import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+from django.utils.translation import ugettext as _
+
+from fuuk.people.models import Person
+
+
+class PersonAutocompleteMixin(object):
+    """
+    Adds a search box to a raw ID widget. Matching persons are fetched from the person search view of the admin.
+    """
+    class Media:
+        js = ('js/person_autocomplete.js', )
+
+    def render(self, name, value, attrs=None):
+        output = super(PersonAutocompleteMixin, self).render(name, value, attrs)
+        search = format_html('<input type="text" class="person-autocomplete" data-url="{}" placeholder="{}" />',
+                             reverse('admin:people_person_search', current_app=self.admin_site.name),
+                             _('Search person'))
+        return mark_safe(output + search)
+
+
+class PersonRawIdWidget(PersonAutocompleteMixin, ForeignKeyRawIdWidget):
+    """
+    Picker of a single person.
+    """
+
+
+class PersonManyToManyRawIdWidget(PersonAutocompleteMixin, ManyToManyRawIdWidget):
+    """
+    Picker of several persons.
+    """
+    def label_for_value(self, value):
+        try:
+            pks = [int(pk) for pk in value.split(',')]
+        except ValueError:
+            return ''
+        persons = Person.objects.using(self.db).filter(pk__in=pks).order_by('last_name', 'first_name')
+        return '&nbsp;<strong>%s</strong>' % escape(u'; '.join(unicode(person) for person in persons))
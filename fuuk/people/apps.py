@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.translation import ugettext_lazy as _
+
+
+class PeopleConfig(AppConfig):
+    name = 'fuuk.people'
+    verbose_name = _("People")
+
+    def ready(self):
+        # Connect signal receivers
+        from fuuk.people import signals  # noqa
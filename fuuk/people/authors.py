@@ -0,0 +1,75 @@
+"""
+Ordered author lists of articles.
+
+Author lists are replaced as a whole in a single transaction by bulk queries, so the order is always a sequence from 1.
+Derived data are updated once by receivers of `authors_changed` instead of `Author` signals sent for each row.
+"""
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.dispatch import Signal
+
+from fuuk.people.models import Article, Author
+from fuuk.people.utils import split_chunks
+
+# Sent when author lists of articles were replaced. Person IDs contain both previous and new authors.
+authors_changed = Signal(providing_args=['article_ids', 'person_ids'])
+
+
+def _get_pk(obj):
+    return getattr(obj, 'pk', obj)
+
+
+def set_authors(authors):
+    """
+    Replaces authors of articles.
+
+    @param authors: Mapping of articles to sequences of their authors in order. Both articles and persons may be
+        instances or primary keys.
+    @return: IDs of articles whose authors changed.
+    """
+    requested = {}
+    for article, persons in authors.items():
+        person_ids = [_get_pk(p) for p in persons]
+        if len(set(person_ids)) != len(person_ids):
+            raise ValueError('Duplicate authors of article %s.' % _get_pk(article))
+        requested[_get_pk(article)] = list(enumerate(person_ids, start=1))
+
+    with transaction.atomic():
+        current = defaultdict(list)
+        for chunk in split_chunks(requested):
+            # Lock the articles, so concurrent changes of the same author list are serialized
+            locked = Article.objects.select_for_update().filter(pk__in=chunk).values_list('pk', flat=True)
+            missing = set(chunk).difference(locked)
+            if missing:
+                raise Article.DoesNotExist('Articles %s do not exist.' % ', '.join(str(pk) for pk in sorted(missing)))
+            authors = Author.objects.filter(article__in=chunk).order_by('order')
+            for article_id, person_id, order in authors.values_list('article', 'person', 'order'):
+                current[article_id].append((order, person_id))
+
+        changed = [pk for pk in sorted(requested) if current[pk] != requested[pk]]
+        if not changed:
+            return []
+        # Plain query skips `post_delete` of individual rows, which `QuerySet.delete` sends as `Author` has receivers.
+        # Receivers of `authors_changed` handle derived data instead.
+        connection = connections[Author.objects.db]
+        table = connection.ops.quote_name(Author._meta.db_table)
+        column = connection.ops.quote_name(Author._meta.get_field('article').column)
+        with connection.cursor() as cursor:
+            for chunk in split_chunks(changed):
+                cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (table, column, ', '.join(['%s'] * len(chunk))),
+                               chunk)
+        Author.objects.bulk_create(Author(article_id=pk, person_id=person_id, order=order)
+                                   for pk in changed for order, person_id in requested[pk])
+        person_ids = set(person_id for pk in changed for order, person_id in current[pk] + requested[pk])
+        authors_changed.send(sender=Article, article_ids=changed, person_ids=person_ids)
+    return changed
+
+
+def set_article_authors(article, persons):
+    """
+    Replaces authors of a single article, see `set_authors`.
+
+    @return: Whether the authors changed.
+    """
+    return bool(set_authors({article: persons}))
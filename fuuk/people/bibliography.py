@@ -0,0 +1,317 @@
+"""
+Export of articles into bibliography formats.
+
+Articles are loaded in chunks with their authors, each format yields text of the articles one by one. Exports of any
+size are generated in a constant memory.
+"""
+import json
+import re
+import unicodedata
+
+from django.utils.encoding import force_text
+
+from fuuk.people.citations import get_chunks, prefetch_citations
+
+CHUNK_SIZE = 500
+
+BIBTEX_TYPES = {'ARTICLE': 'article', 'BOOK': 'incollection'}
+RIS_TYPES = {'ARTICLE': 'JOUR', 'BOOK': 'CHAP'}
+CSL_TYPES = {'ARTICLE': 'article-journal', 'BOOK': 'chapter'}
+# Presentations are exported as conference papers
+BIBTEX_DEFAULT_TYPE = 'inproceedings'
+RIS_DEFAULT_TYPE = 'CONF'
+CSL_DEFAULT_TYPE = 'paper-conference'
+
+_BIBTEX_SPECIAL_RE = re.compile(r'([\\~^&%$#_{}])')
+# Characters which can't be escaped by a backslash, others are prefixed by it
+_BIBTEX_COMMANDS = {u'\\': u'\\textbackslash{}', u'~': u'\\textasciitilde{}', u'^': u'\\textasciicircum{}'}
+_KEY_RE = re.compile(r'[^A-Za-z0-9]')
+
+
+def get_articles(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yields articles from queryset with prefetched authors, which are loaded in chunks.
+    """
+    for chunk in get_chunks(prefetch_citations(queryset), chunk_size):
+        for article in chunk:
+            yield article
+
+
+def _get_authors(article):
+    return [author.person for author in article.citation_authors]
+
+
+def _get_pages(article, separator):
+    if article.page_to and not article.article_number:
+        return u'%s%s%s' % (article.page_from, separator, article.page_to)
+    return article.page_from
+
+
+def _get_identifiers(article):
+    """
+    Returns DOI and ISBN of the article.
+    """
+    if article.type == 'ARTICLE':
+        return article.identification, None
+    return None, article.identification
+
+
+###############################################################################
+# BibTeX
+def get_bibtex_key(article):
+    authors = _get_authors(article)
+    name = authors[0].last_name if authors else u''
+    name = unicodedata.normalize('NFKD', force_text(name))
+    return u'%s%d_%d' % (_KEY_RE.sub(u'', name), article.year, article.pk)
+
+
+def _escape_bibtex(value):
+    return _BIBTEX_SPECIAL_RE.sub(lambda match: _BIBTEX_COMMANDS.get(match.group(1), u'\\' + match.group(1)),
+                                  force_text(value))
+
+
+def render_bibtex_entry(article):
+    doi, isbn = _get_identifiers(article)
+    authors = u' and '.join(u'%s, %s' % (p.last_name, p.first_name) for p in _get_authors(article))
+    container = 'journal' if article.type == 'ARTICLE' else 'booktitle'
+    fields = (
+        ('author', authors),
+        ('title', article.title),
+        (container, article.publication),
+        ('year', article.year),
+        ('volume', article.volume),
+        ('number', article.issue),
+        ('pages', _get_pages(article, u'--')),
+        ('editor', article.editors),
+        ('publisher', article.publishers),
+        ('address', article.place),
+        ('doi', doi),
+        ('isbn', isbn),
+    )
+    lines = [u'@%s{%s,' % (BIBTEX_TYPES.get(article.type, BIBTEX_DEFAULT_TYPE), get_bibtex_key(article))]
+    lines.extend(u'  %s = {%s},' % (name, _escape_bibtex(value)) for name, value in fields if value)
+    lines.append(u'}\n\n')
+    return u'\n'.join(lines)
+
+
+def render_bibtex(articles):
+    for article in articles:
+        yield render_bibtex_entry(article)
+
+
+###############################################################################
+# RIS
+def render_ris_entry(article):
+    doi, isbn = _get_identifiers(article)
+    fields = [('TY', RIS_TYPES.get(article.type, RIS_DEFAULT_TYPE))]
+    fields.extend(('AU', u'%s, %s' % (p.last_name, p.first_name)) for p in _get_authors(article))
+    fields.extend((
+        ('TI', article.title),
+        ('T2', article.publication),
+        ('PY', article.year),
+        ('VL', article.volume),
+        ('IS', article.issue),
+        ('SP', article.page_from),
+        ('EP', article.page_to if not article.article_number else None),
+        ('ED', article.editors),
+        ('PB', article.publishers),
+        ('CY', article.place),
+        ('DO', doi),
+        ('SN', isbn),
+        ('ER', u''),
+    ))
+    return u''.join(u'%s  - %s\r\n' % (tag, force_text(value)) for tag, value in fields if value or tag == 'ER')
+
+
+def render_ris(articles):
+    for article in articles:
+        yield render_ris_entry(article)
+
+
+###############################################################################
+# CSL-JSON
+def get_csl_item(article):
+    doi, isbn = _get_identifiers(article)
+    item = {
+        'id': get_bibtex_key(article),
+        'type': CSL_TYPES.get(article.type, CSL_DEFAULT_TYPE),
+        'title': article.title,
+        'author': [{'family': p.last_name, 'given': p.first_name} for p in _get_authors(article)],
+        'issued': {'date-parts': [[article.year]]},
+        'container-title': article.publication,
+        'volume': article.volume,
+        'issue': article.issue,
+        'page': _get_pages(article, u'-'),
+        'editor': [{'literal': article.editors}] if article.editors else None,
+        'publisher': article.publishers,
+        'publisher-place': article.place,
+        'DOI': doi,
+        'ISBN': isbn,
+    }
+    return dict((key, value) for key, value in item.items() if value)
+
+
+def render_csl(articles):
+    # Items are separated by commas, the list is streamed as well
+    separator = u'[\n'
+    for article in articles:
+        yield separator + json.dumps(get_csl_item(article), sort_keys=True)
+        separator = u',\n'
+    yield u'[]\n' if separator == u'[\n' else u'\n]\n'
+
+
+# format -> (content type, extension, renderer)
+FORMATS = {
+    'bibtex': ('application/x-bibtex', 'bib', render_bibtex),
+    'ris': ('application/x-research-info-systems', 'ris', render_ris),
+    'csl': ('application/vnd.citationstyles.csl+json', 'json', render_csl),
+}
+
+
+def export(queryset, format, chunk_size=CHUNK_SIZE):
+    """
+    Yields text of articles from queryset in the format.
+    """
+    return FORMATS[format][2](get_articles(queryset, chunk_size))
+
+
+###############################################################################
+# Parsers
+# Entries are returned as dictionaries of article fields with `authors` list.
+_BIBTEX_ENTRY_RE = re.compile(r'@\s*(\w+)\s*[{(]')
+_BIBTEX_FIELD_RE = re.compile(r'\s*,?\s*([\w-]+)\s*=\s*')
+_LATEX_ACCENTS = {"'": u'\u0301', '`': u'\u0300', '^': u'\u0302', '"': u'\u0308', '~': u'\u0303', '=': u'\u0304',
+                  '.': u'\u0307', 'v': u'\u030c', 'c': u'\u0327', 'r': u'\u030a', 'u': u'\u0306', 'H': u'\u030b',
+                  'k': u'\u0328'}
+_LATEX_ACCENT_RE = re.compile(r'\{?\\([\'`^"~=.]|[vcruHk](?![A-Za-z]))\s*\{?\\?([A-Za-z])\}?\}?')
+_LATEX_ESCAPE_RE = re.compile(r'\\([&%$#_{}])')
+_BIBTEX_BARE_VALUE_RE = re.compile(r'[^,})\s]*')
+_PAGES_RE = re.compile(r'\s*-+\s*')
+_RIS_LINE_RE = re.compile(r'^([A-Z][A-Z0-9])  -( (.*))?$')
+
+BIBTEX_IMPORT_TYPES = {'article': 'ARTICLE', 'book': 'BOOK', 'inbook': 'BOOK', 'incollection': 'BOOK',
+                       'inproceedings': 'TALK', 'conference': 'TALK'}
+BIBTEX_IMPORT_FIELDS = {'title': 'title', 'journal': 'publication', 'booktitle': 'publication', 'volume': 'volume',
+                        'number': 'issue', 'editor': 'editors', 'publisher': 'publishers', 'address': 'place'}
+RIS_IMPORT_TYPES = {'JOUR': 'ARTICLE', 'JFULL': 'ARTICLE', 'BOOK': 'BOOK', 'CHAP': 'BOOK', 'CONF': 'TALK',
+                    'CPAPER': 'TALK', 'ABST': 'POSTER'}
+RIS_IMPORT_FIELDS = {'TI': 'title', 'T1': 'title', 'T2': 'publication', 'JO': 'publication', 'JF': 'publication',
+                     'BT': 'publication', 'VL': 'volume', 'IS': 'issue', 'SP': 'page_from', 'EP': 'page_to',
+                     'PB': 'publishers', 'CY': 'place'}
+
+
+def _latex_to_text(value):
+    value = _LATEX_ACCENT_RE.sub(lambda m: m.group(2) + _LATEX_ACCENTS[m.group(1)], value)
+    value = _LATEX_ESCAPE_RE.sub(r'\1', value)
+    value = value.replace(u'{', u'').replace(u'}', u'').replace(u'~', u' ')
+    return u' '.join(unicodedata.normalize('NFC', value).split())
+
+
+def _read_bibtex_value(text, start):
+    """
+    Returns raw value starting at `start` and position after the value.
+    """
+    if text[start] in u'{"':
+        closing = u'}' if text[start] == u'{' else u'"'
+        depth = 0
+        for position in range(start + 1, len(text)):
+            char = text[position]
+            if char == closing and depth == 0 and text[position - 1] != u'\\':
+                return text[start + 1:position], position + 1
+            if char == u'{' and text[position - 1] != u'\\':
+                depth += 1
+            elif char == u'}' and text[position - 1] != u'\\':
+                depth -= 1
+        raise ValueError('Unterminated value')
+    match = _BIBTEX_BARE_VALUE_RE.match(text, start)
+    return match.group(0), match.end()
+
+
+def _split_name(name):
+    """
+    Returns last and first name from 'Last, First' or 'First Last'.
+    """
+    if u',' in name:
+        last_name, first_name = name.split(u',', 1)
+    else:
+        parts = name.rsplit(None, 1)
+        first_name, last_name = (parts[0], parts[1]) if len(parts) > 1 else (u'', parts[0])
+    return last_name.strip(), first_name.strip()
+
+
+def _make_entry(type, fields, authors, pages, identification):
+    entry = dict((key, value or None) for key, value in fields.items())
+    entry.update({'type': type, 'authors': [_split_name(name) for name in authors if name.strip()],
+                  'identification': identification or None})
+    if pages:
+        page_range = _PAGES_RE.split(pages, 1)
+        entry['page_from'] = page_range[0] or None
+        entry['page_to'] = page_range[1] if len(page_range) > 1 and page_range[1] else None
+    year = re.match(r'\s*(\d{4})', entry.pop('year', None) or u'')
+    entry['year'] = int(year.group(1)) if year else None
+    return entry
+
+
+def parse_bibtex(text):
+    """
+    Yields entries of a BibTeX file. Entries of unknown types are yielded with `type` of `None`.
+    """
+    text = force_text(text)
+    position = 0
+    while True:
+        match = _BIBTEX_ENTRY_RE.search(text, position)
+        if match is None:
+            return
+        entry_type = match.group(1).lower()
+        closing = u'}' if text[match.end() - 1] == u'{' else u')'
+        position = match.end()
+        if entry_type in ('comment', 'preamble', 'string'):
+            position = text.find(closing, position) + 1 or len(text)
+            continue
+        # Skip the key
+        position = text.index(u',', position) + 1
+        values = {}
+        while True:
+            field = _BIBTEX_FIELD_RE.match(text, position)
+            if field is None:
+                break
+            value, position = _read_bibtex_value(text, field.end())
+            values[field.group(1).lower()] = value
+        position = text.find(closing, position) + 1 or len(text)
+
+        fields = dict((BIBTEX_IMPORT_FIELDS[name], _latex_to_text(value))
+                      for name, value in values.items() if name in BIBTEX_IMPORT_FIELDS)
+        fields['year'] = values.get('year')
+        type = BIBTEX_IMPORT_TYPES.get(entry_type)
+        identification = _latex_to_text(values.get('doi' if type == 'ARTICLE' else 'isbn', u''))
+        authors = re.split(r'\s+and\s+', _latex_to_text(values.get('author', u'')))
+        yield _make_entry(type, fields, authors, _latex_to_text(values.get('pages', u'')), identification)
+
+
+def parse_ris(text):
+    """
+    Yields entries of a RIS file. Entries of unknown types are yielded with `type` of `None`.
+    """
+    tags = None
+    for line in force_text(text).splitlines():
+        match = _RIS_LINE_RE.match(line)
+        if match is None:
+            continue
+        tag, value = match.group(1), (match.group(3) or u'').strip()
+        if tag == 'TY':
+            tags = {'TY': [value]}
+        elif tags is None:
+            continue
+        elif tag == 'ER':
+            fields = dict((field, tags[tag][0]) for tag, field in RIS_IMPORT_FIELDS.items() if tag in tags)
+            fields['year'] = (tags.get('PY') or tags.get('Y1') or [None])[0]
+            fields['editors'] = u', '.join(tags.get('ED', [])) or None
+            type = RIS_IMPORT_TYPES.get(tags['TY'][0])
+            identification = (tags.get('DO') if type == 'ARTICLE' else tags.get('SN')) or [None]
+            yield _make_entry(type, fields, tags.get('AU', []) + tags.get('A1', []), None, identification[0])
+            tags = None
+        else:
+            tags.setdefault(tag, []).append(value)
+
+
+PARSERS = {'bibtex': parse_bibtex, 'ris': parse_ris}
@@ -0,0 +1,128 @@
+"""
+Rendering of article citations.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.template.loader import get_template
+from django.utils import translation
+
+from fuuk.people.models import Article, Author, Citation
+
+CITATION_TEMPLATE = 'people/citation.html'
+# All templates in which citations are stored
+CITATION_TEMPLATES = ('people/citation.html', 'oppo/people/citation.html')
+
+
+def prefetch_citations(queryset):
+    """
+    Returns queryset of articles which loads all data required by citations in a constant number of queries.
+    """
+    authors = Author.objects.select_related('person').order_by('order')
+    return queryset.select_related('presenter').prefetch_related(
+        Prefetch('author_set', queryset=authors, to_attr='citation_authors'))
+
+
+def get_chunks(queryset, chunk_size):
+    """
+    Yields lists of articles from queryset ordered by year descending.
+
+    Chunks are loaded by a keyset over `(-year, pk)`, so the memory doesn't grow with the number of articles.
+    """
+    queryset = queryset.order_by('-year', 'pk')
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+        last = chunk[-1]
+        chunk = list(queryset.filter(Q(year__lt=last.year) | Q(year=last.year, pk__gt=last.pk))[:chunk_size])
+
+
+def get_pages(article):
+    """
+    Returns pages of the article in the citation format.
+    """
+    if not article.page_from:
+        return None
+    if article.page_to:
+        if article.article_number:
+            return u"%s (%s" % (article.page_from, article.page_to)
+        else:
+            return u"%s-%s" % (article.page_from, article.page_to)
+    return unicode(article.page_from)
+
+
+def get_citation_context(article):
+    """
+    Returns context for a citation template.
+
+    Uses authors loaded by `prefetch_citations` if available.
+    """
+    authors = getattr(article, 'citation_authors', None)
+    if authors is None:
+        authors = article.author_set.select_related('person').order_by('order')
+    return {
+        'authors': authors,
+        'identification': article.identification,
+        'title': article.title,
+        'publication': article.publication,
+        'volume': article.volume,
+        'place': article.place,
+        'year': article.year,
+        'pages': get_pages(article),
+        'type': article.type,
+        'presenter': article.presenter,
+        'type_verbose': article.get_type_display(),
+        'editors': article.editors,
+        'publishers': article.publishers,
+        'article_number': article.article_number,
+    }
+
+
+def render_citations(articles, template_name=CITATION_TEMPLATE):
+    """
+    Yields rendered citations of articles.
+
+    The template is loaded only once for all articles. Use `prefetch_citations` on the articles to avoid queries.
+    """
+    template = get_template(template_name)
+    for article in articles:
+        yield template.render(get_citation_context(article))
+
+
+def update_citations(queryset):
+    """
+    Renders and stores citations of articles from queryset for all citation templates and languages.
+    """
+    articles = list(prefetch_citations(queryset))
+    citations = []
+    for template_name in CITATION_TEMPLATES:
+        for language, _ in settings.LANGUAGES:
+            with translation.override(language):
+                for article, html in zip(articles, render_citations(articles, template_name)):
+                    citations.append(Citation(article=article, template=template_name, language=language,
+                                              html=html))
+    with transaction.atomic():
+        Citation.objects.filter(article__in=articles).delete()
+        Citation.objects.bulk_create(citations)
+
+
+def attach_citations(articles, template_name=CITATION_TEMPLATE):
+    """
+    Returns list of articles with stored citations in `citation_html` attribute.
+
+    Citations which are not stored yet are rendered, but not stored. Only signal receivers and `rebuild_citations`
+    command store citations, so concurrent requests never write.
+    """
+    articles = list(articles)
+    language = translation.get_language()
+    stored = Citation.objects.filter(article__in=articles, template=template_name, language=language)
+    citations = dict(stored.values_list('article_id', 'html'))
+    missing = [a.pk for a in articles if a.pk not in citations]
+    if missing:
+        rendered = list(prefetch_citations(Article.objects.filter(pk__in=missing)))
+        citations.update(zip([a.pk for a in rendered], render_citations(rendered, template_name)))
+    for article in articles:
+        article.citation_html = citations.get(article.pk)
+    return articles
@@ -1,7 +1,33 @@
-from datetime import date
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
 
 from fuuk.people.models import News
 
+NEWS_KEY = 'news_list:%s'
+
+
+def get_news_list():
+    """
+    Returns list of current news.
+
+    The list is cached until the end of the day or until news are changed.
+    """
+    today = date.today()
+    key = NEWS_KEY % today.isoformat()
+    news = cache.get(key)
+    if news is None:
+        news = list(News.objects.filter(start__lte=today, end__gte=today).order_by('pk'))
+        # Translated fields are resolved on access, so the list serves all languages.
+        timeout = (datetime.combine(today + timedelta(days=1), time()) - datetime.now()).total_seconds()
+        cache.set(key, news, max(int(timeout), 1))
+    return news
+
+
+def invalidate_news_list():
+    cache.delete(NEWS_KEY % date.today().isoformat())
+
 
 def news_list(request):
-    return {'news_list': News.objects.filter(start__lte=date.today(), end__gte=date.today())}
+    return {'news_list': SimpleLazyObject(get_news_list)}
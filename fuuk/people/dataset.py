@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Generator of synthetic datasets for load and scale testing.
+
+The dataset is generated deterministically from a seed and satisfies validation of the models, including both
+translation columns. Objects are inserted in bulk in a single transaction, so signals are not sent. Markdown HTML,
+facets and flatpage routes are updated by the generator, citations and the search index are left to the rebuild
+commands.
+"""
+import random
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.utils import timezone
+from modeltranslation.settings import AVAILABLE_LANGUAGES
+from modeltranslation.utils import build_localized_fieldname
+
+from fuuk.common.markup import render_markdown
+from fuuk.fuflatpages.routing import routes
+from fuuk.people import facets
+from fuuk.people.models import Agency, Article, Author, Course, Department, Grant, Human, Person, Place, Thesis
+from fuuk.people.utils import bulk_create, bulk_insert
+
+# Prefix of nicknames of generated humans
+NICKNAME_PREFIX = 'gen'
+# Number of articles inserted at once
+ARTICLE_CHUNK_SIZE = 5000
+# Size of SQLite page cache in kB used during the generation
+SQLITE_CACHE_SIZE = 256 * 1024
+
+FIRST_NAMES = (u'Adam', u'Barbora', u'Cyril', u'Dana', u'Emil', u'Fran', u'Hana', u'Ivan', u'Jana', u'Karel',
+               u'Lucie', u'Marek', u'Nikola', u'Ondřej', u'Petra', u'Radek', u'Šárka', u'Tomáš', u'Věra', u'Zdeněk')
+LAST_NAMES = (u'Bartoš', u'Černý', u'Dvořák', u'Fiala', u'Hájek', u'Jelínek', u'Kolář', u'Král', u'Marek', u'Novák',
+              u'Pokorný', u'Růžička', u'Sedláček', u'Šimek', u'Urban', u'Veselý', u'Wagner', u'Zeman', u'Žák', u'Beneš')
+# Pairs of English and Czech topics
+TOPICS = ((u'magnetism', u'magnetismus'), (u'superconductivity', u'supravodivost'), (u'thin films', u'tenké vrstvy'),
+          (u'spectroscopy', u'spektroskopie'), (u'crystal growth', u'růst krystalů'),
+          (u'phase transitions', u'fázové přechody'))
+JOURNALS = (u'Physical Review B', u'Journal of Applied Physics', u'Acta Physica Polonica A', u'Thin Solid Films',
+            u'Journal of Magnetism and Magnetic Materials')
+PLACES = (u'Prague', u'Brno', u'Vienna', u'Dresden', u'Kraków')
+# Type of a person -> relative frequency
+PERSON_TYPES = (('STAFF', 30), ('OTHER', 10), ('PHD', 20), ('MGR', 15), ('BC', 10), ('GRAD', 10), ('STUDENT', 5))
+STUDENT_TYPES = ('PHD', 'MGR', 'BC')
+# Type of an article -> relative frequency
+ARTICLE_TYPES = (('ARTICLE', 60), ('BOOK', 5), ('TALK', 15), ('INVITED', 5), ('POSTER', 15))
+THESIS_TYPES = ('BC', 'MGR', 'PHD')
+FIRST_YEAR = 1995
+LAST_YEAR = 2015
+
+
+def _set_translations(obj, field, values):
+    # Values are pairs of English and Czech texts, English is used for other languages
+    english, czech = values
+    for language in AVAILABLE_LANGUAGES:
+        setattr(obj, build_localized_fieldname(field, language), czech if language == 'cs' else english)
+
+
+class DatasetGenerator(object):
+    """
+    Generates a dataset of the given size.
+
+    @param people: Number of humans, each with an active person of a random type.
+    @param external: Number of external article authors without a human.
+    @param articles: Number of articles.
+    @param authors: Number of authors of each article.
+    @param theses: Number of theses.
+    @param grants: Number of grants.
+    @param courses: Number of courses.
+    """
+    def __init__(self, people=200, external=400, articles=2000, authors=5, theses=100, grants=50, courses=50,
+                 seed=0):
+        self.sizes = {'people': people, 'external': external, 'articles': articles, 'authors': authors,
+                      'theses': theses, 'grants': grants, 'courses': courses}
+        self.random = random.Random(seed)
+        self._markdown = {}
+
+    def _choice(self, weighted):
+        value = self.random.uniform(0, sum(weight for item, weight in weighted))
+        for item, weight in weighted:
+            value -= weight
+            if value <= 0:
+                return item
+        return weighted[-1][0]
+
+    def _render(self, text):
+        if text not in self._markdown:
+            self._markdown[text] = render_markdown(text)
+        return self._markdown[text]
+
+    def _get_name(self, index):
+        # Names are unique up to the number of combinations, then numbered
+        first_name = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last_name = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+        rank = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+        if rank:
+            last_name = u'%s-%d' % (last_name, rank)
+        return first_name, last_name
+
+    def exists(self):
+        return Human.objects.filter(nickname__startswith=NICKNAME_PREFIX).exists()
+
+    def generate(self):
+        """
+        Inserts the dataset and returns numbers of created objects.
+        """
+        with transaction.atomic(), self._page_cache():
+            self._create_places()
+            self._create_people()
+            self._create_articles()
+            self._create_theses()
+            self._create_grants()
+            self._create_courses()
+        facets.update_article_years()
+        facets.update_thesis_index()
+        # Nicknames of the new humans may hide flatpages
+        routes.invalidate()
+        return self.counts
+
+    @contextmanager
+    def _page_cache(self):
+        # Indexes of authors don't fit into the default page cache of SQLite, which slows down the inserts
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            cache_size = cursor.fetchone()[0]
+            cursor.execute('PRAGMA cache_size = -%d' % SQLITE_CACHE_SIZE)
+            try:
+                yield
+            finally:
+                cursor.execute('PRAGMA cache_size = %d' % cache_size)
+
+    def _create_places(self):
+        departments = []
+        for index in range(3):
+            department = Department()
+            _set_translations(department, 'name', (u'Department %d' % (index + 1), u'Katedra %d' % (index + 1)))
+            departments.append(department)
+        bulk_create(Department, departments)
+        self.places = []
+        for index in range(12):
+            place = Place(department=departments[index % len(departments)])
+            _set_translations(place, 'name', (u'Room %d' % (100 + index), u'Místnost %d' % (100 + index)))
+            self.places.append(place)
+        bulk_create(Place, self.places)
+        self.agencies = []
+        for index, (shortcut, name) in enumerate(((u'GAČR', u'Czech Science Foundation'),
+                                                  (u'GAUK', u'Charles University Grant Agency'))):
+            agency = Agency()
+            _set_translations(agency, 'shortcut', (shortcut, shortcut))
+            _set_translations(agency, 'name', (name, name))
+            self.agencies.append(agency)
+        bulk_create(Agency, self.agencies)
+        self.counts = {'places': len(self.places)}
+
+    def _create_people(self):
+        humans, persons = [], []
+        for index in range(self.sizes['people']):
+            topic = TOPICS[self.random.randrange(len(TOPICS))]
+            human = Human(nickname='%s%06d' % (NICKNAME_PREFIX, index))
+            _set_translations(human, 'subtitle', topic)
+            _set_translations(human, 'cv', (u'Research of *%s*.' % topic[0], u'Výzkum: *%s*.' % topic[1]))
+            _set_translations(human, 'interests', (u'- %s' % topic[0], u'- %s' % topic[1]))
+            for language in AVAILABLE_LANGUAGES:
+                for field in ('cv', 'interests'):
+                    source = getattr(human, build_localized_fieldname(field, language))
+                    setattr(human, build_localized_fieldname('%s_html' % field, language), self._render(source))
+            humans.append(human)
+        bulk_create(Human, humans)
+
+        for index, human in enumerate(humans):
+            first_name, last_name = self._get_name(index)
+            person = Person(human=human, type=self._choice(PERSON_TYPES), first_name=first_name, last_name=last_name)
+            if person.type in STUDENT_TYPES:
+                person.class_year = self.random.randint(1, 4)
+            persons.append(person)
+            # Some staff members have a history
+            if person.type == 'STAFF' and self.random.random() < 0.2:
+                persons.append(Person(human=human, type='PHD', first_name=first_name, last_name=last_name,
+                                      class_year=4, is_active=False))
+        self.staff = [member for member in persons if member.type == 'STAFF' and member.is_active]
+        if not self.staff and persons:
+            # Students need advisors
+            persons[0].type, persons[0].class_year = 'STAFF', None
+            self.staff = [persons[0]]
+        # Advisors are inserted first, so their keys are available
+        bulk_create(Person, self.staff)
+        others = [other for other in persons if other.pk is None]
+        for person in others:
+            if person.type in STUDENT_TYPES + ('GRAD', ) and person.is_active:
+                person.advisor_id = self.staff[self.random.randrange(len(self.staff))].pk
+        bulk_create(Person, others)
+        self.internal = [person for person in persons if person.is_active]
+
+        names = [self._get_name(len(humans) + index) for index in range(self.sizes['external'])]
+        external = [Person(first_name=first, last_name=last) for first, last in names]
+        bulk_create(Person, external)
+        self.authors = [person.pk for person in self.internal + external]
+
+        Person.place.through.objects.bulk_create(
+            Person.place.through(person_id=person.pk, place_id=self.places[self.random.randrange(len(self.places))].pk)
+            for person in persons if person.type in ('STAFF', 'OTHER'))
+        self.counts.update(humans=len(humans), persons=len(persons) + len(external))
+
+    def _create_article(self, index):
+        """
+        Returns values of fields of an article.
+        """
+        type = self._choice(ARTICLE_TYPES)
+        topic = TOPICS[self.random.randrange(len(TOPICS))][0]
+        article = {'type': type, 'year': self.random.randint(FIRST_YEAR, LAST_YEAR),
+                   'title': u'On %s of sample %d' % (topic, index)}
+        # Page numbers of the same length are compared as strings
+        page_from = 100 + index % 800
+        if type == 'ARTICLE':
+            article['publication'] = JOURNALS[index % len(JOURNALS)]
+            if self.random.random() < 0.05:
+                article['accepted'] = True
+            else:
+                article['identification'] = u'10.%04d/fuuk.%d' % (1000 + index % 9000, index)
+                # Volume and first page are unique for each article
+                article['volume'] = u'%d' % (1 + index // 800 % 9999)
+                article['issue'] = u'%d' % self.random.randint(1, 12)
+                article['page_from'] = u'%d' % page_from
+                article['page_to'] = u'%d' % (page_from + self.random.randint(0, 99))
+        elif type == 'BOOK':
+            article['identification'] = u'978-80-%d-%d-%d' % (index // 10 ** 7 % 10 ** 6, index % 10 ** 7, index % 10)
+            article['publication'] = u'Proceedings of %s' % topic
+            article['page_from'] = u'%d' % page_from
+            article['page_to'] = u'%d' % (page_from + self.random.randint(0, 99))
+            article['publishers'] = u'Matfyzpress'
+            article['place'] = PLACES[index % len(PLACES)]
+        else:
+            article['publication'] = u'Book of abstracts'
+            article['place'] = PLACES[index % len(PLACES)]
+            article['page_from'] = u'%d' % page_from
+        return article
+
+    def _insert_rows(self, model, names, rows):
+        """
+        Inserts rows of values of fields `names` without creating model instances.
+
+        Articles and authors are the bulk of the dataset, creating instances would take most of the time.
+        """
+        quote_name = connection.ops.quote_name
+        columns = ', '.join(quote_name(model._meta.get_field(name).column) for name in names)
+        sql = 'INSERT INTO %s (%s) VALUES (%s)' % (quote_name(model._meta.db_table), columns,
+                                                   ', '.join(['%s'] * len(names)))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def _create_articles(self):
+        count = self.sizes['articles']
+        number = min(self.sizes['authors'], len(self.authors))
+        internal = [person.pk for person in self.internal]
+        names = ('type', 'identification', 'year', 'title', 'accepted', 'publication', 'volume', 'issue', 'page_from',
+                 'article_number', 'page_to', 'publishers', 'place', 'presenter', 'modified')
+        defaults = {'accepted': False, 'article_number': False,
+                    'modified': Article._meta.get_field('modified').get_db_prep_save(timezone.now(), connection)}
+        authors = 0
+        for start in range(0, count, ARTICLE_CHUNK_SIZE):
+            articles = [self._create_article(index) for index in range(start, min(start + ARTICLE_CHUNK_SIZE, count))]
+            article_authors = []
+            for article in articles:
+                # An internal first author and co-authors of any kind
+                person_ids = [internal[self.random.randrange(len(internal))]] if internal else []
+                for person_id in self.random.sample(self.authors, min(number + 1, len(self.authors))):
+                    if len(person_ids) < number and person_id not in person_ids:
+                        person_ids.append(person_id)
+                if article['type'] in ('TALK', 'INVITED', 'POSTER') and person_ids:
+                    # Presenter is one of the authors
+                    article['presenter'] = person_ids[0]
+                article_authors.append(person_ids)
+
+            rows = [tuple(article.get(name, defaults.get(name)) for name in names) for article in articles]
+
+            def insert(pks):
+                if pks is None:
+                    self._insert_rows(Article, names, rows)
+                else:
+                    self._insert_rows(Article, ('id', ) + names, [(pk, ) + row for pk, row in zip(pks, rows)])
+
+            article_ids = bulk_insert(Article, len(rows), insert)
+            self._insert_rows(Author, ('article', 'person', 'order'),
+                              [(article_id, author_id, order)
+                               for article_id, author_ids in zip(article_ids, article_authors)
+                               for order, author_id in enumerate(author_ids, start=1)])
+            authors += sum(len(author_ids) for author_ids in article_authors)
+        self.counts.update(articles=count, authors=authors)
+
+    def _get_advisor(self, author):
+        # Advisor has to be a different human
+        for _ in range(10):
+            advisor = self.staff[self.random.randrange(len(self.staff))]
+            if advisor.human_id != author.human_id:
+                return advisor
+        return None
+
+    def _create_theses(self):
+        theses = []
+        for index in range(self.sizes['theses'] if self.internal else 0):
+            author = self.internal[self.random.randrange(len(self.internal))]
+            topic = TOPICS[self.random.randrange(len(TOPICS))]
+            year = self.random.randint(FIRST_YEAR, LAST_YEAR)
+            thesis = Thesis(type=THESIS_TYPES[index % len(THESIS_TYPES)], year=year, author=author,
+                            advisor=self._get_advisor(author), defended=year < LAST_YEAR)
+            _set_translations(thesis, 'title', (u'Study of %s %d' % (topic[0], index),
+                                                u'Studium: %s %d' % (topic[1], index)))
+            _set_translations(thesis, 'annotation', (u'Thesis on %s.' % topic[0], u'Práce o tématu %s.' % topic[1]))
+            _set_translations(thesis, 'keywords', topic)
+            theses.append(thesis)
+        bulk_create(Thesis, theses)
+        self.counts['theses'] = len(theses)
+
+    def _create_grants(self):
+        grants, co_authors = [], []
+        for index in range(self.sizes['grants'] if self.staff else 0):
+            author = self.staff[self.random.randrange(len(self.staff))]
+            topic = TOPICS[self.random.randrange(len(TOPICS))]
+            start = self.random.randint(FIRST_YEAR, LAST_YEAR)
+            grant = Grant(author=author, number=u'%03d/%02d/%05d' % (index % 1000, start % 100, index),
+                          agency=self.agencies[index % len(self.agencies)], start=start,
+                          end=start + self.random.randint(0, 5))
+            _set_translations(grant, 'title', (u'Research of %s' % topic[0], u'Výzkum: %s' % topic[1]))
+            _set_translations(grant, 'annotation', (u'Grant on *%s*.' % topic[0], u'Grant: *%s*.' % topic[1]))
+            for language in AVAILABLE_LANGUAGES:
+                source = getattr(grant, build_localized_fieldname('annotation', language))
+                setattr(grant, build_localized_fieldname('annotation_html', language), self._render(source))
+            grants.append(grant)
+            co_authors.append(set(person for person in self.random.sample(self.internal, min(2, len(self.internal)))
+                                  if person.human_id != author.human_id))
+        bulk_create(Grant, grants)
+        Grant.co_authors.through.objects.bulk_create(
+            Grant.co_authors.through(grant_id=grant.pk, person_id=person.pk)
+            for grant, persons in zip(grants, co_authors) for person in persons)
+        self.counts['grants'] = len(grants)
+
+    def _create_courses(self):
+        courses, lectors = [], []
+        for index in range(self.sizes['courses'] if self.staff else 0):
+            topic = TOPICS[index % len(TOPICS)]
+            letters = index // 1000
+            code = u'NO%s%s%03d' % (chr(65 + letters // 26 % 26), chr(65 + letters % 26), index % 1000)
+            course = Course(code=code, ls=u'2/2 Zk' if index % 2 else None, zs=None if index % 2 else u'2/1 Z')
+            _set_translations(course, 'name', (u'Introduction to %s %d' % (topic[0], index),
+                                               u'Úvod: %s %d' % (topic[1], index)))
+            _set_translations(course, 'annotation', (u'Course on %s.' % topic[0], u'Kurz: %s.' % topic[1]))
+            courses.append(course)
+            lectors.append(self.staff[self.random.randrange(len(self.staff))])
+        bulk_create(Course, courses)
+        Course.lectors.through.objects.bulk_create(Course.lectors.through(course_id=course.pk, person_id=person.pk)
+                                                   for course, person in zip(courses, lectors))
+        self.counts['courses'] = len(courses)
@@ -0,0 +1,69 @@
+"""
+Cached facets of list views.
+
+Facets are kept in cache and rebuilt by signal receivers when the underlying objects change. Receivers run only in
+the process which changed the objects, so facets expire after `FACET_TIMEOUT` and values missing in a facet are
+checked in the database before they are reported as missing.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from fuuk.people.models import Article, Thesis
+
+# Types of articles listed in article list
+ARTICLE_LIST_TYPES = ('ARTICLE', 'BOOK')
+ARTICLE_YEARS_KEY = 'facets:article_years'
+THESIS_INDEX_KEY = 'facets:thesis_index'
+FACET_TIMEOUT = 10 * 60
+
+
+def update_article_years():
+    """
+    Rebuilds and returns list of `(year, count)` pairs of listed articles, newest first.
+    """
+    years = list(Article.objects.filter(type__in=ARTICLE_LIST_TYPES).values_list('year').annotate(Count('pk'))
+                 .order_by('-year'))
+    cache.set(ARTICLE_YEARS_KEY, years, FACET_TIMEOUT)
+    return years
+
+
+def get_article_years(year=None):
+    """
+    Returns list of `(year, count)` pairs of listed articles, newest first.
+
+    If `year` is missing in the cached facet, but it has listed articles, the facet is rebuilt.
+    """
+    years = cache.get(ARTICLE_YEARS_KEY)
+    if years is None:
+        years = update_article_years()
+    elif year is not None and year not in dict(years) \
+            and Article.objects.filter(type__in=ARTICLE_LIST_TYPES, year=year).exists():
+        years = update_article_years()
+    return years
+
+
+def update_thesis_index():
+    """
+    Rebuilds and returns dictionary of defended theses counts by `(type, year)`.
+    """
+    queryset = Thesis.objects.filter(defended=True).values_list('type', 'year').annotate(Count('pk')).order_by()
+    index = dict(((type, year), count) for type, year, count in queryset)
+    cache.set(THESIS_INDEX_KEY, index, FACET_TIMEOUT)
+    return index
+
+
+def get_thesis_index(**filters):
+    """
+    Returns dictionary of defended theses counts by `(type, year)`.
+
+    If no key of the cached index matches `type` and `year` filters, but there are such defended theses, the index is
+    rebuilt.
+    """
+    index = cache.get(THESIS_INDEX_KEY)
+    if index is None:
+        index = update_thesis_index()
+    elif filters and not any(filters.get('type', type) == type and filters.get('year', year) == year
+                             for type, year in index) \
+            and Thesis.objects.filter(defended=True, **filters).exists():
+        index = update_thesis_index()
+    return index
@@ -0,0 +1,189 @@
+"""
+Bulk import of articles from bibliography files.
+
+Entries are validated by the same rules as articles in the admin and their authors are matched to existing persons by
+a normalized name index. Articles, authors and new persons are inserted in bulk in a single transaction.
+"""
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.encoding import force_text
+
+from fuuk.people import facets, search
+from fuuk.people.authors import set_authors
+from fuuk.people.models import Article, Person
+from fuuk.people.utils import bulk_create, split_chunks
+
+# Fields which identify the same article in the database, see `Article.Meta.unique_together`
+UNIQUE_FIELDS = ('year', 'publication', 'volume', 'page_from', 'page_to')
+
+
+def normalize_name(name):
+    """
+    Returns lowercase alphanumeric characters of the name without diacritics.
+    """
+    name = unicodedata.normalize('NFKD', force_text(name).lower())
+    return u''.join(c for c in name if c.isalnum())
+
+
+def _get_initials(first_name):
+    return u''.join(u'%s.' % name[0] for name in first_name.split())
+
+
+class AmbiguousName(Exception):
+    """
+    Name matches several persons.
+    """
+
+
+class NameIndex(object):
+    """
+    Maps normalized names in forms of `Person.name` and `Person.name_reversed` to persons.
+    """
+    def __init__(self, persons):
+        self.index = defaultdict(list)
+        for person in persons:
+            self.add(person)
+
+    def add(self, person):
+        for name in set((normalize_name(person.name), normalize_name(person.name_reversed))):
+            self.index[name].append(person)
+
+    def match(self, last_name, first_name):
+        """
+        Returns person with the name or `None`. Raises `AmbiguousName` if the name matches several persons.
+        """
+        initials = _get_initials(first_name)
+        persons = {}
+        for name in (u'%s %s' % (last_name, initials), u'%s %s' % (initials, last_name)):
+            persons.update((p.pk, p) for p in self.index.get(normalize_name(name), ()))
+        persons = persons.values()
+        if len(persons) > 1:
+            # Prefer persons with the same full first name
+            same = [p for p in persons if normalize_name(p.first_name) == normalize_name(first_name)]
+            persons = same or persons
+        if len(persons) > 1:
+            # Persons of the same human, prefer the active one
+            if persons[0].human_id is None or any(p.human_id != persons[0].human_id for p in persons):
+                raise AmbiguousName(u'%s, %s' % (last_name, first_name))
+            persons.sort(key=lambda p: (p.is_active, p.pk), reverse=True)
+        return persons[0] if persons else None
+
+
+class ArticleImport(object):
+    """
+    Import of bibliography entries.
+
+    `prepare` validates entries and matches their authors, `save` inserts the accepted articles. Entries which are
+    not imported are reported in `duplicates`, `invalid` and `unmatched` lists of `(entry, reason)`.
+    """
+    def __init__(self, entries, create_persons=False):
+        self.entries = list(entries)
+        self.create_persons = create_persons
+        # List of (article, [(last name, first name, person or None)])
+        self.articles = []
+        self.duplicates = []
+        self.invalid = []
+        self.unmatched = []
+        # Names of unmatched authors and number of their entries
+        self.unmatched_names = Counter()
+
+    def _load_existing(self):
+        identifications = set(entry['identification'] for entry in self.entries if entry['identification'])
+        existing = set()
+        for chunk in split_chunks(identifications):
+            existing.update(Article.objects.filter(identification__in=chunk).values_list('identification', flat=True))
+        self.identifications = existing
+        years = set(entry['year'] for entry in self.entries if entry['year'])
+        self.unique_keys = set()
+        self.titles = set()
+        for chunk in split_chunks(years):
+            for values in Article.objects.filter(year__in=chunk).values_list('title', *UNIQUE_FIELDS):
+                self.titles.add((values[1], normalize_name(values[0])))
+                if all(value is not None for value in values[1:]):
+                    self.unique_keys.add(values[1:])
+
+    def _get_duplicate_reason(self, article):
+        if article.identification and article.identification in self.identifications:
+            return 'Duplicate identification %s' % article.identification
+        unique_key = tuple(getattr(article, name) for name in UNIQUE_FIELDS)
+        if all(value is not None for value in unique_key) and unique_key in self.unique_keys:
+            return 'Duplicate publication, volume and pages'
+        if (article.year, normalize_name(article.title)) in self.titles:
+            return 'Duplicate title'
+        return None
+
+    def _add_keys(self, article):
+        # Detect duplicates within imported entries
+        if article.identification:
+            self.identifications.add(article.identification)
+        unique_key = tuple(getattr(article, name) for name in UNIQUE_FIELDS)
+        if all(value is not None for value in unique_key):
+            self.unique_keys.add(unique_key)
+        self.titles.add((article.year, normalize_name(article.title)))
+
+    def prepare(self):
+        self._load_existing()
+        index = NameIndex(Person.objects.only('first_name', 'last_name', 'human', 'is_active'))
+        for entry in self.entries:
+            if entry['type'] is None:
+                self.invalid.append((entry, 'Unknown type of entry'))
+                continue
+            if not entry['authors']:
+                self.invalid.append((entry, 'Entry has no authors'))
+                continue
+            article = Article(**dict((key, value) for key, value in entry.items() if key != 'authors'))
+            try:
+                article.clean_fields(exclude=('presenter', ))
+                article.clean()
+            except ValidationError as error:
+                self.invalid.append((entry, u'; '.join(error.messages)))
+                continue
+            reason = self._get_duplicate_reason(article)
+            if reason:
+                self.duplicates.append((entry, reason))
+                continue
+
+            authors = []
+            try:
+                for last_name, first_name in entry['authors']:
+                    authors.append((last_name, first_name, index.match(last_name, first_name)))
+            except AmbiguousName as error:
+                self.invalid.append((entry, u'Ambiguous author %s' % error))
+                continue
+            # Several names of an entry may resolve to the same person, new persons are created by names
+            keys = Counter(person.pk if person else (last, first) for last, first, person in authors)
+            repeated = [u'%s, %s' % (last, first) for last, first, person in authors
+                        if keys[person.pk if person else (last, first)] > 1]
+            if repeated:
+                self.invalid.append((entry, u'Duplicate author %s' % u'; '.join(repeated)))
+                continue
+            unmatched = [(last, first) for last, first, person in authors if person is None]
+            self.unmatched_names.update(unmatched)
+            if unmatched and not self.create_persons:
+                self.unmatched.append((entry, u'Unmatched authors %s' % u'; '.join(u'%s, %s' % n for n in unmatched)))
+                continue
+            self._add_keys(article)
+            self.articles.append((article, authors))
+
+    def save(self):
+        """
+        Inserts the accepted articles, their authors and new persons.
+        """
+        with transaction.atomic():
+            persons = dict(((last, first), Person(last_name=last, first_name=first))
+                           for article, authors in self.articles for last, first, person in authors if person is None)
+            bulk_create(Person, persons.values())
+            bulk_create(Article, [article for article, authors in self.articles])
+            # Citations and person pages are updated by receivers of `authors_changed`
+            set_authors(dict((article, [person or persons[(last, first)] for last, first, person in authors])
+                             for article, authors in self.articles))
+
+        # Bulk inserts don't send signals, update derived data
+        for chunk in split_chunks(article.pk for article, authors in self.articles):
+            search.update_index(Article, chunk)
+        for chunk in split_chunks(person.pk for person in persons.values()):
+            search.update_index(Person, chunk)
+        facets.update_article_years()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from fuuk.people import bibliography
+from fuuk.people.models import Article, Author, Human
+
+
+class Command(BaseCommand):
+    help = 'Exports bibliography of articles in BibTeX, RIS or CSL-JSON format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('format', choices=sorted(bibliography.FORMATS), help='Format of the bibliography')
+        parser.add_argument('--human', help='Nickname of a human whose articles are exported')
+        parser.add_argument('--year', type=int, help='Year of exported articles')
+        parser.add_argument('--output', help='Output file, standard output by default')
+        parser.add_argument('--chunk-size', type=int, default=bibliography.CHUNK_SIZE,
+                            help='Number of articles loaded at once')
+
+    def handle(self, *args, **options):
+        queryset = Article.objects.all()
+        if options['human']:
+            if not Human.objects.filter(nickname=options['human']).exists():
+                raise CommandError('Human %s does not exist' % options['human'])
+            authors = Author.objects.filter(person__human__nickname=options['human'])
+            queryset = queryset.filter(pk__in=authors.values('article'))
+        if options['year']:
+            queryset = queryset.filter(year=options['year'])
+
+        texts = bibliography.export(queryset, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for text in texts:
+                    output.write(text.encode('utf-8'))
+        else:
+            for text in texts:
+                self.stdout.write(text.encode('utf-8'), ending='')
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from fuuk.people.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic dataset for load and scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--people', type=int, default=200, help='Number of humans')
+        parser.add_argument('--external', type=int, default=400, help='Number of external authors')
+        parser.add_argument('--articles', type=int, default=2000, help='Number of articles')
+        parser.add_argument('--authors', type=int, default=5, help='Number of authors of each article')
+        parser.add_argument('--theses', type=int, default=100, help='Number of theses')
+        parser.add_argument('--grants', type=int, default=50, help='Number of grants')
+        parser.add_argument('--courses', type=int, default=50, help='Number of courses')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+        parser.add_argument('--index', action='store_true', default=False,
+                            help='Rebuild citations and the search index afterwards')
+
+    def handle(self, *args, **options):
+        generator = DatasetGenerator(
+            people=options['people'], external=options['external'], articles=options['articles'],
+            authors=options['authors'], theses=options['theses'], grants=options['grants'],
+            courses=options['courses'], seed=options['seed'])
+        if generator.exists():
+            raise CommandError('Dataset was already generated.')
+
+        start = time.time()
+        counts = generator.generate()
+        if options['verbosity'] >= 1:
+            for name, count in sorted(counts.items()):
+                self.stdout.write('%s: %d' % (name.capitalize(), count))
+            self.stdout.write('Generated in %.1f s' % (time.time() - start))
+
+        if options['index']:
+            call_command('rebuild_citations', verbosity=options['verbosity'])
+            call_command('rebuild_search_index', verbosity=options['verbosity'])
@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fuuk.people.bibliography import PARSERS
+from fuuk.people.importer import ArticleImport
+
+# File extension -> format
+EXTENSIONS = {'.bib': 'bibtex', '.ris': 'ris'}
+
+
+class Command(BaseCommand):
+    help = 'Imports publications from BibTeX or RIS files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Imported files')
+        parser.add_argument('--format', choices=sorted(PARSERS),
+                            help='Format of the files, guessed from their extensions by default')
+        parser.add_argument('--dry-run', action='store_true', default=False, help='Only report what would be imported')
+        parser.add_argument('--create-persons', action='store_true', default=False,
+                            help='Create persons for unmatched authors instead of skipping their entries')
+
+    def handle(self, *args, **options):
+        entries = []
+        for filename in options['files']:
+            format = options['format'] or EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+            if format is None:
+                raise CommandError('Unknown format of %s' % filename)
+            with open(filename, 'rb') as input_file:
+                try:
+                    entries.extend(PARSERS[format](input_file.read().decode('utf-8')))
+                except ValueError as error:
+                    raise CommandError('Invalid file %s: %s' % (filename, error))
+
+        article_import = ArticleImport(entries, create_persons=options['create_persons'])
+        article_import.prepare()
+        if not options['dry_run']:
+            article_import.save()
+
+        if options['verbosity'] >= 1:
+            self.write_report(article_import, options['dry_run'])
+
+    def write_report(self, article_import, dry_run):
+        self.stdout.write('Entries: %d' % len(article_import.entries))
+        self.stdout.write('%s: %d' % ('Would import' if dry_run else 'Imported', len(article_import.articles)))
+        for title, reports in (('Duplicates', article_import.duplicates), ('Invalid', article_import.invalid),
+                               ('Skipped for unmatched authors', article_import.unmatched)):
+            self.stdout.write('%s: %d' % (title, len(reports)))
+            for entry, reason in reports:
+                self.stdout.write(u'  %s (%s): %s' % (entry['title'], entry['year'], reason))
+        if article_import.unmatched_names:
+            self.stdout.write('Unmatched authors%s:' % (' (new persons)' if article_import.create_persons else ''))
+            for (last_name, first_name), count in sorted(article_import.unmatched_names.items()):
+                self.stdout.write(u'  %s, %s: %d' % (last_name, first_name, count))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from fuuk.people import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Prints hits and misses of the person page cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', default=False, help='Reset the counters')
+
+    def handle(self, *args, **options):
+        stats = page_cache.get_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = 100.0 * stats['hits'] / total if total else 0.0
+        self.stdout.write('Hits: %d, misses: %d, hit rate: %.1f%%' % (stats['hits'], stats['misses'], ratio))
+        if options['reset']:
+            page_cache.reset_stats()
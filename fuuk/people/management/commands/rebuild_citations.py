@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from fuuk.people.citations import update_citations
+from fuuk.people.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Renders and stores citations of all articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Number of articles rendered at once')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        chunk_size = options['chunk_size']
+        last_pk = 0
+        count = 0
+        while True:
+            pks = list(Article.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            update_citations(Article.objects.filter(pk__in=pks))
+            last_pk = pks[-1]
+            count += len(pks)
+            if verbosity >= 2:
+                self.stdout.write('Rendered citations of %d articles' % count)
+        if verbosity >= 1:
+            self.stdout.write('Citations of %d articles rebuilt' % count)
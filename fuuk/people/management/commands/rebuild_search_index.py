@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from fuuk.people.models import SearchDocument, SearchTerm
+from fuuk.people.search import INDEXERS, update_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Number of objects indexed at once')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        chunk_size = options['chunk_size']
+        SearchTerm.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        for model in INDEXERS:
+            last_pk = 0
+            count = 0
+            while True:
+                pks = list(model.objects.filter(pk__gt=last_pk).order_by('pk')
+                           .values_list('pk', flat=True)[:chunk_size])
+                if not pks:
+                    break
+                update_index(model, pks)
+                last_pk = pks[-1]
+                count += len(pks)
+                if verbosity >= 2:
+                    self.stdout.write('Indexed %d %s' % (count, model._meta.verbose_name_plural))
+            if verbosity >= 1:
+                self.stdout.write('Search index of %d %s rebuilt' % (count, model._meta.verbose_name_plural))
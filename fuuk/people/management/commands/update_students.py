@@ -1,16 +1,39 @@
 from django.core.management.base import BaseCommand
 
-from fuuk.people.models import Person
+from fuuk.people.rollover import get_academic_year, Rollover
 
 
 class Command(BaseCommand):
-    help = 'Updates class year of active students'
+    help = 'Rolls students over to the academic year, updates their class years and graduates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None,
+                            help='First calendar year of the academic year, the current academic year by default')
+        parser.add_argument('--dry-run', action='store_true', default=False, help='Only report what would be done')
 
     def handle(self, *args, **options):
-        verbosity = options['verbosity']
-        for student in Person.objects.filter(type__in=('PHD', 'MGR', 'BC'), is_active=True):
-            if verbosity >= 2:
-                print 'Update class year of %s' % student
+        rollover = Rollover(options['year'] or get_academic_year())
+        if options['dry_run']:
+            rollover.prepare()
+        else:
+            rollover.apply()
+
+        if options['verbosity'] >= 1:
+            self.write_report(rollover, options['dry_run'])
 
-            student.class_year += 1
-            student.save()
+    def write_report(self, rollover, dry_run):
+        if rollover.applied:
+            self.stdout.write('Academic year %d/%d was already applied' % (rollover.year, rollover.year + 1))
+            return
+        self.stdout.write('Academic year %d/%d%s' % (rollover.year, rollover.year + 1, ' (dry run)' if dry_run else ''))
+        self.stdout.write('Promoted students: %d' % rollover.promoted)
+        self.stdout.write('Graduates: %d' % len(rollover.graduates))
+        for person in rollover.graduates:
+            self.stdout.write(u'  %s' % person)
+        for title, persons in (('New graduate persons', rollover.new_persons),
+                               ('Reactivated graduate persons', rollover.reactivated),
+                               ('Graduate persons not created for conflicting names', rollover.conflicts)):
+            if persons:
+                self.stdout.write('%s: %d' % (title, len(persons)))
+                for person in persons:
+                    self.stdout.write(u'  %s' % person)
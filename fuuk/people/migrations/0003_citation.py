@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0002_markdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Citation',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('template', models.CharField(max_length=100)),
+                ('language', models.CharField(max_length=10)),
+                ('html', models.TextField()),
+                ('article', models.ForeignKey(to='people.Article')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='citation',
+            unique_together=set([('article', 'template', 'language')]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0003_citation'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='article',
+            index_together=set([('year', 'title')]),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from markdownx.utils import markdownify
+
+
+def render_markdown(value):
+    # Frozen copy of `fuuk.common.markup.render_markdown`, migrations don't depend on the application code
+    return markdownify(value) if value else ''
+
+
+def render_fields(apps, schema_editor):
+    for model_name, fields in (('Human', ('cv', 'interests', 'stays')), ('Grant', ('annotation', ))):
+        model = apps.get_model('people', model_name)
+        for obj in model.objects.all():
+            for field in fields:
+                for language in ('cs', 'en'):
+                    source = getattr(obj, '%s_%s' % (field, language))
+                    setattr(obj, '%s_html_%s' % (field, language), render_markdown(source))
+            obj.save()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0004_article_year_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grant',
+            name='annotation_html',
+            field=models.TextField(editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='grant',
+            name='annotation_html_cs',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='grant',
+            name='annotation_html_en',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='cv_html',
+            field=models.TextField(editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='cv_html_cs',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='cv_html_en',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='interests_html',
+            field=models.TextField(editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='interests_html_cs',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='interests_html_en',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='stays_html',
+            field=models.TextField(editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='stays_html_cs',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='stays_html_en',
+            field=models.TextField(null=True, editable=False, blank=True),
+        ),
+        migrations.RunPython(render_fields, migrations.RunPython.noop),
+    ]
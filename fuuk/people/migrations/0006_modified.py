@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0005_markdown_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, auto_now=True, db_index=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='human',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, auto_now=True),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0007_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='person',
+            name='first_name',
+            field=models.CharField(help_text='Only first letter is required for article authors. In case of multiple first names, fill them separated by space.', max_length=50, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='last_name',
+            field=models.CharField(max_length=50, db_index=True),
+        ),
+    ]
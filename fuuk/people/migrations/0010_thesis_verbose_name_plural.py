@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0009_class_year_rollover'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='thesis',
+            options={'verbose_name_plural': 'theses'},
+        ),
+    ]
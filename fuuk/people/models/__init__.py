@@ -1,11 +1,13 @@
 """Modules related to people"""
 from .place import Department, Place
-from .person import Human, Person
+from .person import ClassYearRollover, Human, Person
 from .course import Course, Attachment
 from .grant import Grant, Agency
-from .article import ARTICLE_TYPES, Article, Author, ArticleBook, ArticleArticle, ArticleConference
+from .article import ARTICLE_TYPES, Article, Author, ArticleBook, ArticleArticle, ArticleConference, Citation
 from .thesis import Thesis
 from .news import News
+from .search import SearchDocument, SearchTerm
 
 __all__ = ['ARTICLE_TYPES', 'Agency', 'Article', 'ArticleArticle', 'ArticleBook', 'ArticleConference', 'Attachment',
-           'Author', 'Course', 'Department', 'Grant', 'Human', 'News', 'Person', 'Place', 'Thesis']
+           'Author', 'Citation', 'ClassYearRollover', 'Course', 'Department', 'Grant', 'Human', 'News', 'Person',
+           'Place', 'SearchDocument', 'SearchTerm', 'Thesis']
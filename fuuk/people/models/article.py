@@ -64,12 +64,17 @@ class Article(models.Model):
         Person, blank=True, null=True,
         help_text=_('Before selecting a presenter fill authors and press "Save and continue editing".')
     )
+    # Last modification of the article or its citation
+    modified = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         app_label = 'people'
         unique_together = (
             ('year', 'publication', 'volume', 'page_from', 'page_to'),
         )
+        index_together = (
+            ('year', 'title'),
+        )
 
     def __unicode__(self):
         return self.title or u""
@@ -160,10 +165,29 @@ class Author(models.Model):
 
     def save(self, *args, **kwargs):
         if self.order is None:
-            self.order = Author.objects.filter(article=self.article).count() + 1
+            # Append the author, use `fuuk.people.authors.set_authors` to change whole author lists
+            last = Author.objects.filter(article=self.article_id).aggregate(models.Max('order'))['order__max']
+            self.order = (last or 0) + 1
         return super(Author, self).save(*args, **kwargs)
 
 
+class Citation(models.Model):
+    """
+    Pre-rendered citation of an article for a citation template and language.
+    """
+    article = models.ForeignKey(Article)
+    template = models.CharField(max_length=100)
+    language = models.CharField(max_length=10)
+    html = models.TextField()
+
+    class Meta:
+        app_label = 'people'
+        unique_together = (('article', 'template', 'language'), )
+
+    def __unicode__(self):
+        return u'%s (%s, %s)' % (self.article, self.template, self.language)
+
+
 ###############################################################################
 # Article proxy models
 
@@ -32,6 +32,7 @@ class Grant(models.Model):
 
     title = models.CharField(max_length=200)
     annotation = models.TextField(help_text=get_markdown_help_text)
+    annotation_html = models.TextField(blank=True, editable=False)
 
     class Meta:
         app_label = 'people'
@@ -60,6 +60,12 @@ class Human(models.Model):
     cv = models.TextField(blank=True, null=True, help_text=get_markdown_help_text)
     interests = models.TextField(blank=True, null=True, help_text=get_markdown_help_text)
     stays = models.TextField(blank=True, null=True, help_text=get_markdown_help_text)
+    # HTML of markdown fields
+    cv_html = models.TextField(blank=True, editable=False)
+    interests_html = models.TextField(blank=True, editable=False)
+    stays_html = models.TextField(blank=True, editable=False)
+    # Last modification of any data displayed on person pages
+    modified = models.DateTimeField(auto_now=True)
 
     class Meta:
         app_label = 'people'
@@ -81,11 +87,11 @@ class Person(models.Model):
     # data fields
     prefix = models.CharField(max_length=20, blank=True, null=True)
     first_name = models.CharField(
-        max_length=50,
+        max_length=50, db_index=True,
         help_text=_('Only first letter is required for article authors. In case of multiple first names, fill them '
                     'separated by space.')
     )
-    last_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50, db_index=True)
     suffix = models.CharField(max_length=20, blank=True, null=True)
     class_year = models.SmallIntegerField(blank=True, null=True)
 
@@ -138,3 +144,17 @@ class Person(models.Model):
     @property
     def full_name(self):
         return full_name(self.prefix, self.first_name, self.last_name, self.suffix)
+
+
+class ClassYearRollover(models.Model):
+    """
+    Academic year whose rollover was applied to students.
+    """
+    year = models.PositiveSmallIntegerField(unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'people'
+
+    def __unicode__(self):
+        return unicode(self.year)
@@ -0,0 +1,36 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Indexed object displayed in search results.
+    """
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=300)
+    url = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        app_label = 'people'
+        unique_together = (('content_type', 'object_id'), )
+
+    def __unicode__(self):
+        return self.title or u""
+
+
+class SearchTerm(models.Model):
+    """
+    Posting of a normalized term in a search document.
+    """
+    term = models.CharField(max_length=50)
+    document = models.ForeignKey(SearchDocument)
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        app_label = 'people'
+        # Index of term lookups
+        unique_together = (('term', 'document'), )
+
+    def __unicode__(self):
+        return u'%s (%s)' % (self.term, self.document_id)
@@ -38,6 +38,7 @@ class Thesis(models.Model):
 
     class Meta:
         app_label = 'people'
+        verbose_name_plural = _('theses')
 
     def __unicode__(self):
         return self.title or u""
@@ -0,0 +1,83 @@
+"""
+Cache of rendered person pages.
+
+Pages are cached by nickname, modification time of the human, view and language. Signal receivers mark the humans
+whose data changed as modified, so their pages cached by any process are never read again, and evict the pages from
+the cache. Hit and miss counters cover all processes only with a shared cache backend.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from fuuk.people.models import Human
+
+# Names of cached person views
+PERSON_VIEWS = ('person_detail', 'person_articles', 'person_articles_first', 'person_courses', 'person_students',
+                'person_grants')
+PERSON_PAGE_TIMEOUT = 24 * 60 * 60
+
+_HITS_KEY = 'person_page:hits'
+_MISSES_KEY = 'person_page:misses'
+
+
+def get_page_key(nickname, modified, view_name, language):
+    # Pages depend on the current year, e.g. current and finished grants
+    return 'person_page:%s:%s:%s:%s:%s' % (nickname, modified.isoformat(), view_name, language, date.today().year)
+
+
+def _increment(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter expired in between
+        cache.set(key, 1, None)
+
+
+def get_page(nickname, modified, view_name, language):
+    """
+    Returns content of the page cached for the modification time of the human or `None`.
+    """
+    content = cache.get(get_page_key(nickname, modified, view_name, language))
+    if content is None:
+        _increment(_MISSES_KEY)
+    else:
+        _increment(_HITS_KEY)
+    return content
+
+
+def set_page(nickname, modified, view_name, language, content):
+    cache.set(get_page_key(nickname, modified, view_name, language), content, PERSON_PAGE_TIMEOUT)
+
+
+def _invalidate(humans):
+    previous = list(humans.values_list('nickname', 'modified'))
+    if not previous:
+        return
+    # New modification time makes the pages stale in all processes
+    humans.update(modified=timezone.now())
+    cache.delete_many([get_page_key(nickname, modified, view_name, language)
+                       for nickname, modified in previous
+                       for view_name in PERSON_VIEWS for language, _ in settings.LANGUAGES])
+
+
+def invalidate_humans(human_ids):
+    """
+    Updates modification time of humans and evicts their cached pages.
+    """
+    human_ids = set(pk for pk in human_ids if pk is not None)
+    if human_ids:
+        _invalidate(Human.objects.filter(pk__in=human_ids))
+
+
+def get_stats():
+    """
+    Returns number of cache hits and misses.
+    """
+    return {'hits': cache.get(_HITS_KEY, 0), 'misses': cache.get(_MISSES_KEY, 0)}
+
+
+def reset_stats():
+    cache.delete_many([_HITS_KEY, _MISSES_KEY])
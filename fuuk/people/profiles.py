@@ -0,0 +1,148 @@
+"""
+Loader of data displayed on person pages.
+"""
+from datetime import date
+
+from django.db.models import Prefetch, Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from fuuk.people.models import Author, Course, Grant, Human, Person, Place, Thesis
+
+
+class HumanProfile(object):
+    """
+    Data of a human displayed on person pages.
+
+    Each group of data is loaded by a single query on first access. Menu flags `has_*` only check existence, unless
+    the data are already loaded.
+    """
+    def __init__(self, human):
+        self.human = human
+
+    @classmethod
+    def load(cls, nickname):
+        """
+        Returns profile of the human with nickname or raises `Http404`.
+        """
+        try:
+            return cls(Human.objects.get(nickname=nickname))
+        except Human.DoesNotExist:
+            raise Http404
+
+    def _exists(self, names, queryset):
+        # Use loaded data if available
+        if all(name in self.__dict__ for name in names):
+            return any(self.__dict__[name] for name in names)
+        return queryset.exists()
+
+    # Persons
+    @cached_property
+    def persons(self):
+        places = Place.objects.select_related('department')
+        return list(self.human.person_set.order_by('-is_active').prefetch_related(Prefetch('place', queryset=places)))
+
+    @property
+    def person(self):
+        """
+        Returns the active person of the human or the last one if there isn't any active.
+        """
+        if not self.persons:
+            raise Http404
+        return self.persons[0]
+
+    @property
+    def active_person(self):
+        if not self.person.is_active:
+            raise Http404
+        return self.person
+
+    # Publications
+    @cached_property
+    def _authors(self):
+        return list(Author.objects.filter(person__human=self.human).select_related('article__presenter')
+                    .order_by('-article__year', 'article__title'))
+
+    @cached_property
+    def publications(self):
+        return [author.article for author in self._authors]
+
+    @cached_property
+    def publications_first(self):
+        return [author.article for author in self._authors if author.order == 1]
+
+    @property
+    def has_publications(self):
+        return self._exists(('_authors', ), Author.objects.filter(person__human=self.human))
+
+    # Courses
+    def _get_courses(self, **kwargs):
+        return list(Course.objects.filter(**kwargs).prefetch_related('attachment_set').order_by('pk'))
+
+    @cached_property
+    def courses(self):
+        return self._get_courses(lectors__human=self.human)
+
+    @cached_property
+    def courses_practical(self):
+        return self._get_courses(practical_lectors__human=self.human)
+
+    @property
+    def has_courses(self):
+        queryset = Course.objects.filter(Q(lectors__human=self.human) | Q(practical_lectors__human=self.human))
+        return self._exists(('courses', 'courses_practical'), queryset)
+
+    # Students
+    @cached_property
+    def _students(self):
+        return list(Person.objects.filter(advisor__human=self.human).select_related('human')
+                    .prefetch_related('thesis_set').order_by('last_name', 'first_name'))
+
+    @cached_property
+    def students(self):
+        return [s for s in self._students if s.is_active]
+
+    @cached_property
+    def students_finished(self):
+        return [s for s in self._students if not s.is_active]
+
+    @property
+    def has_students(self):
+        return self._exists(('_students', ), Person.objects.filter(advisor__human=self.human))
+
+    # Grants
+    def _get_grants_queryset(self):
+        return Grant.objects.filter(Q(author__human=self.human) | Q(co_authors__human=self.human)).distinct()
+
+    @cached_property
+    def _grants(self):
+        places = Place.objects.select_related('department')
+        return list(self._get_grants_queryset().select_related('agency', 'author')
+                    .prefetch_related(Prefetch('author__place', queryset=places),
+                                      Prefetch('co_authors__place', queryset=places))
+                    .order_by('-end', '-pk'))
+
+    @cached_property
+    def grants(self):
+        return [g for g in self._grants if g.end >= date.today().year]
+
+    @cached_property
+    def grants_finished(self):
+        return [g for g in self._grants if g.end < date.today().year]
+
+    @property
+    def has_grants(self):
+        return self._exists(('_grants', ), self._get_grants_queryset())
+
+    # Theses
+    @cached_property
+    def _theses(self):
+        return list(Thesis.objects.filter(author__human=self.human).order_by('-year'))
+
+    @cached_property
+    def theses(self):
+        return [t for t in self._theses if t.defended]
+
+    @cached_property
+    def theses_ongoing(self):
+        return [t for t in self._theses if not t.defended]
@@ -0,0 +1,110 @@
+"""
+Academic year rollover of students.
+
+Class years of active students are incremented by a single update. Students who defended a thesis of their study
+graduate instead: they are deactivated and their humans get an active graduate person, unless they continue their
+studies as another active person. Applied academic years are recorded, so the rollover of a year is done only once.
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from fuuk.people import page_cache, search
+from fuuk.people.models import ClassYearRollover, Person
+from fuuk.people.utils import bulk_create, split_chunks
+
+STUDENT_TYPES = ('PHD', 'MGR', 'BC')
+# Month in which the rollover of the academic year is expected
+ACADEMIC_YEAR_START_MONTH = 9
+
+
+def get_academic_year(today=None):
+    """
+    Returns the first calendar year of the current academic year.
+    """
+    today = today or date.today()
+    return today.year if today.month >= ACADEMIC_YEAR_START_MONTH else today.year - 1
+
+
+class Rollover(object):
+    """
+    Rollover of students to the academic year.
+
+    `prepare` finds the changes, `apply` makes them in a single transaction.
+    """
+    def __init__(self, year):
+        self.year = year
+        # Whether the year, or a later one, was already applied
+        self.applied = False
+        # Number of promoted students
+        self.promoted = 0
+        self.graduates = []
+        # Graduate persons to be created and existing ones to be reactivated
+        self.new_persons = []
+        self.reactivated = []
+        # Graduates whose graduate person can't be created due to another person of the same name
+        self.conflicts = []
+
+    def _get_students(self):
+        return Person.objects.filter(type__in=STUDENT_TYPES, is_active=True)
+
+    def prepare(self):
+        self.applied = ClassYearRollover.objects.filter(year__gte=self.year).exists()
+        if self.applied:
+            return
+        self.new_persons, self.reactivated, self.conflicts = [], [], []
+        students = self._get_students()
+        self.graduates = list(students.filter(thesis__defended=True, thesis__type=F('type')).distinct()
+                              .order_by('last_name', 'first_name'))
+        graduate_ids = [person.pk for person in self.graduates]
+        self.promoted = students.count() - len(self.graduates)
+
+        human_ids = set(person.human_id for person in self.graduates if person.human_id is not None)
+        # Humans who continue their studies as another person
+        continuing = set(Person.objects.filter(human__in=human_ids, is_active=True).exclude(pk__in=graduate_ids)
+                         .values_list('human', flat=True))
+        existing = dict((person.human_id, person)
+                        for person in Person.objects.filter(human__in=human_ids, type='GRAD').order_by('pk'))
+        names = set(Person.objects.filter(type='GRAD', last_name__in=set(p.last_name for p in self.graduates))
+                    .values_list('first_name', 'last_name'))
+        for graduate in self.graduates:
+            if graduate.human_id is None or graduate.human_id in continuing:
+                continue
+            if graduate.human_id in existing:
+                self.reactivated.append(existing[graduate.human_id])
+            elif (graduate.first_name, graduate.last_name) in names:
+                self.conflicts.append(graduate)
+            else:
+                self.new_persons.append(Person(type='GRAD', human_id=graduate.human_id, prefix=graduate.prefix,
+                                               first_name=graduate.first_name, last_name=graduate.last_name,
+                                               suffix=graduate.suffix))
+
+    def apply(self):
+        """
+        Applies the rollover, returns whether anything was done.
+        """
+        with transaction.atomic():
+            self.prepare()
+            if self.applied:
+                return False
+            try:
+                with transaction.atomic():
+                    ClassYearRollover.objects.create(year=self.year)
+            except IntegrityError:
+                # Concurrent rollover of the same year
+                self.applied = True
+                return False
+            students = self._get_students()
+            human_ids = set(pk for pair in students.values_list('human', 'advisor__human') for pk in pair)
+            for chunk in split_chunks(person.pk for person in self.graduates):
+                Person.objects.filter(pk__in=chunk).update(is_active=False)
+            # Graduates are already inactive
+            self.promoted = students.update(class_year=F('class_year') + 1)
+            Person.objects.filter(pk__in=[person.pk for person in self.reactivated]).update(is_active=True)
+            bulk_create(Person, self.new_persons)
+
+        # Updates don't send signals, update derived data
+        search.update_index(Person, [person.pk for person in self.new_persons + self.reactivated])
+        page_cache.invalidate_humans(human_ids)
+        return True
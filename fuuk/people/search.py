@@ -0,0 +1,159 @@
+"""
+Full-text search over an inverted index.
+
+Indexed objects are stored as `SearchDocument`s with postings of their normalized terms. Signal receivers update
+documents of changed objects, so queries are answered only from the term index.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils.encoding import force_text
+from modeltranslation.utils import build_localized_fieldname
+
+from fuuk.people import facets
+from fuuk.people.models import Article, Course, Person, SearchDocument, SearchTerm, Thesis
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 50
+MAX_QUERY_TERMS = 10
+MAX_WEIGHT = 32767
+SEARCH_LIMIT = 50
+
+# model -> (indexer, related fields)
+INDEXERS = {}
+
+
+def get_terms(text):
+    """
+    Returns normalized terms of the text.
+
+    Terms are lowercase words without diacritics, which are at least two characters long.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', force_text(text).lower())
+    text = u''.join(c for c in text if not unicodedata.combining(c))
+    return [term[:MAX_TERM_LENGTH] for term in TERM_RE.findall(text) if len(term) > 1]
+
+
+def register(model, select_related=()):
+    """
+    Registers indexer of the model.
+
+    Indexer returns titles of the object by language, URL and a list of `(weight, text)` of indexed texts.
+    """
+    def decorator(func):
+        INDEXERS[model] = (func, select_related)
+        return func
+    return decorator
+
+
+def _translations(instance, field):
+    return [getattr(instance, build_localized_fieldname(field, language)) for language, _ in settings.LANGUAGES]
+
+
+def _get_titles(instance, field):
+    return dict((language, getattr(instance, build_localized_fieldname(field, language)))
+                for language, _ in settings.LANGUAGES)
+
+
+def _same_titles(title):
+    return dict((language, title) for language, _ in settings.LANGUAGES)
+
+
+@register(Article)
+def index_article(article):
+    # Only articles and books are listed by years
+    if article.type in facets.ARTICLE_LIST_TYPES:
+        url = reverse('articles', kwargs={'year': article.year})
+    else:
+        url = ''
+    return _same_titles(article.title), url, [(3, article.title), (1, article.publication)]
+
+
+@register(Thesis)
+def index_thesis(thesis):
+    fields = [(3, text) for text in _translations(thesis, 'title')]
+    fields.extend((2, text) for text in _translations(thesis, 'keywords'))
+    fields.extend((1, text) for text in _translations(thesis, 'abstract'))
+    return _get_titles(thesis, 'title'), reverse('theses_detail', kwargs={'pk': thesis.pk}), fields
+
+
+@register(Course)
+def index_course(course):
+    fields = [(3, text) for text in _translations(course, 'name')]
+    fields.append((3, course.code))
+    fields.extend((1, text) for text in _translations(course, 'annotation'))
+    return _get_titles(course, 'name'), reverse('courses'), fields
+
+
+@register(Person, select_related=('human', ))
+def index_person(person):
+    fields = [(3, person.first_name), (3, person.last_name)]
+    if person.human is None or not person.human.nickname:
+        url = ''
+    else:
+        url = reverse('person_detail', kwargs={'slug': person.human.nickname})
+        fields.append((2, person.human.nickname))
+    return _same_titles(person.full_name), url, fields
+
+
+def delete_index(model, pks):
+    """
+    Removes documents of objects from the index.
+    """
+    documents = SearchDocument.objects.filter(content_type=ContentType.objects.get_for_model(model),
+                                              object_id__in=list(pks))
+    SearchTerm.objects.filter(document__in=documents).delete()
+    documents.delete()
+
+
+def update_index(model, pks):
+    """
+    Updates documents of objects in the index.
+    """
+    indexer, select_related = INDEXERS[model]
+    content_type = ContentType.objects.get_for_model(model)
+    pks = list(pks)
+    documents = []
+    postings = {}
+    for obj in model.objects.filter(pk__in=pks).select_related(*select_related):
+        titles, url, fields = indexer(obj)
+        weights = Counter()
+        for weight, text in fields:
+            for term in get_terms(text):
+                weights[term] += weight
+        document = SearchDocument(content_type=content_type, object_id=obj.pk, url=url)
+        for language, title in titles.items():
+            setattr(document, build_localized_fieldname('title', language), (title or '')[:300])
+        documents.append(document)
+        postings[obj.pk] = weights
+
+    with transaction.atomic():
+        delete_index(model, pks)
+        SearchDocument.objects.bulk_create(documents)
+        # Bulk create doesn't set primary keys
+        document_ids = SearchDocument.objects.filter(content_type=content_type, object_id__in=postings.keys()) \
+            .values_list('object_id', 'pk')
+        terms = [SearchTerm(document_id=document_id, term=term, weight=min(weight, MAX_WEIGHT))
+                 for object_id, document_id in document_ids for term, weight in postings[object_id].items()]
+        SearchTerm.objects.bulk_create(terms)
+
+
+def search(query, limit=SEARCH_LIMIT):
+    """
+    Returns documents which contain all terms of the query ordered by their score.
+    """
+    terms = set(get_terms(query)[:MAX_QUERY_TERMS])
+    if not terms:
+        return []
+    documents = SearchDocument.objects.filter(searchterm__term__in=terms) \
+        .annotate(matched=Count('searchterm'), score=Sum('searchterm__weight')).filter(matched=len(terms)) \
+        .select_related('content_type').order_by('-score', 'pk')
+    return list(documents[:limit])
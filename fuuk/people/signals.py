@@ -0,0 +1,268 @@
+"""
+Signal receivers which keep derived data up to date.
+"""
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from fuuk.common import markup
+from fuuk.people import authors, facets, page_cache, search
+from fuuk.people.citations import update_citations
+from fuuk.people.context_processors import invalidate_news_list
+from fuuk.people.models import Article, Attachment, Author, Citation, Course, Grant, Human, News, Person, Thesis
+from fuuk.people.utils import split_chunks
+
+markup.register(Human, ('cv', 'interests', 'stays'))
+markup.register(Grant, ('annotation', ))
+
+
+def _get_person_humans(**kwargs):
+    """
+    Returns IDs of humans of persons filtered by kwargs.
+    """
+    return set(Person.objects.filter(**kwargs).values_list('human', flat=True))
+
+
+###############################################################################
+# Humans and persons
+@receiver(post_save, sender=Human)
+def human_saved(sender, instance, raw, update_fields, **kwargs):
+    if raw:
+        return
+    # Saved modification time makes the cached pages stale, see `fuuk.people.page_cache`
+    if update_fields is not None and 'modified' not in update_fields:
+        page_cache.invalidate_humans((instance.pk, ))
+    # Nickname is indexed with persons
+    search.update_index(Person, instance.person_set.values_list('pk', flat=True))
+
+
+@receiver(markup.markdown_rendered, sender=Human)
+@receiver(markup.markdown_rendered, sender=Grant)
+def markdown_rendered(sender, **kwargs):
+    page_cache.invalidate_humans(Human.objects.values_list('pk', flat=True))
+
+
+@receiver(pre_save, sender=Person)
+def person_pre_save(sender, instance, raw, **kwargs):
+    instance._name_changed = False
+    if raw or instance.pk is None:
+        return
+    old = Person.objects.filter(pk=instance.pk).values('first_name', 'last_name', 'human', 'advisor__human').first()
+    if old is None:
+        return
+    instance._name_changed = (old['first_name'], old['last_name']) != (instance.first_name, instance.last_name)
+    # Pages of the previous human and advisor
+    page_cache.invalidate_humans((old['human'], old['advisor__human']))
+
+
+@receiver(post_save, sender=Person)
+def person_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    human_ids = {instance.human_id}
+    if instance.advisor_id:
+        human_ids.add(Person.objects.filter(pk=instance.advisor_id).values_list('human', flat=True).first())
+    if getattr(instance, '_name_changed', False):
+        articles = Article.objects.filter(Q(author__person=instance) | Q(presenter=instance)).distinct()
+        update_citations(articles)
+        _touch_articles(articles.values('pk'))
+        # Name is displayed on pages of co-authors of articles and grants
+        human_ids.update(_get_person_humans(author__article__in=articles.values('pk')))
+        grants = Grant.objects.filter(Q(author=instance) | Q(co_authors=instance)).values('pk')
+        human_ids.update(_get_person_humans(grant__in=grants))
+        human_ids.update(_get_person_humans(grant_related__in=grants))
+    page_cache.invalidate_humans(human_ids)
+
+
+@receiver(post_delete, sender=Person)
+def person_deleted(sender, instance, **kwargs):
+    page_cache.invalidate_humans(_get_person_humans(pk=instance.advisor_id) | {instance.human_id})
+
+
+@receiver(m2m_changed, sender=Person.place.through)
+def person_places_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Instance is a place
+        page_cache.invalidate_humans(_get_person_humans(place=instance))
+    else:
+        page_cache.invalidate_humans((instance.human_id, ))
+
+
+###############################################################################
+# Articles
+def _invalidate_article_pages(article_id):
+    page_cache.invalidate_humans(_get_person_humans(author__article=article_id))
+
+
+def _touch_articles(article_ids):
+    # Citations of the articles changed
+    Article.objects.filter(pk__in=article_ids).update(modified=timezone.now())
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, raw, **kwargs):
+    facets.update_article_years()
+    if raw:
+        return
+    update_citations(Article.objects.filter(pk=instance.pk))
+    _invalidate_article_pages(instance.pk)
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    facets.update_article_years()
+
+
+@receiver(post_save, sender=Author)
+def author_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    update_citations(Article.objects.filter(pk=instance.article_id))
+    _touch_articles((instance.article_id, ))
+    _invalidate_article_pages(instance.article_id)
+
+
+@receiver(post_delete, sender=Author)
+def author_deleted(sender, instance, **kwargs):
+    # Article may be deleted as well, so only drop the stale citations. They are rendered again when requested.
+    Citation.objects.filter(article=instance.article_id).delete()
+    _touch_articles((instance.article_id, ))
+    page_cache.invalidate_humans(_get_person_humans(pk=instance.person_id))
+    _invalidate_article_pages(instance.article_id)
+
+
+@receiver(authors.authors_changed, sender=Article)
+def article_authors_changed(sender, article_ids, person_ids, **kwargs):
+    for chunk in split_chunks(article_ids):
+        update_citations(Article.objects.filter(pk__in=chunk))
+        _touch_articles(chunk)
+    # Pages of both previous and new authors
+    human_ids = set()
+    for chunk in split_chunks(person_ids):
+        human_ids.update(_get_person_humans(pk__in=chunk))
+    page_cache.invalidate_humans(human_ids)
+
+
+###############################################################################
+# Grants
+def _invalidate_grant_pages(grant):
+    human_ids = _get_person_humans(pk=grant.author_id)
+    human_ids.update(_get_person_humans(grant_related=grant))
+    page_cache.invalidate_humans(human_ids)
+
+
+@receiver(post_save, sender=Grant)
+def grant_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    _invalidate_grant_pages(instance)
+
+
+@receiver(pre_delete, sender=Grant)
+def grant_pre_delete(sender, instance, **kwargs):
+    _invalidate_grant_pages(instance)
+
+
+@receiver(m2m_changed, sender=Grant.co_authors.through)
+def grant_co_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+    if reverse:
+        # Instance is a person
+        human_ids = {instance.human_id}
+        grants = Grant.objects.filter(pk__in=pk_set) if pk_set else instance.grant_related.all()
+        for grant in grants:
+            human_ids.update(_get_person_humans(pk=grant.author_id))
+            human_ids.update(_get_person_humans(grant_related=grant))
+        page_cache.invalidate_humans(human_ids)
+    else:
+        _invalidate_grant_pages(instance)
+        if pk_set:
+            page_cache.invalidate_humans(_get_person_humans(pk__in=pk_set))
+
+
+###############################################################################
+# Courses
+def _invalidate_course_pages(course_id):
+    human_ids = _get_person_humans(course=course_id)
+    human_ids.update(_get_person_humans(practical_course_set=course_id))
+    page_cache.invalidate_humans(human_ids)
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    _invalidate_course_pages(instance.pk)
+
+
+@receiver(pre_delete, sender=Course)
+def course_pre_delete(sender, instance, **kwargs):
+    _invalidate_course_pages(instance.pk)
+
+
+@receiver(m2m_changed, sender=Course.lectors.through)
+@receiver(m2m_changed, sender=Course.practical_lectors.through)
+def course_lectors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+    if reverse:
+        # Instance is a person
+        page_cache.invalidate_humans((instance.human_id, ))
+    else:
+        _invalidate_course_pages(instance.pk)
+        if pk_set:
+            page_cache.invalidate_humans(_get_person_humans(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def attachment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_course_pages(instance.course_id)
+
+
+###############################################################################
+# Theses
+@receiver(post_save, sender=Thesis)
+@receiver(post_delete, sender=Thesis)
+def thesis_changed(sender, instance, raw=False, **kwargs):
+    facets.update_thesis_index()
+    if raw:
+        return
+    # Thesis is displayed on pages of its author and the author's advisor
+    human_ids = _get_person_humans(pk=instance.author_id)
+    human_ids.update(_get_person_humans(student=instance.author_id))
+    page_cache.invalidate_humans(human_ids)
+
+
+###############################################################################
+# News
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_changed(sender, instance, **kwargs):
+    invalidate_news_list()
+
+
+###############################################################################
+# Search index
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Person)
+@receiver(post_save, sender=Thesis)
+def search_object_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    search.update_index(sender, (instance.pk, ))
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Person)
+@receiver(post_delete, sender=Thesis)
+def search_object_deleted(sender, instance, **kwargs):
+    search.delete_index(sender, (instance.pk, ))
@@ -0,0 +1,76 @@
+/*
+ * Search box of person pickers.
+ *
+ * Matching persons are fetched from the admin search view. Selected person is set to the raw ID input next to the
+ * search box, which works for rows of inlines added later as well.
+ */
+(function($) {
+    'use strict';
+    var DELAY = 200;
+    var MIN_LENGTH = 2;
+
+    function getTarget(box) {
+        return box.siblings('input.vForeignKeyRawIdAdminField, input.vManyToManyRawIdAdminField').first();
+    }
+
+    function select(box, person) {
+        var target = getTarget(box);
+        if (target.hasClass('vManyToManyRawIdAdminField') && target.val()) {
+            var ids = target.val().split(',');
+            if ($.inArray(String(person.id), ids) === -1) {
+                ids.push(person.id);
+            }
+            target.val(ids.join(','));
+        } else {
+            target.val(person.id);
+        }
+        var label = box.siblings('strong');
+        if (!label.length) {
+            label = $('<strong>').insertAfter(box);
+        }
+        if (target.hasClass('vManyToManyRawIdAdminField') && label.text() && target.val() !== String(person.id)) {
+            label.text(label.text() + '; ' + person.text);
+        } else {
+            label.text(person.text);
+        }
+        box.val('');
+    }
+
+    function showResults(box, results) {
+        box.siblings('ul.person-autocomplete-results').remove();
+        if (!results.length) {
+            return;
+        }
+        var list = $('<ul class="person-autocomplete-results">');
+        $.each(results, function(i, person) {
+            $('<li>').text(person.text).on('mousedown', function(event) {
+                event.preventDefault();
+                select(box, person);
+                list.remove();
+            }).appendTo(list);
+        });
+        list.insertAfter(box);
+    }
+
+    $(document).on('input', 'input.person-autocomplete', function() {
+        var box = $(this);
+        clearTimeout(box.data('timeout'));
+        if (box.val().length < MIN_LENGTH) {
+            showResults(box, []);
+            return;
+        }
+        box.data('timeout', setTimeout(function() {
+            var query = box.val();
+            $.getJSON(box.data('url'), {q: query}, function(data) {
+                // Ignore responses to outdated queries
+                if (box.val() === query) {
+                    showResults(box, data.results);
+                }
+            });
+        }, DELAY));
+    });
+
+    $(document).on('blur', 'input.person-autocomplete', function() {
+        $(this).siblings('ul.person-autocomplete-results').remove();
+    });
+})(django.jQuery);
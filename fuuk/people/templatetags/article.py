@@ -1,36 +1,21 @@
 from django import template
+from django.utils.safestring import mark_safe
+
+from fuuk.common.timing import timer
+from fuuk.people.citations import CITATION_TEMPLATE, render_citations
 
 register = template.Library()
 
 
+@register.simple_tag
 def citation(article):
-    pages = None
-    if article.page_from:
-        if article.page_to:
-            if article.article_number:
-                pages = u"%s (%s" % (article.page_from, article.page_to)
-            else:
-                pages = u"%s-%s" % (article.page_from, article.page_to)
-        else:
-            pages = unicode(article.page_from)
-
-    tag_context = {
-        'authors': article.author_set.select_related('person').order_by('order'),
-        'identification': article.identification,
-        'title': article.title,
-        'publication': article.publication,
-        'volume': article.volume,
-        'place': article.place,
-        'year': article.year,
-        'pages': pages,
-        'type': article.type,
-        'presenter': article.presenter,
-        'type_verbose': article.get_type_display(),
-        'editors': article.editors,
-        'publishers': article.publishers,
-        'article_number': article.article_number,
-    }
-    return tag_context
-
+    """
+    Returns citation of the article.
 
-register.inclusion_tag('people/citation.html')(citation)
+    Uses citation stored by `attach_citations` if available.
+    """
+    with timer('citation'):
+        html = getattr(article, 'citation_html', None)
+        if html is None:
+            html = next(render_citations([article], CITATION_TEMPLATE))
+        return mark_safe(html)
@@ -1,9 +1,13 @@
+# -*- coding: utf-8 -*-
+import json
+
 from django.contrib.auth.models import Permission, User
 from django.core.urlresolvers import reverse
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.test.utils import override_settings
 
-from fuuk.people.models import Course, Human, Person
+from fuuk.people.admin.permissions import get_editable_ids
+from fuuk.people.models import Article, ArticleArticle, Author, Course, Human, Person, Thesis
 
 
 @override_settings(LANGUAGE_CODE='en')
@@ -48,3 +52,134 @@ class TestCourseAdmin(TestCase):
         response = self.client.get(reverse('admin:people_course_change', args=(course.pk, )))
 
         self.assertContains(response, 'Change course')
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestParticipantAdmin(TestCase):
+    """
+    Test non-superusers may change only objects they take part in.
+    """
+    def setUp(self):
+        self.user = User.objects.create(username='user', is_staff=True)
+        self.user.set_password('user')
+        self.user.save()
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=('change_articlearticle',
+                                                                                'change_thesis')))
+        self.person = Person.objects.create(human=Human.objects.create(user=self.user, nickname='User'),
+                                            first_name='Tester', last_name='Eda')
+        self.other = Person.objects.create(first_name='Other', last_name='Author')
+        self.own = Article.objects.create(type='ARTICLE', year=2013, title='Own article')
+        Author.objects.create(article=self.own, person=self.person, order=1)
+        Author.objects.create(article=self.own, person=self.other, order=2)
+        self.foreign = Article.objects.create(type='ARTICLE', year=2013, title='Foreign article')
+        Author.objects.create(article=self.foreign, person=self.other, order=1)
+        self.client.login(username='user', password='user')
+
+    def test_changelist(self):
+        response = self.client.get(reverse('admin:people_articlearticle_changelist'))
+        self.assertContains(response, 'Own article', count=1)
+        self.assertNotContains(response, 'Foreign article')
+
+    def test_change_view(self):
+        response = self.client.get(reverse('admin:people_articlearticle_change', args=(self.own.pk, )))
+        self.assertContains(response, 'Own article')
+        response = self.client.get(reverse('admin:people_articlearticle_change', args=(self.foreign.pk, )))
+        self.assertEqual(response.status_code, 404)
+
+    def test_thesis(self):
+        thesis = Thesis.objects.create(type='MGR', year=2014, author=self.other, advisor=self.person, title='Thesis')
+        self.assertEqual(self.client.get(reverse('admin:people_thesis_change', args=(thesis.pk, ))).status_code, 200)
+        thesis.advisor = None
+        thesis.save()
+        self.assertEqual(self.client.get(reverse('admin:people_thesis_change', args=(thesis.pk, ))).status_code, 404)
+
+    def test_index_cached(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            self.assertEqual(get_editable_ids(request, ArticleArticle), {self.own.pk})
+            self.assertEqual(get_editable_ids(request, Article), {self.own.pk})
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestPersonPickers(TestCase):
+    """
+    Test person pickers and the person search view.
+    """
+    def setUp(self):
+        self.user = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.user.set_password('admin')
+        self.user.save()
+        self.client.login(username='admin', password='admin')
+        self.alpha = Person.objects.create(first_name=u'Jiří', last_name=u'Novák')
+        self.beta = Person.objects.create(first_name='Jan', last_name='Nováček')
+        self.gamma = Person.objects.create(first_name='Nora', last_name='Other')
+
+    def _search(self, query):
+        response = self.client.get(reverse('admin:people_person_search'), {'q': query})
+        return [result['id'] for result in json.loads(response.content)['results']]
+
+    def test_search(self):
+        self.assertEqual(self._search(u'nov'), [self.alpha.pk, self.beta.pk])
+        self.assertEqual(self._search(u'Nov ji'), [self.alpha.pk])
+        self.assertEqual(self._search(u'no'), [self.alpha.pk, self.beta.pk, self.gamma.pk])
+        self.assertEqual(self._search(u'x'), [])
+        self.assertEqual(self._search(u''), [])
+
+    def test_search_staff_only(self):
+        self.client.logout()
+        response = self.client.get(reverse('admin:people_person_search'), {'q': 'nov'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_article_form(self):
+        article = Article.objects.create(type='ARTICLE', year=2013, title='Article')
+        Author.objects.create(article=article, person=self.alpha, order=1)
+        response = self.client.get(reverse('admin:people_articlearticle_change', args=(article.pk, )))
+        self.assertContains(response, 'class="person-autocomplete"', count=5)
+        self.assertContains(response, u'<strong>Novák Jiří</strong>')
+        self.assertNotContains(response, 'Other Nora')
+
+    def test_course_form(self):
+        course = Course.objects.create(code='NOOE017', name_en='Course')
+        course.lectors.add(self.alpha, self.beta)
+        response = self.client.get(reverse('admin:people_course_change', args=(course.pk, )))
+        self.assertContains(response, u'<strong>Novák Jiří; Nováček Jan</strong>')
+        self.assertNotContains(response, 'Other Nora')
+        response = self.client.post(reverse('admin:people_course_change', args=(course.pk, )), {
+            'code': 'NOOE017', 'name_en': 'Course', 'lectors': '%d,%d' % (self.alpha.pk, self.gamma.pk),
+            'attachment_set-TOTAL_FORMS': 0, 'attachment_set-INITIAL_FORMS': 0})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(course.lectors.all()), {self.alpha, self.gamma})
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestArticleAdmin(TestCase):
+    """
+    Test authors are saved as a whole by article admins.
+    """
+    def setUp(self):
+        self.user = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.user.set_password('admin')
+        self.user.save()
+        self.client.login(username='admin', password='admin')
+        self.alpha = Person.objects.create(first_name='Alpha', last_name='Tester')
+        self.beta = Person.objects.create(first_name='Beta', last_name='Author')
+        self.gamma = Person.objects.create(first_name='Gamma', last_name='Writer')
+        self.article = Article.objects.create(type='ARTICLE', year=2013, title='Article', publication='Journal',
+                                              volume='1', page_from='1')
+        self.first = Author.objects.create(article=self.article, person=self.alpha, order=1)
+        self.second = Author.objects.create(article=self.article, person=self.beta, order=2)
+
+    def test_change_authors(self):
+        data = {'type': 'ARTICLE', 'year': 2013, 'title': 'Article', 'publication': 'Journal', 'volume': '1',
+                'page_from': '1',
+                'author_set-TOTAL_FORMS': 3, 'author_set-INITIAL_FORMS': 2,
+                'author_set-0-id': self.first.pk, 'author_set-0-article': self.article.pk,
+                'author_set-0-person': self.alpha.pk, 'author_set-0-DELETE': 'on',
+                'author_set-1-id': self.second.pk, 'author_set-1-article': self.article.pk,
+                'author_set-1-person': self.beta.pk,
+                'author_set-2-article': self.article.pk, 'author_set-2-person': self.gamma.pk}
+        response = self.client.post(reverse('admin:people_articlearticle_change', args=(self.article.pk, )), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(self.article.author_set.order_by('order').values_list('order', 'person')),
+                         [(1, self.beta.pk), (2, self.gamma.pk)])
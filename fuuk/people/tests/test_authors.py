@@ -0,0 +1,71 @@
+"""
+Tests of article author lists.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from fuuk.people import page_cache
+from fuuk.people.authors import set_article_authors, set_authors
+from fuuk.people.models import Article, Author, Citation, Human, Person
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestSetAuthors(TestCase):
+    """
+    Test `set_authors` function.
+    """
+    def setUp(self):
+        cache.clear()
+        self.alpha = Person.objects.create(first_name='Alpha', last_name='Tester',
+                                           human=Human.objects.create(nickname='Alpha_test'))
+        self.beta = Person.objects.create(first_name='Beta', last_name='Author')
+        self.gamma = Person.objects.create(first_name='Gamma', last_name='Writer')
+        self.article = Article.objects.create(type='ARTICLE', year=2013, title='Article')
+        Author.objects.create(article=self.article, person=self.alpha, order=1)
+        Author.objects.create(article=self.article, person=self.beta, order=2)
+
+    def _get_authors(self, article):
+        return list(article.author_set.order_by('order').values_list('order', 'person'))
+
+    def test_reorder(self):
+        self.assertTrue(set_article_authors(self.article, [self.beta, self.alpha.pk]))
+        self.assertEqual(self._get_authors(self.article), [(1, self.beta.pk), (2, self.alpha.pk)])
+        html = Citation.objects.get(article=self.article, template='people/citation.html', language='en').html
+        self.assertLess(html.index('Author B.'), html.index('Tester A.'))
+
+    def test_unchanged(self):
+        # Savepoint, lock, authors, release
+        with self.assertNumQueries(4):
+            self.assertFalse(set_article_authors(self.article, [self.alpha, self.beta]))
+
+    def test_duplicate(self):
+        with self.assertRaises(ValueError):
+            set_article_authors(self.article, [self.alpha, self.alpha])
+        self.assertEqual(self._get_authors(self.article), [(1, self.alpha.pk), (2, self.beta.pk)])
+
+    def test_missing_article(self):
+        with self.assertRaises(Article.DoesNotExist):
+            set_authors({self.article.pk + 1: [self.alpha]})
+
+    def test_removed_author_pages(self):
+        self.client.get('/people/person/Alpha_test/papers/')
+        modified = Human.objects.get(nickname='Alpha_test').modified
+        key = page_cache.get_page_key('Alpha_test', modified, 'person_articles', 'en')
+        self.assertIsNotNone(cache.get(key))
+        set_article_authors(self.article, [self.gamma])
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(self._get_authors(self.article), [(1, self.gamma.pk)])
+
+    def test_constant_queries(self):
+        persons = [Person.objects.create(first_name='First', last_name='Author %d' % i) for i in range(100)]
+        other = Article.objects.create(type='ARTICLE', year=2014, title='Other article')
+        with self.assertNumQueries(16):
+            changed = set_authors({self.article: persons, other: reversed(persons)})
+        self.assertEqual(changed, sorted([self.article.pk, other.pk]))
+        self.assertEqual(self._get_authors(other)[0], (1, persons[-1].pk))
+
+    def test_append(self):
+        Author.objects.filter(article=self.article, order=1).delete()
+        author = Author.objects.create(article=self.article, person=self.gamma)
+        self.assertEqual(author.order, 3)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of bibliography exports.
+"""
+import json
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from fuuk.people.bibliography import export, render_bibtex_entry, render_ris_entry
+from fuuk.people.citations import prefetch_citations
+from fuuk.people.models import Article, Author, Human, Person
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestBibliography(TestCase):
+    """
+    Test bibliography formats and exports.
+    """
+    def setUp(self):
+        self.human = Human.objects.create(nickname='Tester')
+        self.alpha = Person.objects.create(human=self.human, first_name=u'Jiří', last_name=u'Tester')
+        self.gamma = Person.objects.create(first_name='Gamma', last_name='Author')
+        self.article = Article.objects.create(type='ARTICLE', year=2013, title='Spin & charge',
+                                              identification='10.1000/1', publication='Journal', volume='12',
+                                              issue='3', page_from='100', page_to='110')
+        Author.objects.create(article=self.article, person=self.alpha, order=1)
+        Author.objects.create(article=self.article, person=self.gamma, order=2)
+        self.book = Article.objects.create(type='BOOK', year=2005, title='Book', identification='978-80-1234-56-7',
+                                           publication='Book title', page_from='7', publishers='Publisher')
+        Author.objects.create(article=self.book, person=self.gamma, order=1)
+
+    def _get(self, article):
+        return prefetch_citations(Article.objects.filter(pk=article.pk))[0]
+
+    def test_bibtex(self):
+        entry = render_bibtex_entry(self._get(self.article))
+        self.assertTrue(entry.startswith(u'@article{Tester2013_%d,\n' % self.article.pk))
+        self.assertIn(u'  author = {Tester, Jiří and Author, Gamma},\n', entry)
+        self.assertIn(u'  title = {Spin \\& charge},\n', entry)
+        self.assertIn(u'  pages = {100--110},\n', entry)
+        self.assertIn(u'  doi = {10.1000/1},\n', entry)
+        entry = render_bibtex_entry(self._get(self.book))
+        self.assertTrue(entry.startswith(u'@incollection{Author2005_%d,\n' % self.book.pk))
+        self.assertIn(u'  isbn = {978-80-1234-56-7},\n', entry)
+
+    def test_bibtex_special(self):
+        self.article.title = u'C:\\dir ~ x^2 {50%}'
+        self.article.publication = u'Journal\\'
+        self.article.save()
+        entry = render_bibtex_entry(self._get(self.article))
+        self.assertIn(u'  title = {C:\\textbackslash{}dir \\textasciitilde{} x\\textasciicircum{}2 \\{50\\%\\}},\n',
+                      entry)
+        self.assertIn(u'  journal = {Journal\\textbackslash{}},\n', entry)
+
+    def test_ris(self):
+        entry = render_ris_entry(self._get(self.article))
+        self.assertEqual(entry.split(u'\r\n'), [
+            u'TY  - JOUR', u'AU  - Tester, Jiří', u'AU  - Author, Gamma', u'TI  - Spin & charge', u'T2  - Journal',
+            u'PY  - 2013', u'VL  - 12', u'IS  - 3', u'SP  - 100', u'EP  - 110', u'DO  - 10.1000/1', u'ER  - ', u''])
+
+    def test_csl(self):
+        items = json.loads(u''.join(export(Article.objects.all(), 'csl')))
+        self.assertEqual([item['title'] for item in items], ['Spin & charge', 'Book'])
+        self.assertEqual(items[0]['author'], [{'family': u'Tester', 'given': u'Jiří'},
+                                              {'family': 'Author', 'given': 'Gamma'}])
+        self.assertEqual(items[1]['ISBN'], '978-80-1234-56-7')
+        self.assertEqual(json.loads(u''.join(export(Article.objects.none(), 'csl'))), [])
+
+    def test_chunks(self):
+        for i in range(5):
+            article = Article.objects.create(type='ARTICLE', year=2010, title='Article %d' % i)
+            Author.objects.create(article=article, person=self.alpha, order=1)
+        # Articles and authors for each chunk
+        with self.assertNumQueries(8):
+            entries = list(export(Article.objects.all(), 'ris', chunk_size=2))
+        self.assertEqual(len(entries), 7)
+
+    def test_views(self):
+        response = self.client.get('/people/export/bibtex/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-bibtex; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="articles.bib"')
+        content = b''.join(response.streaming_content)
+        self.assertIn('Spin \\& charge', content)
+        self.assertIn('@incollection', content)
+
+        response = self.client.get('/people/articles/2005/export/ris/')
+        self.assertContains(response, 'TI  - Book')
+        self.assertNotContains(response, 'Spin')
+        self.assertEqual(self.client.get('/people/articles/2001/export/ris/').status_code, 404)
+
+        response = self.client.get('/people/person/Tester/papers/export/csl/')
+        self.assertEqual([item['title'] for item in json.loads(b''.join(response.streaming_content))],
+                         ['Spin & charge'])
+        self.assertEqual(self.client.get('/people/person/Unknown/papers/export/csl/').status_code, 404)
+
+    def test_conditional(self):
+        etag = self.client.get('/people/export/ris/')['ETag']
+        self.assertEqual(self.client.get('/people/export/ris/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.book.delete()
+        self.assertEqual(self.client.get('/people/export/ris/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_bibliography', 'bibtex', human='Tester', stdout=out)
+        self.assertIn(u'title = {Spin \\& charge}', out.getvalue().decode('utf-8'))
+        self.assertNotIn('Book', out.getvalue())
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of citations rendering.
+"""
+from django.core.management import call_command
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from fuuk.people.citations import (attach_citations, CITATION_TEMPLATES, get_citation_context, prefetch_citations,
+                                   render_citations)
+from fuuk.people.models import Article, Author, Citation, Person
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestRenderCitations(TestCase):
+    """
+    Test `render_citations` function.
+    """
+    def setUp(self):
+        self.alpha = Person.objects.create(first_name='Alpha Beta', last_name='Tester')
+        self.gamma = Person.objects.create(first_name='Gamma', last_name='Author')
+        article = Article.objects.create(type='ARTICLE', year=2013, title='First article', identification='10.1000/1',
+                                         publication='Journal', volume='12', page_from='100', page_to='110')
+        Author.objects.create(article=article, person=self.gamma, order=2)
+        Author.objects.create(article=article, person=self.alpha, order=1)
+        Article.objects.create(type='BOOK', year=2005, title='Book', identification='978-80-1234-56-7',
+                               publication='Book title', page_from='7', publishers='Publisher')
+        talk = Article.objects.create(type='TALK', year=2001, title='Talk', place='Prague', presenter=self.gamma,
+                                      page_from='AA12')
+        Author.objects.create(article=talk, person=self.gamma, order=1)
+
+    def _render_tag(self, article):
+        return Template('{% load article %}{% citation article %}').render(Context({'article': article}))
+
+    def test_identical_output(self):
+        articles = Article.objects.order_by('pk')
+        expected = [self._render_tag(a) for a in articles]
+        self.assertEqual(list(render_citations(prefetch_citations(articles))), expected)
+        self.assertIn('Tester A.B.,', expected[0])
+
+    def test_identical_output_oppo(self):
+        articles = Article.objects.order_by('pk')
+        expected = [render_to_string('oppo/people/citation.html', get_citation_context(a)) for a in articles]
+        self.assertEqual(list(render_citations(prefetch_citations(articles), 'oppo/people/citation.html')),
+                         expected)
+        self.assertIn('A.B. Tester,', expected[0])
+
+    def test_constant_queries(self):
+        # Articles, authors
+        with self.assertNumQueries(2):
+            list(render_citations(prefetch_citations(Article.objects.all())))
+        for i in range(5):
+            article = Article.objects.create(type='ARTICLE', year=2010, title='Article %d' % i)
+            Author.objects.create(article=article, person=self.alpha, order=1)
+            Author.objects.create(article=article, person=self.gamma, order=2)
+        with self.assertNumQueries(2):
+            list(render_citations(prefetch_citations(Article.objects.all())))
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestStoredCitations(TestCase):
+    """
+    Test citations stored in `Citation` model.
+    """
+    def setUp(self):
+        self.person = Person.objects.create(first_name='Alpha', last_name='Tester')
+        self.article = Article.objects.create(type='ARTICLE', year=2013, title='First article')
+        Author.objects.create(article=self.article, person=self.person, order=1)
+
+    def _get_html(self, template='people/citation.html', language='en'):
+        return Citation.objects.get(article=self.article, template=template, language=language).html
+
+    def test_stored(self):
+        self.assertEqual(Citation.objects.filter(article=self.article).count(), len(CITATION_TEMPLATES) * 2)
+        for template in CITATION_TEMPLATES:
+            self.assertEqual(self._get_html(template),
+                             render_to_string(template, get_citation_context(self.article)))
+
+    def test_article_change(self):
+        self.article.title = 'Changed title'
+        self.article.save()
+        self.assertIn('Changed title', self._get_html())
+
+    def test_author_change(self):
+        Author.objects.create(article=self.article, person=Person.objects.create(first_name='B', last_name='Other'),
+                              order=2)
+        self.assertIn('Other B.', self._get_html())
+
+    def test_author_delete(self):
+        self.article.author_set.all().delete()
+        self.assertFalse(Citation.objects.filter(article=self.article).exists())
+        # Citation is rendered again when requested
+        self.assertNotIn('Tester', attach_citations([self.article])[0].citation_html)
+
+    def test_person_rename(self):
+        self.person.last_name = 'Renamed'
+        self.person.save()
+        self.assertIn('Renamed A.', self._get_html())
+
+    def test_attach_citations(self):
+        # Articles, citations
+        with self.assertNumQueries(2):
+            article = attach_citations(Article.objects.all())[0]
+        self.assertEqual(article.citation_html, self._get_html())
+        self.assertEqual(Template('{% load article %}{% citation article %}').render(Context({'article': article})),
+                         self._get_html())
+
+    def test_attach_missing(self):
+        # Missing citations are rendered, but not stored
+        Citation.objects.all().delete()
+        # Articles, citations, missing articles and their authors
+        with self.assertNumQueries(4):
+            article = attach_citations(Article.objects.all())[0]
+        self.assertEqual(article.citation_html, render_to_string('people/citation.html',
+                                                                 get_citation_context(self.article)))
+        self.assertFalse(Citation.objects.exists())
+
+    def test_rebuild_command(self):
+        Citation.objects.all().delete()
+        call_command('rebuild_citations', verbosity=0)
+        self.assertEqual(Citation.objects.filter(article=self.article).count(), len(CITATION_TEMPLATES) * 2)
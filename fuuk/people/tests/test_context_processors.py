@@ -0,0 +1,43 @@
+"""
+Tests of context processors.
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import translation
+
+from fuuk.people.context_processors import news_list
+from fuuk.people.models import News
+
+
+class TestNewsList(TestCase):
+    """
+    Test `news_list` context processor.
+    """
+    def setUp(self):
+        cache.clear()
+        today = date.today()
+        News.objects.create(start=today, end=today, title_en='Current', title_cs='Aktualni', content='Content')
+        News.objects.create(start=today - timedelta(days=2), end=today - timedelta(days=1), title='Old',
+                            content='Content')
+        self.request = RequestFactory().get('/')
+
+    def test_lazy(self):
+        with self.assertNumQueries(0):
+            news_list(self.request)
+
+    def test_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual([n.title for n in news_list(self.request)['news_list']], ['Current'])
+        with self.assertNumQueries(0):
+            news = news_list(self.request)['news_list']
+            with translation.override('cs'):
+                self.assertEqual([n.title for n in news], ['Aktualni'])
+
+    def test_changed(self):
+        self.assertEqual(len(news_list(self.request)['news_list']), 1)
+        News.objects.create(start=date.today(), end=date.today(), title='New', content='Content')
+        self.assertEqual(len(news_list(self.request)['news_list']), 2)
+        News.objects.filter(title_en='New').get().delete()
+        self.assertEqual(len(news_list(self.request)['news_list']), 1)
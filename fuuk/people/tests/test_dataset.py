@@ -0,0 +1,77 @@
+"""
+Tests of the synthetic dataset generator.
+"""
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+
+from fuuk.fuflatpages.routing import routes
+from fuuk.people.dataset import DatasetGenerator
+from fuuk.people.models import Agency, Article, Author, Course, Department, Grant, Human, Person, Place, Thesis
+
+SIZES = {'people': 30, 'external': 20, 'articles': 60, 'authors': 6, 'theses': 10, 'grants': 5, 'courses': 5}
+
+
+class Rollback(Exception):
+    pass
+
+
+def _get_snapshot():
+    return (list(Person.objects.order_by('pk').values_list('first_name', 'last_name', 'type', 'class_year',
+                                                           'is_active', 'advisor__last_name')),
+            list(Article.objects.order_by('pk').values_list('type', 'year', 'title', 'identification', 'volume',
+                                                            'page_from', 'presenter__last_name')),
+            list(Author.objects.order_by('article', 'order').values_list('article__title', 'person__last_name',
+                                                                         'person__first_name')),
+            list(Thesis.objects.order_by('pk').values_list('type', 'year', 'title_cs', 'author__last_name')))
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestDatasetGenerator(TestCase):
+    """
+    Test `DatasetGenerator` class.
+    """
+    def test_valid(self):
+        counts = DatasetGenerator(seed=1, **SIZES).generate()
+        self.assertEqual(counts['articles'], 60)
+        self.assertEqual(counts['authors'], 360)
+        self.assertEqual(Author.objects.count(), 360)
+        for model in (Agency, Article, Course, Department, Grant, Human, Person, Place, Thesis):
+            for obj in model.objects.all():
+                obj.full_clean()
+        for human in Human.objects.all():
+            self.assertTrue(human.cv_html_en and human.cv_html_cs)
+        for thesis in Thesis.objects.all():
+            self.assertTrue(thesis.title_en and thesis.title_cs)
+        for article in Article.objects.filter(type__in=('TALK', 'INVITED', 'POSTER')):
+            self.assertTrue(article.author_set.filter(person=article.presenter_id).exists())
+        self.assertEqual(Human.objects.filter(person__is_active=True).count(), 30)
+
+    def test_deterministic(self):
+        try:
+            with transaction.atomic():
+                DatasetGenerator(seed=1, **SIZES).generate()
+                snapshot = _get_snapshot()
+                raise Rollback
+        except Rollback:
+            pass
+        DatasetGenerator(seed=1, **SIZES).generate()
+        self.assertEqual(_get_snapshot(), snapshot)
+
+    def test_routes(self):
+        routes.rebuild()
+        DatasetGenerator(seed=1, **SIZES).generate()
+        human = Human.objects.filter(person__is_active=True).first()
+        self.assertTrue(routes.is_redirected(human.nickname))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_dataset', people=5, external=5, articles=10, authors=3, theses=2, grants=1, courses=1,
+                     index=True, stdout=out)
+        self.assertIn('Articles: 10', out.getvalue())
+        self.assertEqual(Article.objects.exclude(citation=None).distinct().count(), 10)
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', verbosity=0)
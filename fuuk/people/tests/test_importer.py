@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the publication import.
+"""
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from fuuk.people.bibliography import export, parse_bibtex, parse_ris
+from fuuk.people.importer import AmbiguousName, ArticleImport, NameIndex
+from fuuk.people.models import Article, Author, Citation, Human, Person, SearchDocument
+
+BIBTEX = u"""
+@comment{Exported publications}
+@article{first,
+  author = {Tester, Ji{\\v r}{\\'\\i} and Gamma Author},
+  title = {{Spin} \\& charge},
+  journal = "Journal",
+  year = 2013,
+  volume = {12},
+  pages = {100--110},
+  doi = {10.1000/1},
+}
+@incollection{second,
+  author = {Author, G.},
+  title = {Chapter},
+  booktitle = {Book title},
+  publisher = {Publisher},
+  year = {2005},
+  pages = {7},
+  isbn = {978-80-1234-56-7},
+}
+"""
+
+RIS = u"""TY  - JOUR\r
+AU  - Tester, J.\r
+TI  - Magnetism\r
+JO  - Journal\r
+PY  - 2014/01/01\r
+VL  - 3\r
+SP  - 5\r
+EP  - 6\r
+ER  - \r
+TY  - CONF\r
+AU  - Unknown, Person\r
+TI  - Talk\r
+PY  - 2014\r
+ER  - \r
+"""
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestParsers(TestCase):
+    """
+    Test BibTeX and RIS parsers.
+    """
+    def test_bibtex(self):
+        first, second = parse_bibtex(BIBTEX)
+        self.assertEqual(first, {
+            'type': 'ARTICLE', 'title': u'Spin & charge', 'publication': u'Journal', 'year': 2013, 'volume': u'12',
+            'page_from': u'100', 'page_to': u'110', 'identification': u'10.1000/1',
+            'authors': [(u'Tester', u'Jiří'), (u'Author', u'Gamma')]})
+        self.assertEqual(second['type'], 'BOOK')
+        self.assertEqual(second['publishers'], 'Publisher')
+        self.assertEqual(second['page_to'], None)
+
+    def test_ris(self):
+        first, second = parse_ris(RIS)
+        self.assertEqual(first, {
+            'type': 'ARTICLE', 'title': u'Magnetism', 'publication': u'Journal', 'year': 2014, 'volume': u'3',
+            'page_from': u'5', 'page_to': u'6', 'identification': None, 'editors': None,
+            'authors': [(u'Tester', u'J.')]})
+        self.assertEqual(second['type'], 'TALK')
+
+    def test_round_trip(self):
+        person = Person.objects.create(first_name=u'Jiří', last_name=u'Tester')
+        article = Article.objects.create(type='ARTICLE', year=2013, title='Spin_charge', identification='10.1000/1_2',
+                                         publication='Journal', volume='12', page_from='100', page_to='110')
+        Author.objects.create(article=article, person=person, order=1)
+        for format, parser in (('bibtex', parse_bibtex), ('ris', parse_ris)):
+            entry, = parser(u''.join(export(Article.objects.all(), format)))
+            self.assertEqual(entry['title'], 'Spin_charge')
+            self.assertEqual(entry['identification'], '10.1000/1_2')
+            self.assertEqual(entry['authors'], [(u'Tester', u'Jiří')])
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestArticleImport(TestCase):
+    """
+    Test import of entries.
+    """
+    def setUp(self):
+        self.human = Human.objects.create(nickname='Tester')
+        self.tester = Person.objects.create(human=self.human, first_name=u'Jiří', last_name=u'Tester',
+                                            is_active=False)
+        self.tester_active = Person.objects.create(human=self.human, first_name=u'Jiří', last_name=u'Tester',
+                                                   type='STAFF')
+        self.gamma = Person.objects.create(first_name='Gamma', last_name='Author')
+
+    def test_name_index(self):
+        other = Person.objects.create(first_name='Jan', last_name='Tester')
+        index = NameIndex(Person.objects.all())
+        self.assertEqual(index.match(u'Tester', u'Jiří'), self.tester_active)
+        self.assertEqual(index.match(u'Tester', u'Jiri'), self.tester_active)
+        self.assertEqual(index.match(u'Tester', u'Jan'), other)
+        self.assertEqual(index.match(u'Author', u'G.'), self.gamma)
+        self.assertIsNone(index.match(u'Nobody', u'N.'))
+        with self.assertRaises(AmbiguousName):
+            index.match(u'Tester', u'J.')
+
+    def test_import(self):
+        Person.objects.create(first_name='Jan', last_name='Tester')
+        article_import = ArticleImport(list(parse_bibtex(BIBTEX)) + list(parse_ris(RIS)))
+        article_import.prepare()
+        self.assertEqual([a.title for a, authors in article_import.articles], ['Spin & charge', 'Chapter'])
+        self.assertEqual([reason for entry, reason in article_import.invalid],
+                         ['Ambiguous author Tester, J.'])
+        self.assertEqual(len(article_import.unmatched), 1)
+        self.assertEqual(dict(article_import.unmatched_names), {(u'Unknown', u'Person'): 1})
+        article_import.save()
+
+        article = Article.objects.get(title='Spin & charge')
+        self.assertEqual(list(article.author_set.order_by('order').values_list('person', flat=True)),
+                         [self.tester_active.pk, self.gamma.pk])
+        self.assertTrue(Citation.objects.filter(article=article).exists())
+        self.assertTrue(SearchDocument.objects.filter(object_id=article.pk, title='Spin & charge').exists())
+
+        # Import again
+        article_import = ArticleImport(parse_bibtex(BIBTEX))
+        article_import.prepare()
+        self.assertEqual(article_import.articles, [])
+        self.assertEqual([reason for entry, reason in article_import.duplicates],
+                         ['Duplicate identification 10.1000/1', 'Duplicate identification 978-80-1234-56-7'])
+
+    def test_create_persons(self):
+        article_import = ArticleImport(parse_ris(RIS), create_persons=True)
+        article_import.prepare()
+        article_import.save()
+        person = Person.objects.get(last_name='Unknown')
+        self.assertEqual(list(Article.objects.get(title='Talk').author_set.values_list('person', flat=True)),
+                         [person.pk])
+
+    def test_duplicate_authors(self):
+        entries = list(parse_bibtex(BIBTEX))
+        # Both names match the same person
+        entries[0]['authors'] = [(u'Tester', u'Jiří'), (u'Tester', u'Jiri')]
+        # Unmatched name would create the same person twice
+        entries[1]['authors'] = [(u'Unknown', u'Person'), (u'Author', u'Gamma'), (u'Unknown', u'Person')]
+        article_import = ArticleImport(entries, create_persons=True)
+        article_import.prepare()
+        self.assertEqual(article_import.articles, [])
+        self.assertEqual([reason for entry, reason in article_import.invalid],
+                         [u'Duplicate author Tester, Jiří; Tester, Jiri',
+                          u'Duplicate author Unknown, Person; Unknown, Person'])
+        self.assertEqual(dict(article_import.unmatched_names), {})
+
+    def test_invalid(self):
+        entries = list(parse_bibtex(BIBTEX))
+        del entries[0]['volume']
+        entries[1]['year'] = 1900
+        article_import = ArticleImport(entries + entries[:1])
+        article_import.prepare()
+        self.assertEqual(len(article_import.invalid), 3)
+        self.assertIn('Article has to have volume.', article_import.invalid[0][1])
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestImportCommand(TestCase):
+    """
+    Test `import_publications` command.
+    """
+    def setUp(self):
+        Person.objects.create(first_name=u'Jiří', last_name=u'Tester')
+        Person.objects.create(first_name='Gamma', last_name='Author')
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'articles.bib')
+        with open(self.filename, 'wb') as bib_file:
+            bib_file.write(BIBTEX.encode('utf-8'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('import_publications', self.filename, dry_run=True, stdout=out)
+        self.assertFalse(Article.objects.exists())
+        self.assertIn('Would import: 2', out.getvalue())
+
+    def test_import(self):
+        out = StringIO()
+        call_command('import_publications', self.filename, stdout=out)
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertIn('Imported: 2', out.getvalue())
+        out = StringIO()
+        call_command('import_publications', self.filename, stdout=out)
+        self.assertIn('Duplicates: 2', out.getvalue())
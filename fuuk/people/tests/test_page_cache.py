@@ -0,0 +1,146 @@
+"""
+Tests of person page cache.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from fuuk.people import page_cache
+from fuuk.people.models import Agency, Article, Author, Course, Grant, Human, Person, Thesis
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestPersonPageCache(TestCase):
+    """
+    Test caching of person pages.
+    """
+    def setUp(self):
+        cache.clear()
+        # Keys of cached pages
+        self.keys = {}
+        self.human = Human.objects.create(nickname='Person_test')
+        self.person = Person.objects.create(type='STAFF', first_name='Test', last_name='Person', human=self.human)
+        other = Human.objects.create(nickname='Other_test')
+        self.other = Person.objects.create(type='STAFF', first_name='Other', last_name='Person', human=other)
+
+    def _get_key(self, nickname, view_name, language='en'):
+        modified = Human.objects.filter(nickname=nickname).values_list('modified', flat=True).first()
+        return page_cache.get_page_key(nickname, modified, view_name, language)
+
+    def _assert_cached(self, url, view_name, nickname='Person_test'):
+        self.client.get(url)
+        key = self._get_key(nickname, view_name)
+        self.assertIsNotNone(cache.get(key))
+        self.keys[nickname, view_name] = key
+
+    def _assert_evicted(self, view_name, nickname='Person_test'):
+        key = self.keys[nickname, view_name]
+        self.assertIsNone(cache.get(key))
+        # Page cached by another process is not read
+        self.assertNotEqual(self._get_key(nickname, view_name), key)
+
+    def test_hit(self):
+        page_cache.reset_stats()
+        response = self.client.get('/people/person/Person_test/')
+        # Validator
+        with self.assertNumQueries(1):
+            cached = self.client.get('/people/person/Person_test/')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(page_cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_not_found(self):
+        page_cache.reset_stats()
+        self.client.get('/people/person/Unknown/')
+        self.assertEqual(page_cache.get_stats(), {'hits': 0, 'misses': 0})
+
+    def test_language(self):
+        self.client.get('/people/person/Person_test/', HTTP_ACCEPT_LANGUAGE='cs')
+        self.assertIsNotNone(cache.get(self._get_key('Person_test', 'person_detail', 'cs')))
+        self.assertIsNone(cache.get(self._get_key('Person_test', 'person_detail', 'en')))
+
+    def test_modified_elsewhere(self):
+        # Another process updated the modification time, but evicted the page only from its own cache
+        response = self.client.get('/people/person/Person_test/')
+        Person.objects.filter(pk=self.person.pk).update(first_name='Changed')
+        Human.objects.filter(pk=self.human.pk).update(modified=timezone.now())
+        page_cache.reset_stats()
+        changed = self.client.get('/people/person/Person_test/')
+        self.assertEqual(page_cache.get_stats(), {'hits': 0, 'misses': 1})
+        self.assertNotEqual(changed.content, response.content)
+
+    def test_human(self):
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        self.human.subtitle = 'Changed'
+        with CaptureQueriesContext(connection) as context:
+            self.human.save()
+        # Modification time is changed by the save only
+        self.assertEqual(len([query for query in context.captured_queries
+                              if 'UPDATE "people_human"' in query['sql']]), 1)
+        self.assertNotEqual(self._get_key('Person_test', 'person_detail'), self.keys['Person_test', 'person_detail'])
+        self.assertContains(self.client.get('/people/person/Person_test/'), 'Changed')
+
+    def test_human_update_fields(self):
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        self.human.subtitle = 'Changed'
+        self.human.save(update_fields=['subtitle'])
+        self._assert_evicted('person_detail')
+
+    def test_person(self):
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        self._assert_cached('/people/person/Other_test/', 'person_detail', 'Other_test')
+        self.person.first_name = 'Changed'
+        self.person.save()
+        self._assert_evicted('person_detail')
+        # Other pages are kept
+        self.assertIsNotNone(cache.get(self._get_key('Other_test', 'person_detail')))
+
+    def test_author(self):
+        article = Article.objects.create(type='ARTICLE', year=2013, title='Article')
+        Author.objects.create(article=article, person=self.other, order=1)
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        self._assert_cached('/people/person/Other_test/papers/', 'person_articles', 'Other_test')
+        Author.objects.create(article=article, person=self.person, order=2)
+        self._assert_evicted('person_detail')
+        self._assert_evicted('person_articles', 'Other_test')
+
+    def test_co_author_rename(self):
+        article = Article.objects.create(type='ARTICLE', year=2013, title='Article')
+        Author.objects.create(article=article, person=self.other, order=1)
+        Author.objects.create(article=article, person=self.person, order=2)
+        self._assert_cached('/people/person/Person_test/papers/', 'person_articles')
+        self.other.last_name = 'Renamed'
+        self.other.save()
+        self._assert_evicted('person_articles')
+
+    def test_grant(self):
+        agency = Agency.objects.create(name="GA", shortcut="GA")
+        grant = Grant.objects.create(start=2000, end=2001, agency=agency, number='1', author=self.other,
+                                     title='Grant', annotation='Annotation')
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        grant.co_authors.add(self.person)
+        self._assert_evicted('person_detail')
+        self._assert_cached('/people/person/Person_test/grants/', 'person_grants')
+        grant.delete()
+        self._assert_evicted('person_grants')
+
+    def test_course(self):
+        course = Course.objects.create(name='Course', code='AA001')
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        course.practical_lectors.add(self.person)
+        self._assert_evicted('person_detail')
+        self._assert_cached('/people/person/Person_test/courses/', 'person_courses')
+        course.name = 'Changed'
+        course.save()
+        self._assert_evicted('person_courses')
+
+    def test_student(self):
+        human = Human.objects.create(nickname='Student_test')
+        self._assert_cached('/people/person/Person_test/', 'person_detail')
+        student = Person.objects.create(type='BC', first_name='Test', last_name='Student', human=human,
+                                        advisor=self.person, class_year=1)
+        self._assert_evicted('person_detail')
+        self._assert_cached('/people/person/Person_test/students/', 'person_students')
+        Thesis.objects.create(type='BC', author=student, title='Thesis', year=2000)
+        self._assert_evicted('person_students')
@@ -0,0 +1,95 @@
+"""
+Tests of the academic year rollover of students.
+"""
+from datetime import date
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+
+from fuuk.people.models import ClassYearRollover, Human, Person, Thesis
+from fuuk.people.rollover import get_academic_year, Rollover
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestRollover(TestCase):
+    """
+    Test `Rollover` class.
+    """
+    def setUp(self):
+        self.student = Person.objects.create(type='PHD', first_name='Phd', last_name='Student', class_year=2,
+                                             human=Human.objects.create(nickname='Phd_test'))
+        self.graduate = Person.objects.create(type='MGR', first_name='Mgr', last_name='Graduate', class_year=2,
+                                              human=Human.objects.create(nickname='Mgr_test'))
+        Thesis.objects.create(type='MGR', year=2015, author=self.graduate, title='Thesis', defended=True)
+        # Defended thesis of a previous study
+        Thesis.objects.create(type='BC', year=2013, author=self.student, title='Old thesis', defended=True)
+        self.inactive = Person.objects.create(type='BC', first_name='Bc', last_name='Student', class_year=3,
+                                              is_active=False)
+
+    def _get_person(self, person):
+        return Person.objects.get(pk=person.pk)
+
+    def test_academic_year(self):
+        self.assertEqual(get_academic_year(date(2015, 8, 31)), 2014)
+        self.assertEqual(get_academic_year(date(2015, 9, 1)), 2015)
+
+    def test_apply(self):
+        rollover = Rollover(2015)
+        self.assertTrue(rollover.apply())
+        self.assertEqual(rollover.promoted, 1)
+        self.assertEqual(self._get_person(self.student).class_year, 3)
+        self.assertEqual(self._get_person(self.inactive).class_year, 3)
+        graduate = self._get_person(self.graduate)
+        self.assertFalse(graduate.is_active)
+        self.assertEqual(graduate.class_year, 2)
+        new = Person.objects.get(human=self.graduate.human, type='GRAD')
+        self.assertTrue(new.is_active)
+        self.assertEqual((new.first_name, new.last_name), ('Mgr', 'Graduate'))
+        self.assertTrue(ClassYearRollover.objects.filter(year=2015).exists())
+
+    def test_idempotent(self):
+        Rollover(2015).apply()
+        rollover = Rollover(2015)
+        self.assertFalse(rollover.apply())
+        self.assertTrue(rollover.applied)
+        self.assertFalse(Rollover(2014).apply())
+        self.assertEqual(self._get_person(self.student).class_year, 3)
+        self.assertEqual(Person.objects.filter(type='GRAD').count(), 1)
+
+    def test_continuing(self):
+        # Graduate already continues as a PhD. student
+        self.graduate.is_active = False
+        self.graduate.save()
+        phd = Person.objects.create(type='PHD', first_name='Mgr', last_name='Graduate', class_year=1,
+                                    human=self.graduate.human)
+        self.graduate.is_active = True
+        self.graduate.save()
+        Rollover(2015).apply()
+        self.assertFalse(Person.objects.filter(type='GRAD').exists())
+        self.assertEqual(self._get_person(phd).class_year, 2)
+
+    def test_reactivate(self):
+        old = Person.objects.create(type='GRAD', first_name='Mgr', last_name='Graduate', human=self.graduate.human,
+                                    is_active=False)
+        rollover = Rollover(2015)
+        rollover.apply()
+        self.assertEqual(rollover.reactivated, [old])
+        self.assertTrue(self._get_person(old).is_active)
+        self.assertEqual(Person.objects.filter(type='GRAD').count(), 1)
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('update_students', year=2015, dry_run=True, stdout=out)
+        self.assertIn('Promoted students: 1', out.getvalue())
+        self.assertIn('Graduate Mgr', out.getvalue())
+        self.assertEqual(self._get_person(self.student).class_year, 2)
+        self.assertFalse(ClassYearRollover.objects.exists())
+
+    def test_command(self):
+        call_command('update_students', year=2015, verbosity=0)
+        out = StringIO()
+        call_command('update_students', year=2015, stdout=out)
+        self.assertIn('already applied', out.getvalue())
+        self.assertEqual(self._get_person(self.student).class_year, 3)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the full-text search.
+"""
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+
+from fuuk.people.models import Article, Course, Human, Person, SearchDocument, SearchTerm, Thesis
+from fuuk.people.search import get_terms, search
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestSearch(TestCase):
+    """
+    Test search index and the search view.
+    """
+    def setUp(self):
+        self.human = Human.objects.create(nickname='Tester')
+        self.person = Person.objects.create(human=self.human, first_name=u'Jiří', last_name='Tester', type='STAFF')
+        self.article = Article.objects.create(type='ARTICLE', year=2013, title='Magnetic properties of uranium',
+                                              publication='Physical Review')
+        self.thesis = Thesis.objects.create(type='MGR', year=2014, author=self.person, title_en='Magnetism in alloys',
+                                            title_cs=u'Magnetismus slitin', keywords_en='uranium, magnetism')
+        self.course = Course.objects.create(code='NFPL001', name_en='Magnetism', name_cs='Magnetismus')
+
+    def _search(self, query):
+        return [(document.content_type.model_class(), document.object_id) for document in search(query)]
+
+    def test_get_terms(self):
+        self.assertEqual(get_terms(u'Jiří Příliš-žluťoučký a kůň'), [u'jiri', u'prilis', u'zlutoucky', u'kun'])
+        self.assertEqual(get_terms(None), [])
+
+    def test_search(self):
+        self.assertEqual(self._search('uranium'), [(Article, self.article.pk), (Thesis, self.thesis.pk)])
+        self.assertEqual(self._search('magnetism'), [(Thesis, self.thesis.pk), (Course, self.course.pk)])
+        self.assertEqual(self._search('URANIUM magnetic'), [(Article, self.article.pk)])
+        self.assertEqual(self._search(u'slitin'), [(Thesis, self.thesis.pk)])
+        self.assertEqual(self._search(u'jiri'), [(Person, self.person.pk)])
+        self.assertEqual(self._search('unknown'), [])
+        self.assertEqual(self._search(''), [])
+        with self.assertNumQueries(1):
+            search('uranium magnetic')
+
+    def test_update(self):
+        self.article.title = 'Other title'
+        self.article.save()
+        self.assertEqual(self._search('magnetic'), [])
+        self.assertEqual(self._search('other'), [(Article, self.article.pk)])
+        self.human.nickname = 'Renamed'
+        self.human.save()
+        self.assertEqual(SearchDocument.objects.get(object_id=self.person.pk, url__contains='person').url,
+                         '/people/person/Renamed/')
+        self.course.delete()
+        self.assertEqual(self._search('magnetism'), [(Thesis, self.thesis.pk)])
+
+    def test_rebuild_command(self):
+        terms = set(SearchTerm.objects.values_list('term', 'weight'))
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Search index of 1 theses rebuilt', out.getvalue())
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.assertEqual(set(SearchTerm.objects.values_list('term', 'weight')), terms)
+
+    def test_view(self):
+        response = self.client.get('/people/search/', {'q': 'magnetism'})
+        self.assertContains(response, '<a href="/people/thesis/id=%d/"><strong>Magnetism in alloys</strong></a>'
+                            % self.thesis.pk, html=True)
+        self.assertContains(response, 'Magnetism</strong>')
+        response = self.client.get('/people/search/', {'q': 'unknown'})
+        self.assertContains(response, 'No results found.')
@@ -2,9 +2,12 @@
 '''
 Unittests for utils.
 '''
-from django.test import SimpleTestCase
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from mock import patch
 
-from fuuk.people.utils import full_name, sanitize_filename
+from fuuk.people.models import Agency
+from fuuk.people.utils import bulk_create, full_name, sanitize_filename
 
 
 class TestSanitizeFilename(SimpleTestCase):
@@ -44,3 +47,25 @@ class TestFullName(SimpleTestCase):
                          'Prof. Mgr. et Bc. Pepa Jahoda')
         self.assertEqual(full_name('', 'Pepa', 'Jahoda', None),
                          'Pepa Jahoda')
+
+
+class TestBulkCreate(TestCase):
+    """
+    Test `bulk_create` function.
+    """
+    def test_bulk_create(self):
+        Agency.objects.create(shortcut='GA', name='First')
+        agencies = [Agency(shortcut='GB', name='Second'), Agency(shortcut='GC', name='Third')]
+        with transaction.atomic():
+            bulk_create(Agency, iter(agencies))
+        self.assertEqual([Agency.objects.get(pk=agency.pk).name for agency in agencies], ['Second', 'Third'])
+
+    def test_concurrent(self):
+        def create(objs, **kwargs):
+            Agency.objects.create(shortcut='GX', name='Concurrent')
+            return original(objs, **kwargs)
+
+        original = Agency.objects.bulk_create
+        with patch.object(Agency.objects, 'bulk_create', side_effect=create):
+            with self.assertRaises(RuntimeError):
+                bulk_create(Agency, [Agency(shortcut='GA', name='First')])
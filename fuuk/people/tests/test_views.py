@@ -3,19 +3,36 @@
 Unittests for views
 """
 import datetime
-import os
+from datetime import date
+from shutil import rmtree
+from tempfile import mkdtemp
 
-from django.core.files import File
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.test import TestCase
 from django.test.utils import override_settings
 from mock import Mock, patch
 
-from fuuk.people.models import Agency, Article, Attachment, Author, Course, Grant, Human, Person, Thesis
+from fuuk.people.models import (Agency, Article, Attachment, Author, Citation, Course, Grant, Human, Person, Place,
+                                Thesis)
+
+
+def use_temporary_storage(test):
+    """
+    Stores attachments uploaded by the test in a temporary directory.
+    """
+    tmp_dir = mkdtemp(prefix='fuuk_tests_')
+    test.addCleanup(rmtree, tmp_dir)
+    storage_patcher = patch.object(Attachment._meta.get_field('file'), 'storage', FileSystemStorage(tmp_dir))
+    test.addCleanup(storage_patcher.stop)
+    storage_patcher.start()
 
 
 @override_settings(LANGUAGE_CODE='en')
 class TestArticleList(TestCase):
     def setUp(self):
+        cache.clear()
         Article.objects.create(title='Perpetum mobile still running', type="ARTICLE", year="2013")
         Article.objects.create(title='White holes: Theory and observation', type="BOOK", year="2005")
         Article.objects.create(title='New type of black hole discovered', type="ARTICLE", year="2005")
@@ -43,7 +60,48 @@ class TestArticleList(TestCase):
                                   '<Article: White holes: Theory and observation>'])
 
     def test_1999(self):
-        response = self.client.get('/people/articles/1999/')
+        # Year missing in the facet is checked in the database
+        with self.assertNumQueries(1):
+            response = self.client.get('/people/articles/1999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_queries(self):
+        # Validator, articles, citations
+        with self.assertNumQueries(3):
+            self.client.get('/people/articles/')
+
+    def test_years_changed(self):
+        Article.objects.create(title='Future article', type="ARTICLE", year="2020")
+        Article.objects.get(year=2003).delete()
+        response = self.client.get('/people/articles/')
+        self.assertEqual(response.context['year'], 2020)
+        self.assertEqual(response.context['years'], [2020, 2013, 2005])
+
+    def test_year_added_elsewhere(self):
+        # Facet is not rebuilt without signals, e.g. in another process
+        self.client.get('/people/articles/')
+        Article.objects.bulk_create([Article(title='Future article', type='ARTICLE', year=2020)])
+        response = self.client.get('/people/articles/2020/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['years'], [2020, 2013, 2005, 2003])
+
+    @patch('fuuk.people.views.ArticleList.paginate_by', 2)
+    def test_pagination(self):
+        response = self.client.get('/people/articles/2005/')
+        self.assertTrue(response.context['is_paginated'])
+        self.assertQuerysetEqual(response.context['object_list'],
+                                 ['<Article: New type of black hole discovered>',
+                                  '<Article: Report on a new warpdrive prototype>'])
+        next_cursor = response.context['next_cursor']
+        self.assertContains(response, '?after=2%3A')
+
+        response = self.client.get('/people/articles/2005/', {'after': next_cursor})
+        self.assertQuerysetEqual(response.context['object_list'], ['<Article: White holes: Theory and observation>'])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertContains(response, '3.')
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/people/articles/2005/', {'after': 'invalid'})
         self.assertEqual(response.status_code, 404)
 
 
@@ -117,6 +175,7 @@ class TestGrantDetail(TestCase):
 @override_settings(LANGUAGE_CODE='en')
 class TestThesesList(TestCase):
     def setUp(self):
+        cache.clear()
         # Prepare an author
         person = Person.objects.create(first_name="Test", last_name="Person")
         Thesis.objects.create(title='Theoretical calculations of white holes', type='BC', year=2001, author=person,
@@ -148,6 +207,42 @@ class TestThesesList(TestCase):
         self.assertContains(response, 'Defended bachelor theses', count=1)
         self.assertQuerysetEqual(response.context['object_list'], ['<Thesis: Theoretical calculations of white holes>'])
 
+    def test_type_year(self):
+        response = self.client.get('/people/theses/?type=MGR&year=2002')
+        self.assertQuerysetEqual(response.context['object_list'], ['<Thesis: Jumpgates limitations>'])
+
+    def test_no_results(self):
+        # Filters missing in the index are checked in the database
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/people/theses/?type=BC&year=2002').status_code, 404)
+            self.assertEqual(self.client.get('/people/theses/?year=2003').status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/people/theses/?year=invalid').status_code, 404)
+
+    def test_queries(self):
+        with self.assertNumQueries(0):
+            self.client.get('/people/theses/')
+        # Theses with authors and advisors
+        with self.assertNumQueries(1):
+            self.client.get('/people/theses/?year=2002')
+
+    def test_index_changed(self):
+        thesis = Thesis.objects.get(type='RNDR')
+        thesis.defended = True
+        thesis.save()
+        Thesis.objects.filter(type='BC').delete()
+        response = self.client.get('/people/theses/')
+        self.assertEqual([t for t, verbose in response.context['types']], ['RNDR', 'PHD', 'MGR'])
+        self.assertEqual(response.context['years'], [2003, 2002])
+
+    def test_index_changed_elsewhere(self):
+        # Index is not rebuilt without signals, e.g. in another process
+        self.client.get('/people/theses/')
+        Thesis.objects.filter(type='RNDR').update(defended=True)
+        response = self.client.get('/people/theses/?type=rndr')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('RNDR', [t for t, verbose in response.context['types']])
+
 
 @override_settings(LANGUAGE_CODE='en')
 class TestThesisDetail(TestCase):
@@ -187,8 +282,8 @@ class TestDownloadList(TestCase):
     def setUp(self):
         course = Course.objects.create(name='Course with attachment', code='AA001')
         Course.objects.create(name='Course without attachment', code='AA002')
-        a_file = open(os.path.join(os.path.dirname(__file__), 'test_views.py'))
-        Attachment.objects.create(course=course, title='The attachment', file=File(a_file))
+        use_temporary_storage(self)
+        Attachment.objects.create(course=course, title='The attachment', file=ContentFile('content', 'attachment.txt'))
 
     def test_basic(self):
         response = self.client.get('/people/downloads/')
@@ -329,8 +424,9 @@ class TestPeopleList(TestCase):
 @override_settings(LANGUAGE_CODE='en')
 class TestPersonalPages(TestCase):
     def setUp(self):
+        cache.clear()
         # Testing person
-        H1 = Human.objects.create(nickname='Person_test')
+        H1 = Human.objects.create(nickname='Person_test', cv='### Curriculum ###')
         P1 = Person.objects.create(type='STAFF', first_name='Test', last_name='Person', human=H1)
         # Inactive version of previous
         Person.objects.create(type='PHD', first_name='Test', last_name='Person', human=H1, is_active=False)
@@ -395,6 +491,7 @@ class TestPersonalPages(TestCase):
         self.assertContains(response, 'Finished MGR', count=1)
         self.assertQuerysetEqual(response.context['theses'], ['<Thesis: Finished MGR>', '<Thesis: Finished BC>'])
         self.assertQuerysetEqual(response.context['theses_ongoing'], ['<Thesis: Ongoing PHD>'])
+        self.assertContains(response, '<h3>Curriculum</h3>', count=1)
 
     def test_articles(self):
         response = self.client.get('/people/person/Person_test/papers/')
@@ -432,6 +529,26 @@ class TestPersonalPages(TestCase):
         self.assertContains(response, 'Testing grant', count=1)
         self.assertNotContains(response, 'False grant')
 
+    def test_menu(self):
+        response = self.client.get('/people/person/Person_test/')
+        self.assertContains(response, '/people/person/Person_test/papers/')
+        self.assertContains(response, '/people/person/Person_test/students/')
+        self.assertContains(response, '/people/person/Person_test/courses/')
+        self.assertContains(response, '/people/person/Person_test/grants/')
+        response = self.client.get('/people/person/Student_test/')
+        self.assertNotContains(response, '/people/person/Student_test/papers/')
+        self.assertNotContains(response, '/people/person/Student_test/grants/')
+
+    def test_detail_queries(self):
+        # Validator, human, persons, places, theses and 4 menu flags
+        with self.assertNumQueries(9):
+            self.client.get('/people/person/Person_test/')
+
+    def test_articles_queries(self):
+        # Validator, human, persons, places, publications, citations and 3 menu flags
+        with self.assertNumQueries(9):
+            self.client.get('/people/person/Person_test/papers/')
+
     def test_grants_coauthor(self):
         # New testing person
         H3 = Human.objects.create(nickname='Person3_test')
@@ -442,8 +559,148 @@ class TestPersonalPages(TestCase):
         self.assertContains(response, 'Testing grant', count=1)
 
 
+@override_settings(LANGUAGE_CODE='en')
+class TestPapers(TestCase):
+    def setUp(self):
+        Article.objects.create(title='Perpetum mobile still running', type="ARTICLE", year="2013")
+        Article.objects.create(title='Black hole types', type="POSTER", year="2002")
+
+    def test_basic(self):
+        response = self.client.get('/people/papers/')
+        self.assertTrue(response.streaming)
+        self.assertContains(response, 'Perpetum mobile still running', count=1)
+        self.assertNotContains(response, 'Black hole types')
+
+    @patch('fuuk.people.views.Papers.chunk_size', 2)
+    def test_chunks(self):
+        Article.objects.create(title='Older article', type="ARTICLE", year="2005")
+        Article.objects.create(title='Second older article', type="ARTICLE", year="2005")
+        Article.objects.create(title='Oldest book', type="BOOK", year="2000")
+        response = self.client.get('/people/papers/')
+        content = b''.join(response.streaming_content)
+        titles = ['Perpetum mobile still running', 'Older article', 'Second older article', 'Oldest book']
+        positions = [content.index(t) for t in titles]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_language(self):
+        Citation.objects.filter(language='cs', template='people/citation.html').update(html='Czech citation')
+        response = self.client.get('/people/papers/', HTTP_ACCEPT_LANGUAGE='cs')
+        self.assertIn('Czech citation', b''.join(response.streaming_content))
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestListQueries(TestCase):
+    """
+    Test list pages are rendered in a constant number of queries.
+    """
+    def setUp(self):
+        self.agency = Agency.objects.create(name="GA", shortcut="GA")
+        use_temporary_storage(self)
+        self.add_rows(0)
+
+    def add_rows(self, index):
+        place = Place.objects.create(name='Room %d' % index, phone='+420 221 911 %03d' % index)
+        for type, is_active in (('STAFF', True), ('MGR', True), ('BC', True), ('STUDENT', True), ('STAFF', False)):
+            nickname = 'Person_%s_%s_%d' % (type, is_active, index)
+            person = Person.objects.create(type=type, first_name='Test', last_name=nickname, is_active=is_active,
+                                           human=Human.objects.create(nickname=nickname, subtitle='Subtitle'))
+            person.place.add(place)
+        course = Course.objects.create(name='Course %d' % index, code='AA%03d' % index)
+        course.lectors.add(person)
+        Attachment.objects.create(course=course, title='The attachment', file=ContentFile('content', 'attachment.txt'))
+        for end in (date.today().year, date.today().year - 1):
+            Grant.objects.create(title='Grant', start="2000", end=end, number="%d-%d" % (index, end), author=person,
+                                 agency=self.agency, annotation="An annotation")
+
+    def assertConstantQueries(self, url, num):
+        with self.assertNumQueries(num):
+            self.client.get(url)
+        self.add_rows(1)
+        with self.assertNumQueries(num):
+            self.client.get(url)
+
+    def test_people(self):
+        # Persons, places
+        self.assertConstantQueries('/people/staff/', 2)
+
+    def test_students(self):
+        # Persons by type
+        self.assertConstantQueries('/people/students/', 3)
+
+    def test_retired(self):
+        # Persons, places
+        self.assertConstantQueries('/people/retired/', 2)
+
+    def test_courses(self):
+        # Courses, lectors
+        self.assertConstantQueries('/people/courses/', 2)
+
+    def test_downloads(self):
+        # Courses, attachments, lectors
+        self.assertConstantQueries('/people/downloads/', 3)
+
+    def test_grants(self):
+        # Current and finished grants
+        self.assertConstantQueries('/people/grants/', 2)
+
+
+@override_settings(LANGUAGE_CODE='en')
+class TestConditionalRequests(TestCase):
+    """
+    Test responses to conditional requests.
+    """
+    def setUp(self):
+        cache.clear()
+        human = Human.objects.create(nickname='Person_test')
+        self.person = Person.objects.create(type='STAFF', first_name='Test', last_name='Person', human=human)
+        self.article = Article.objects.create(title='Perpetum mobile still running', type="ARTICLE", year="2013")
+        Author.objects.create(article=self.article, person=self.person, order=1)
+
+    def assertNotModified(self, url, etag, num=1):
+        with self.assertNumQueries(num):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assertModified(self, url, etag, **extra):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **extra)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_articles(self):
+        etag = self.client.get('/people/articles/2013/')['ETag']
+        self.assertNotModified('/people/articles/2013/', etag)
+        # Language
+        self.assertModified('/people/articles/2013/', etag, HTTP_ACCEPT_LANGUAGE='cs')
+        # Author renamed
+        self.person.last_name = 'Renamed'
+        self.person.save()
+        etag = self.assertModified('/people/articles/2013/', etag)
+        # Year menu changed
+        Article.objects.create(title='Article', type="ARTICLE", year="2010")
+        etag = self.assertModified('/people/articles/2013/', etag)
+        self.assertNotModified('/people/articles/2013/', etag)
+
+    def test_papers(self):
+        etag = self.client.get('/people/papers/')['ETag']
+        self.assertNotModified('/people/papers/', etag)
+        Author.objects.filter(article=self.article).delete()
+        self.assertModified('/people/papers/', etag)
+
+    def test_person(self):
+        response = self.client.get('/people/person/Person_test/')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.assertNotModified('/people/person/Person_test/', etag)
+        self.assertModified('/people/person/Person_test/papers/', etag)
+        Course.objects.create(name='Course', code='AA001').lectors.add(self.person)
+        self.assertModified('/people/person/Person_test/', etag)
+
+
 @override_settings(LANGUAGE_CODE='en')
 class TestEmptyDatabase(TestCase):
+    def setUp(self):
+        cache.clear()
+
     def test_articles(self):
         # Should return 404
         response = self.client.get('/people/articles/')
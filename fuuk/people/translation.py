@@ -1,6 +1,6 @@
 from modeltranslation.translator import register, TranslationOptions
 
-from fuuk.people.models import Agency, Course, Department, Grant, Human, News, Place, Thesis
+from fuuk.people.models import Agency, Course, Department, Grant, Human, News, Place, SearchDocument, Thesis
 
 
 @register(News)
@@ -25,7 +25,7 @@ class CourseTranslationOptions(TranslationOptions):
 
 @register(Human)
 class HumanTranslationOptions(TranslationOptions):
-    fields = ('subtitle', 'cv', 'interests', 'stays')
+    fields = ('subtitle', 'cv', 'interests', 'stays', 'cv_html', 'interests_html', 'stays_html')
 
 
 @register(Thesis)
@@ -40,4 +40,9 @@ class AgencyTranslationOptions(TranslationOptions):
 
 @register(Grant)
 class GrantTranslationOptions(TranslationOptions):
-    fields = ('title', 'annotation')
+    fields = ('title', 'annotation', 'annotation_html')
+
+
+@register(SearchDocument)
+class SearchDocumentTranslationOptions(TranslationOptions):
+    fields = ('title', )
@@ -4,25 +4,34 @@ from django.views.generic.detail import DetailView
 from django.views.generic.list import ListView
 
 from .models import Course, Grant, Thesis
-from .views import (ArticleList, GrantList, Papers, PeopleList, PersonArticles, PersonCourses, PersonDetail,
-                    PersonGrants, PersonStudents, RetiredList, StudentList, ThesisList)
+from .views import (ArticleList, BibliographyExport, GrantList, Papers, PeopleList, PersonArticles, PersonCourses,
+                    PersonDetail, PersonGrants, PersonStudents, RetiredList, SearchView, StudentList, ThesisList)
 
-DOWNLOADS_VIEW = ListView.as_view(queryset=Course.objects.exclude(attachment__isnull=True),
-                                  template_name='people/download_list.html')
+# Formats of bibliography exports
+EXPORT_FORMAT = r'(?P<format>bibtex|ris|csl)'
+
+COURSES_VIEW = ListView.as_view(queryset=Course.objects.prefetch_related('lectors'))
+DOWNLOADS_VIEW = ListView.as_view(
+    queryset=Course.objects.exclude(attachment__isnull=True).prefetch_related('attachment_set', 'lectors'),
+    template_name='people/download_list.html')
 
 
 PEOPLE_URLPATTERNS = [
     # Global pages
     url(r'^articles/$', ArticleList.as_view(), name="articles"),
     url(r'^articles/(?P<year>[0-9]{4})/$', ArticleList.as_view(), name="articles"),
+    url(r'^articles/(?P<year>[0-9]{4})/export/%s/$' % EXPORT_FORMAT, BibliographyExport.as_view(),
+        name="bibliography"),
     url(r'^papers/$', Papers.as_view()),
+    url(r'^export/%s/$' % EXPORT_FORMAT, BibliographyExport.as_view(), name="bibliography"),
     # TODO: grants by years
     url(r'^grants/$', GrantList.as_view(), name="grants"),
     url(r'^grants/(?P<pk>\d+)/$', DetailView.as_view(model=Grant), name="grants"),
     url(r'^theses/$', ThesisList.as_view(), name="theses"),
     url(r'^thesis/id=(?P<pk>\d+)/$', DetailView.as_view(model=Thesis), name="theses_detail"),
-    url(r'^courses/$', ListView.as_view(model=Course), name="courses"),
+    url(r'^courses/$', COURSES_VIEW, name="courses"),
     url(r'^downloads/$', DOWNLOADS_VIEW, name="downloads"),
+    url(r'^search/$', SearchView.as_view(), name="search"),
     # Staff menu
     url(r'^phd/$', PeopleList.as_view(people_type='PHD', title=_('PhD. students')), name="phd_list"),
     url(r'^staff/$', PeopleList.as_view(people_type='STAFF', title=_('Academic staff')), name="staff_list"),
@@ -37,6 +46,8 @@ HUMAN_PATTERNS = [
     url(r'^(?P<slug>\w+)/$', PersonDetail.as_view(), name="person_detail"),
     url(r'^(?P<slug>\w+)/papers/$', PersonArticles.as_view(), name="person_articles"),
     url(r'^(?P<slug>\w+)/papers/first/$', PersonArticles.as_view(first=True), name="person_articles_first"),
+    url(r'^(?P<slug>\w+)/papers/export/%s/$' % EXPORT_FORMAT, BibliographyExport.as_view(),
+        name="person_bibliography"),
     url(r'^(?P<slug>\w+)/courses/$', PersonCourses.as_view(), name="person_courses"),
     url(r'^(?P<slug>\w+)/students/$', PersonStudents.as_view(), name="person_students"),
     url(r'^(?P<slug>\w+)/grants/$', PersonGrants.as_view(), name="person_grants"),
@@ -3,6 +3,8 @@ Common utils for people.
 '''
 import os
 
+from django.db import connections
+from django.db.models import Max
 from django.utils.encoding import force_text
 from django.utils.text import slugify
 
@@ -25,3 +27,54 @@ def full_name(prefix, first_name, last_name, suffix):
         first_name, last_name,
         suffix and u", %s" % suffix or u"",
     )
+
+
+# Number of values in a single query, SQLite limits number of query parameters
+QUERY_CHUNK_SIZE = 500
+
+
+def split_chunks(values, size=QUERY_CHUNK_SIZE):
+    '''Yields lists of at most `size` values.'''
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def bulk_insert(model, count, insert):
+    '''
+    Inserts `count` rows by `insert(pks)` and returns their primary keys in order of insertion.
+
+    On PostgreSQL the keys are reserved from the sequence of the table and `insert` has to insert the rows with them.
+    Elsewhere `pks` is None and the keys are assigned by the database. They are assumed to be consecutive above the
+    current maximum, which holds for SQLite and MySQL, and the rows are found by that. Rows inserted concurrently
+    by another writer are detected by their count. The function has to be called in a transaction.
+    '''
+    connection = connections[model.objects.db]
+    if connection.vendor == 'postgresql':
+        pks = []
+        if count:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                               [model._meta.db_table, model._meta.pk.column, count])
+                pks = [pk for pk, in cursor.fetchall()]
+            insert(pks)
+        return pks
+    last_pk = model.objects.aggregate(Max('pk'))['pk__max'] or 0
+    insert(None)
+    pks = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+    if len(pks) != count:
+        raise RuntimeError('%s were inserted concurrently.' % model._meta.verbose_name_plural)
+    return pks
+
+
+def bulk_create(model, objects):
+    '''Creates objects in bulk and sets their primary keys, see `bulk_insert`.'''
+    objects = list(objects)
+
+    def insert(pks):
+        for obj, pk in zip(objects, pks or ()):
+            obj.pk = pk
+        model.objects.bulk_create(objects)
+
+    for obj, pk in zip(objects, bulk_insert(model, len(objects), insert)):
+        obj.pk = pk
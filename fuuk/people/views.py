@@ -1,82 +1,160 @@
 # -*- coding: utf-8 -*-
 from datetime import date
 
-from django.db.models import Count
-from django.http import Http404
-from django.shortcuts import get_object_or_404
-from django.utils.translation import ugettext_lazy as _
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.translation import get_language, ugettext_lazy as _
+from django.views.generic.base import View
 from django.views.generic.detail import DetailView
 from django.views.generic.list import ListView
 
-from fuuk.people.models import Article, Course, Grant, Human, Person, Thesis
+from fuuk.common.views import ConditionalMixin, make_etag
+from fuuk.people import bibliography, facets, page_cache, search
+from fuuk.people.citations import attach_citations, get_chunks
+from fuuk.people.models import Article, Author, Grant, Human, Person, Thesis
+from fuuk.people.profiles import HumanProfile
 
 
-class ArticleList(ListView):
+class ArticleList(ConditionalMixin, ListView):
+    """
+    List of articles and books by year.
 
+    Years are taken from the cached facet. Articles of a year are paginated by a keyset over `(title, pk)`.
+    """
     paginate_by = 50
-    allow_empty = False
+    # Years without articles are not in the facet
+    allow_empty = True
+
+    def get_years(self):
+        if not hasattr(self, '_years'):
+            requested = int(self.kwargs['year']) if 'year' in self.kwargs else None
+            self._years = facets.get_article_years(requested)
+        return self._years
+
+    def get_year(self, years):
+        """
+        Returns the displayed year or raises `Http404`.
+        """
+        if 'year' in self.kwargs:
+            year = int(self.kwargs['year'])
+            if year not in dict(years):
+                raise Http404
+            return year
+        if not years:
+            raise Http404
+        return years[0][0]
 
-    def get_queryset(self):
-        queryset = Article.objects.filter(type__in=('ARTICLE', 'BOOK'))
-        self.years = queryset.values_list('year', flat=True).annotate(Count('year')).order_by('-year')
+    def get_validators(self):
+        years = self.get_years()
         try:
-            self.year = int(self.kwargs['year'])
-        except (ValueError, KeyError):
-            if self.years.exists():
-                self.year = self.years[0]
-            else:
+            year = self.get_year(years)
+        except Http404:
+            return None, None
+        modified = Article.objects.filter(type__in=facets.ARTICLE_LIST_TYPES, year=year).aggregate(Max('modified'))
+        return make_etag(years, year, modified['modified__max'], self.request.GET.get('after'), get_language()), None
+
+    def get_queryset(self):
+        years = self.get_years()
+        self.year = self.get_year(years)
+        self.years = [year for year, count in years]
+        return Article.objects.filter(type__in=facets.ARTICLE_LIST_TYPES, year=self.year).order_by('title', 'pk')
+
+    @staticmethod
+    def make_cursor(position, article):
+        # Cursor has format '<position>:<pk>:<title>' of the last article on the previous page
+        return '%d:%d:%s' % (position, article.pk, article.title)
+
+    @classmethod
+    def get_cursors(cls, year):
+        """
+        Returns cursors of all pages of the year except the first one.
+        """
+        articles = list(Article.objects.filter(type__in=facets.ARTICLE_LIST_TYPES, year=year).order_by('title', 'pk')
+                        .only('pk', 'title'))
+        return [cls.make_cursor(position, articles[position - 1])
+                for position in range(cls.paginate_by, len(articles), cls.paginate_by)]
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get('after')
+        self.position = 0
+        if cursor:
+            try:
+                position, pk, title = cursor.split(':', 2)
+                self.position, pk = int(position), int(pk)
+            except ValueError:
                 raise Http404
-        return queryset.filter(year=self.year).order_by('-year', 'title')
+            queryset = queryset.filter(Q(title__gt=title) | Q(title=title, pk__gt=pk))
+        # Load one more article to find out whether there is a next page
+        object_list = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(object_list) > page_size:
+            object_list = object_list[:page_size]
+            last = object_list[-1]
+            self.next_cursor = self.make_cursor(self.position + page_size, last)
+        return (None, None, object_list, bool(cursor or self.next_cursor))
 
     def get_context_data(self, **kwargs):
         context = super(ArticleList, self).get_context_data(**kwargs)
+        context['object_list'] = attach_citations(context['object_list'])
         context['year'] = self.year
         context['years'] = self.years
+        context['position'] = self.position
+        context['next_cursor'] = self.next_cursor
         return context
 
 
 class GrantList(ListView):
 
     def get_queryset(self):
-        return Grant.objects.filter(end__gte=date.today().year).order_by('-end', '-pk')
+        return Grant.objects.filter(end__gte=date.today().year).select_related('agency').order_by('-end', '-pk')
 
     def get_context_data(self, **kwargs):
         context = super(GrantList, self).get_context_data(**kwargs)
-        context['grants_finished'] = Grant.objects.filter(end__gte=(date.today().year - 2),
-                                                          end__lt=date.today().year).order_by('-end', '-pk')
+        context['grants_finished'] = Grant.objects.filter(end__gte=(date.today().year - 2), end__lt=date.today().year) \
+            .select_related('agency').order_by('-end', '-pk')
         return context
 
 
 class ThesisList(ListView):
+    """
+    List of defended theses filtered by type and year.
+
+    Menus are taken from the cached facet index, which also answers filters without any result.
+    """
+    template_name = 'people/thesis_list.html'
 
     def get_queryset(self):
         self.year = self.request.GET.get('year', None)
         self.type = self.request.GET.get('type', None)
 
-        queryset = Thesis.objects.filter(defended=True)
-
+        filters = {}
         if self.year:
-            queryset = queryset.filter(year=int(self.year)).order_by('-type')
+            try:
+                filters['year'] = int(self.year)
+            except ValueError:
+                raise Http404
         if self.type:
-            queryset = queryset.filter(type=self.type.upper()).order_by('-year')
-
-        # annotate on values_list with flat=True does not work properly in Django 1.8 due to a bug in modeltransaltion
-        # self.types = Thesis.objects.filter(defended=True).values_list('type', flat=True).annotate(Count('type'))
-        #                    .order_by('-type')
-        # self.years = Thesis.objects.filter(defended=True).values_list('year', flat=True).annotate(Count('year'))
-        #                    .order_by('-year')
-        self.types = [i[0] for i in Thesis.objects.filter(defended=True).values_list('type').annotate(Count('type'))
-                                          .order_by('-type')]
-        self.years = [i[0] for i in Thesis.objects.filter(defended=True).values_list('year').annotate(Count('year'))
-                                          .order_by('-year')]
+            filters['type'] = self.type.upper()
+
+        index = facets.get_thesis_index(**filters)
+        self.types = sorted(set(type for type, year in index), reverse=True)
+        self.years = sorted(set(year for type, year in index), reverse=True)
 
+        if not filters:
+            return []
         # we got filter but no results
-        if self.year or self.type:
-            if not queryset:
-                raise Http404
+        if not any(filters.get('type', type) == type and filters.get('year', year) == year for type, year in index):
+            raise Http404
+
+        queryset = Thesis.objects.filter(defended=True, **filters).select_related('author', 'advisor')
+        if self.year:
+            queryset = queryset.order_by('-type')
         else:
-            queryset = queryset.none()
-        return queryset
+            queryset = queryset.order_by('-year')
+        return list(queryset)
 
     def get_context_data(self, **kwargs):
         context = super(ThesisList, self).get_context_data(**kwargs)
@@ -87,6 +165,22 @@ class ThesisList(ListView):
         return context
 
 
+class SearchView(ListView):
+    """
+    Ranked results of a full-text search.
+    """
+    template_name = 'people/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '')
+        return search.search(self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchView, self).get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
+
 class PeopleList(ListView):
 
     people_type = None
@@ -98,25 +192,28 @@ class PeopleList(ListView):
         return context
 
     def get_queryset(self):
-        return Person.objects.filter(type=self.people_type, is_active=True).order_by('last_name')
+        return Person.objects.filter(type=self.people_type, is_active=True).select_related('human') \
+            .prefetch_related('place').order_by('last_name')
 
 
 class StudentList(ListView):
 
     template_name = 'people/students.html'
-    queryset = Person.objects.filter(type='MGR', is_active=True).order_by('last_name')
+    queryset = Person.objects.filter(type='MGR', is_active=True).select_related('human').order_by('last_name')
 
     def get_context_data(self, **kwargs):
         context = super(StudentList, self).get_context_data(**kwargs)
-        context['bachelors'] = Person.objects.filter(type='BC', is_active=True).order_by('last_name')
-        context['students'] = Person.objects.filter(type='STUDENT', is_active=True).order_by('last_name')
+        students = Person.objects.filter(is_active=True).select_related('human').order_by('last_name')
+        context['bachelors'] = students.filter(type='BC')
+        context['students'] = students.filter(type='STUDENT')
         return context
 
 
 class RetiredList(ListView):
 
     template_name = 'people/retired_list.html'
-    queryset = Person.objects.filter(type__in=('STAFF', 'OTHER'), is_active=False).order_by('last_name')
+    queryset = Person.objects.filter(type__in=('STAFF', 'OTHER'), is_active=False).select_related('human') \
+        .prefetch_related('place').order_by('last_name')
 
     def get_context_data(self, **kwargs):
         context = super(RetiredList, self).get_context_data(**kwargs)
@@ -126,63 +223,65 @@ class RetiredList(ListView):
 
 ###############################################################################
 # Person pages
-class PersonMixin(object):
+class PersonMixin(ConditionalMixin):
+    """
+    Provides profile of a human to person pages and caches the rendered pages.
+    """
     allow_empty = False
 
+    def get_validators(self):
+        self.modified = Human.objects.filter(nickname=self.kwargs['slug']).values_list('modified', flat=True).first()
+        if self.modified is None:
+            return None, None
+        etag = make_etag(self.request.resolver_match.url_name, get_language(), date.today().year, self.modified)
+        return etag, self.modified
+
+    def get(self, request, *args, **kwargs):
+        language = get_language()
+        view_name = request.resolver_match.url_name
+        modified = getattr(self, 'modified', None)
+        if (not getattr(settings, 'PERSON_PAGE_CACHE', True) or view_name not in page_cache.PERSON_VIEWS
+                or language not in dict(settings.LANGUAGES) or modified is None):
+            return super(PersonMixin, self).get(request, *args, **kwargs)
+
+        nickname = kwargs['slug']
+        content = page_cache.get_page(nickname, modified, view_name, language)
+        if content is not None:
+            return HttpResponse(content)
+
+        response = super(PersonMixin, self).get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda r: page_cache.set_page(nickname, modified, view_name, language, r.content))
+        return response
+
+    def get_profile(self):
+        if not hasattr(self, 'profile'):
+            self.profile = HumanProfile.load(self.kwargs['slug'])
+        return self.profile
+
     def get_context_data(self, **kwargs):
         context = super(PersonMixin, self).get_context_data(**kwargs)
-        human = get_object_or_404(Human, nickname=self.kwargs['slug'])
-
-        publications_first = Article.objects.filter(author__order=1, author__person__human=human).order_by('-year')
-        grants_author = Grant.objects.filter(author__human=human, end__gte=date.today().year) \
-            .values_list('pk', flat=True)
-        grants_co_author = Grant.objects.filter(co_authors__human=human, end__gte=date.today().year) \
-            .values_list('pk', flat=True)
-        grants_finished_author = Grant.objects.filter(author__human=human, end__lt=date.today().year) \
-            .values_list('pk', flat=True)
-        grants_finished_co_author = Grant.objects.filter(co_authors__human=human, end__lt=date.today().year) \
-            .values_list('pk', flat=True)
-        grants_finished = Grant.objects.filter(pk__in=grants_finished_author | grants_finished_co_author) \
-            .order_by('-end', '-pk')
-        students_finished = Person.objects.filter(advisor__human=human, is_active=False) \
-            .order_by('last_name', 'first_name')
+        profile = self.get_profile()
         context.update({
-            'human': human,
-            'person': human.person_set.order_by('-is_active')[0],
-            'publications': Article.objects.filter(author__person__human=human).order_by('-year', 'title'),
-            'publications_first': publications_first,
-            'courses': Course.objects.filter(lectors__human=human).order_by('pk'),
-            'courses_practical': Course.objects.filter(practical_lectors__human=human).order_by('pk'),
-            'students': Person.objects.filter(advisor__human=human, is_active=True).order_by('last_name', 'first_name'),
-            'students_finished': students_finished,
-            'grants': Grant.objects.filter(pk__in=grants_author | grants_co_author).order_by('-end', '-pk'),
-            'grants_finished': grants_finished,
+            'profile': profile,
+            'human': profile.human,
+            'person': profile.person,
         })
         return context
 
 
-class PersonListView(ListView):
-    slug_field = None
-
-    def get_queryset(self):
-        query = {self.slug_field: self.kwargs['slug']}
-        queryset = super(PersonListView, self).get_queryset().filter(**query)
-        if self.get_allow_empty() and not queryset.exists():
-            raise Http404
-        return queryset
-
-
 class PersonDetail(PersonMixin, DetailView):
 
     template_name = 'people/person/detail.html'
-    queryset = Person.objects.filter(is_active=True)
-    slug_field = 'human__nickname'
+
+    def get_object(self, queryset=None):
+        return self.get_profile().active_person
 
     def get_context_data(self, **kwargs):
         context = super(PersonDetail, self).get_context_data(**kwargs)
-        context['theses'] = Thesis.objects.filter(author__human=self.object.human, defended=True).order_by('-year')
-        context['theses_ongoing'] = Thesis.objects.filter(author__human=self.object.human, defended=False) \
-            .order_by('-year')
+        context['theses'] = self.profile.theses
+        context['theses_ongoing'] = self.profile.theses_ongoing
         return context
 
 
@@ -193,63 +292,151 @@ class PersonArticles(PersonMixin, ListView):
     @ivar first: If only papers with Person as a first author shoudl be displayed
     '''
     template_name = 'people/person/articles.html'
-    model = Article
     first = False
 
+    def get_queryset(self):
+        # Attach citations to all publications at once
+        return attach_citations(self.get_profile().publications)
+
     def get_context_data(self, **kwargs):
         context = super(PersonArticles, self).get_context_data(**kwargs)
-        if context['human'].display_posters:
-            presentation_types = ['POSTER', 'TALK', 'INVITED']
+        human = context['human']
+        if human.display_posters:
+            presentation_types = ('POSTER', 'TALK', 'INVITED')
         else:
-            presentation_types = ['TALK', 'INVITED']
+            presentation_types = ('TALK', 'INVITED')
+        publications = self.object_list
         if self.first:
-            context['articles'] = context['publications_first'].filter(type='ARTICLE')
+            articles = self.profile.publications_first
         else:
-            context['articles'] = context['publications'].filter(type='ARTICLE')
-        if context['human'].display_talks:
-            context['presentations'] = context['publications'].filter(type__in=presentation_types)
-        else:
-            context['presentations'] = context['publications'].filter(type__in=presentation_types) \
-                .filter(presenter__human=context['person'].human)
-        context['books'] = context['publications'].filter(type='BOOK')
+            articles = publications
+        presentations = [p for p in publications if p.type in presentation_types]
+        if not human.display_talks:
+            presentations = [p for p in presentations if p.presenter and p.presenter.human_id == human.pk]
+        context.update({
+            'publications': publications,
+            'publications_first': self.profile.publications_first,
+            'articles': [a for a in articles if a.type == 'ARTICLE'],
+            'presentations': presentations,
+            'books': [p for p in publications if p.type == 'BOOK'],
+        })
         return context
 
 
-class PersonCourses(PersonMixin, PersonListView):
+class PersonCourses(PersonMixin, ListView):
 
     template_name = 'people/person/courses.html'
-    model = Course
 
     def get_queryset(self):
-        nick = self.kwargs['slug']
-        courses_lector = Course.objects.filter(lectors__human__nickname=nick).values_list('pk', flat=True)
-        courses_practical = Course.objects.filter(practical_lectors__human__nickname=nick).values_list('pk', flat=True)
-        return self.model.objects.filter(pk__in=courses_lector | courses_practical)
+        profile = self.get_profile()
+        return profile.courses + [c for c in profile.courses_practical if c not in profile.courses]
+
+    def get_context_data(self, **kwargs):
+        context = super(PersonCourses, self).get_context_data(**kwargs)
+        context['courses'] = self.profile.courses
+        context['courses_practical'] = self.profile.courses_practical
+        return context
 
 
-class PersonStudents(PersonMixin, PersonListView):
+class PersonStudents(PersonMixin, ListView):
 
     template_name = 'people/person/students.html'
-    model = Person
-    slug_field = 'advisor__human__nickname'
 
+    def get_queryset(self):
+        profile = self.get_profile()
+        return profile.students + profile.students_finished
+
+    def get_context_data(self, **kwargs):
+        context = super(PersonStudents, self).get_context_data(**kwargs)
+        context['students'] = self.profile.students
+        context['students_finished'] = self.profile.students_finished
+        return context
 
-class PersonGrants(PersonMixin, PersonListView):
+
+class PersonGrants(PersonMixin, ListView):
 
     template_name = 'people/person/grants.html'
-    model = Grant
 
     def get_queryset(self):
         '''
         Lookup grants by author or coauthor.
         '''
-        nick = self.kwargs['slug']
-        grants_author = Grant.objects.filter(author__human__nickname=nick).values_list('pk', flat=True)
-        grants_co_author = Grant.objects.filter(co_authors__human__nickname=nick).values_list('pk', flat=True)
-        return self.model.objects.filter(pk__in=grants_author | grants_co_author)
+        profile = self.get_profile()
+        return profile.grants + profile.grants_finished
+
+    def get_context_data(self, **kwargs):
+        context = super(PersonGrants, self).get_context_data(**kwargs)
+        context['grants'] = self.profile.grants
+        context['grants_finished'] = self.profile.grants_finished
+        return context
 
 
-class Papers(PersonMixin, ListView):
+class Papers(ConditionalMixin, View):
+    """
+    Full list of articles and books.
 
+    Response is streamed, articles are loaded and rendered in chunks of `chunk_size`.
+    """
     template_name = 'people/papers.html'
-    queryset = Article.objects.filter(type__in=('ARTICLE', 'BOOK')).order_by('-year')
+    chunk_size = 500
+
+    def get_queryset(self):
+        return Article.objects.filter(type__in=facets.ARTICLE_LIST_TYPES).order_by('-year', 'pk')
+
+    def get_validators(self):
+        modified = Article.objects.filter(type__in=facets.ARTICLE_LIST_TYPES).aggregate(Max('modified'))
+        return make_etag(facets.get_article_years(), modified['modified__max'], get_language()), None
+
+    def get_chunks(self):
+        return get_chunks(self.get_queryset(), self.chunk_size)
+
+    def render_chunks(self, language):
+        # Content is generated after the view returns, keep the language of the request
+        with translation.override(language):
+            for chunk in self.get_chunks():
+                yield render_to_string(self.template_name, {'object_list': attach_citations(chunk)},
+                                       request=self.request)
+
+    def get(self, request, *args, **kwargs):
+        return StreamingHttpResponse(self.render_chunks(get_language()))
+
+
+class BibliographyExport(ConditionalMixin, View):
+    """
+    Bibliography of articles of a human, of a year or of the whole database.
+
+    Response is streamed, articles are loaded with their authors in chunks of `chunk_size`.
+    """
+    chunk_size = bibliography.CHUNK_SIZE
+
+    def get_queryset(self):
+        if 'slug' in self.kwargs:
+            if not Human.objects.filter(nickname=self.kwargs['slug']).exists():
+                raise Http404
+            authors = Author.objects.filter(person__human__nickname=self.kwargs['slug'])
+            return Article.objects.filter(pk__in=authors.values('article'))
+        if 'year' in self.kwargs:
+            year = int(self.kwargs['year'])
+            if year not in dict(facets.get_article_years(year)):
+                raise Http404
+            return Article.objects.filter(type__in=facets.ARTICLE_LIST_TYPES, year=year)
+        return Article.objects.all()
+
+    def get_filename(self):
+        return self.kwargs.get('slug') or self.kwargs.get('year') or 'articles'
+
+    def get_validators(self):
+        try:
+            queryset = self.get_queryset()
+        except Http404:
+            return None, None
+        # Deleted articles don't change the modification time
+        stats = queryset.aggregate(Max('modified'), Count('pk'))
+        return make_etag(sorted(self.kwargs.items()), stats['modified__max'], stats['pk__count']), None
+
+    def get(self, request, *args, **kwargs):
+        content_type, extension, renderer = bibliography.FORMATS[kwargs['format']]
+        response = StreamingHttpResponse(bibliography.export(self.get_queryset(), kwargs['format'], self.chunk_size),
+                                         content_type='%s; charset=utf-8' % content_type)
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (self.get_filename(), extension)
+        return response
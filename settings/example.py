@@ -32,6 +32,11 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
+# Insert 'fuuk.common.middleware.ServerTimingMiddleware' first to report timings of requests in Server-Timing header
+# Log the timings by 'fuuk.timing' logger
+SERVER_TIMING_LOG = False
+# Cache rendered person pages, see fuuk.people.page_cache
+PERSON_PAGE_CACHE = True
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -62,6 +67,15 @@ DATABASES = {
     }
 }
 
+# Cache has to be shared by all processes serving the site, e.g. memcached in production. Processes learn about
+# changes of flatpage routes by a version in the cache and counters of person page cache cover all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/fuuk_cache',
+    }
+}
+
 LANGUAGE_CODE = 'en'
 LANGUAGES = (('en', u'English'),
              ('cs', u'Česky'))
@@ -78,6 +92,7 @@ MEDIA_URL = '/media/'
 LOCALE_PATHS = (os.path.join(BASE_DIR, 'fuuk/locale'), )
 
 # Markdownx settings
+MARKDOWNX_MARKDOWNIFY_FUNCTION = 'fuuk.common.markup.markdownify_preview'
 MARKDOWNX_MARKDOWN_EXTENSIONS = (
     'markdown.extensions.tables',
 )
@@ -8,3 +8,8 @@ DATABASES = {
     }
 }
 SECRET_KEY = 'TEST'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}